@@ -0,0 +1,13 @@
+from starlette.applications import Starlette
+from starlette.routing import Route
+from app.services.media import MEDIA_ROUTE, serve_media
+from app.services.metrics import METRICS_ROUTE, serve_metrics
+from app.services.profiler import PROFILER_ROUTE, toggle_profiler
+
+api = Starlette(
+    routes=[
+        Route(MEDIA_ROUTE + "/{path:path}", serve_media, methods=["GET", "HEAD"]),
+        Route(METRICS_ROUTE, serve_metrics),
+        Route(PROFILER_ROUTE, toggle_profiler, methods=["GET", "POST", "DELETE"]),
+    ]
+)
@@ -31,7 +31,15 @@ from app.states.patient_state import PatientState
 from app.states.doctor_state import DoctorState
 from app.states.settings_state import SettingsState
 from app.states.admin_state import AdminState
+from app.states.index_state import IndexState
+from app.services.cpu_pool import cpu_pool_lifespan
+from app.services.persistence import persistence_lifespan
+from app.services.content_store import content_store_lifespan
+from app.api import api
+from app.services.upload_route import UPLOAD_ROUTE, streaming_upload
+from app.services.instrumentation import instrument_handlers
 
+instrument_handlers()
 app = rx.App(
     theme=rx.theme(appearance="light"),
     head_components=[
@@ -42,8 +50,11 @@ app = rx.App(
             rel="stylesheet",
         ),
     ],
+    api_transformer=api,
 )
-app.add_page(
-    index, on_load=[PatientState.on_load, DoctorState.on_load, AdminState.on_load]
-)
+api.add_route(UPLOAD_ROUTE, streaming_upload(app), methods=["POST"])
+app.register_lifespan_task(cpu_pool_lifespan)
+app.register_lifespan_task(persistence_lifespan)
+app.register_lifespan_task(content_store_lifespan)
+app.add_page(index, on_load=IndexState.on_load)
 app.add_page(settings_page, route="/settings", on_load=[SettingsState.on_load])
\ No newline at end of file
@@ -3,7 +3,7 @@ import datetime
 from typing import Literal, Optional
 from pydantic import BaseModel
 
-EvaluationStatus = Literal["Pending", "Evaluated", "Archived"]
+EvaluationStatus = Literal["Pending", "Evaluated", "Failed", "Archived"]
 
 
 class MoleImage(BaseModel):
@@ -11,7 +11,11 @@ class MoleImage(BaseModel):
     patient_id: int
     patient_name: str
     filename: str
+    original_filename: str = ""
+    content_hash: Optional[str] = None
+    renditions: dict[str, str] = {}
     upload_date: str
+    uploaded_at: float = 0.0
     age: int
     sex: str
     social_number: Optional[str] = None
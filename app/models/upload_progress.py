@@ -0,0 +1,11 @@
+from typing import Literal
+from pydantic import BaseModel
+
+UploadStage = Literal["queued", "receiving", "stored", "scoring", "scored", "failed"]
+
+
+class UploadProgress(BaseModel):
+    name: str
+    size: int = 0
+    bytes_received: int = 0
+    stage: UploadStage = "queued"
@@ -5,9 +5,17 @@ from pydantic import BaseModel
 UserRole = Literal["patient", "doctor", "admin"]
 
 
-class User(BaseModel):
+class UserProfile(BaseModel):
+    """A user without the password hash, safe to keep in client state."""
+
     id: int
     email: str
-    password: str
     role: UserRole
-    name: str
\ No newline at end of file
+    name: str
+
+
+class User(UserProfile):
+    password: str
+
+    def profile(self) -> UserProfile:
+        return UserProfile(id=self.id, email=self.email, role=self.role, name=self.name)
\ No newline at end of file
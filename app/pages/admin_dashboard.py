@@ -1,6 +1,6 @@
 import reflex as rx
 from app.states.admin_state import AdminState
-from app.models.user import User
+from app.models.user import UserProfile
 from app.components.sidebar import sidebar
 
 
@@ -76,7 +76,7 @@ def create_user_modal() -> rx.Component:
     )
 
 
-def user_table_row(user: User) -> rx.Component:
+def user_table_row(user: UserProfile) -> rx.Component:
     """A row in the user management table."""
     return rx.el.tr(
         rx.el.td(
@@ -162,6 +162,7 @@ def admin_dashboard() -> rx.Component:
                             ),
                             rx.el.tbody(
                                 rx.foreach(AdminState.all_users, user_table_row),
+                                rx.foreach(AdminState.recent_users, user_table_row),
                                 class_name="bg-white divide-y divide-gray-200",
                             ),
                             class_name="min-w-full divide-y divide-gray-200 table-auto",
@@ -1,8 +1,9 @@
 import reflex as rx
 from app.states.auth_state import AuthState
-from app.states.doctor_state import DoctorState
+from app.states.doctor_state import AGE_BUCKETS, DoctorState
+from app.services.incremental import END_ANCHOR
 from app.models.mole_image import MoleImage
-from app.pages.patient_dashboard import status_badge
+from app.pages.patient_dashboard import rendition_url, status_badge
 from app.components.sidebar import sidebar
 
 
@@ -12,11 +13,11 @@ def evaluation_modal() -> rx.Component:
         rx.radix.primitives.dialog.content(
             rx.radix.primitives.dialog.title("View AI Evaluation"),
             rx.radix.primitives.dialog.description(
-                f"Image: {DoctorState.selected_image.filename.split('_')[-1]} for patient {DoctorState.selected_image.patient_name}",
+                f"Image: {DoctorState.selected_image.original_filename} for patient {DoctorState.selected_image.patient_name}",
                 class_name="mb-4",
             ),
             rx.el.image(
-                src=rx.get_upload_url(DoctorState.selected_image.filename),
+                src=rendition_url(DoctorState.selected_image, "preview"),
                 class_name="w-full rounded-lg mb-4 h-64 object-contain bg-gray-100",
             ),
             rx.el.div(
@@ -60,13 +61,25 @@ def evaluation_modal() -> rx.Component:
     )
 
 
+def recent_cards_before(anchor_id) -> rx.Component:
+    """Cards of the live-inserted images that sort just before the given base image."""
+    return rx.foreach(
+        DoctorState.recent_images,
+        lambda recent, position: rx.cond(
+            DoctorState.recent_anchor_ids[position] == anchor_id,
+            doctor_image_card(recent),
+            rx.fragment(),
+        ),
+    )
+
+
 def doctor_image_card(image: MoleImage) -> rx.Component:
     """Card to display a mole image for the doctor."""
     return rx.el.li(
         rx.el.div(
             rx.el.div(
                 rx.el.image(
-                    src=rx.get_upload_url(image.filename),
+                    src=rendition_url(image, "thumb"),
                     class_name="aspect-[16/9] w-full rounded-t-lg bg-gray-100 object-cover group-hover:opacity-75",
                 ),
                 class_name="group aspect-h-7 aspect-w-10 block w-full overflow-hidden rounded-t-lg bg-gray-100",
@@ -80,8 +93,16 @@ def doctor_image_card(image: MoleImage) -> rx.Component:
                     ),
                     class_name="flex items-center justify-between",
                 ),
+                rx.cond(
+                    image.status == "Evaluated",
+                    rx.el.p(
+                        f"Risk Score: {image.evaluation_score}/10",
+                        class_name="mt-2 text-xs font-semibold text-gray-700",
+                    ),
+                    None,
+                ),
                 rx.el.p(
-                    image.filename.split("_")[-1],
+                    image.original_filename,
                     class_name="mt-2 block truncate text-sm font-medium text-gray-900",
                 ),
                 class_name="p-4",
@@ -92,6 +113,77 @@ def doctor_image_card(image: MoleImage) -> rx.Component:
     )
 
 
+def worklist_page_button(label: str, on_click: rx.EventHandler) -> rx.Component:
+    """Button that pages the worklist window towards newer or older images."""
+    return rx.el.button(
+        label,
+        on_click=on_click,
+        class_name="mx-auto rounded-md bg-white px-3.5 py-2 text-sm font-semibold text-gray-900 shadow-sm ring-1 ring-inset ring-gray-300 hover:bg-gray-50",
+    )
+
+
+def sort_order_button(label: str, order: str) -> rx.Component:
+    """Segment of the toggle that orders the worklist by recency or AI risk."""
+    return rx.el.button(
+        label,
+        on_click=DoctorState.set_sort_order(order),
+        class_name=rx.cond(
+            DoctorState.sort_order == order,
+            "px-3 py-1.5 text-sm font-semibold bg-blue-600 text-white ring-1 ring-inset ring-blue-600 first:rounded-l-md last:rounded-r-md",
+            "px-3 py-1.5 text-sm font-semibold bg-white text-gray-900 ring-1 ring-inset ring-gray-300 hover:bg-gray-50 first:rounded-l-md last:rounded-r-md",
+        ),
+    )
+
+
+FILTER_INPUT_CLASS = "block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500 sm:text-sm"
+
+
+def filter_select(name: str, any_label: str, options: list[str]) -> rx.Component:
+    """Dropdown for one worklist filter, with an empty choice meaning no filter."""
+    return rx.el.select(
+        rx.el.option(any_label, value=""),
+        *[rx.el.option(option, value=option) for option in options],
+        name=name,
+        class_name=FILTER_INPUT_CLASS,
+    )
+
+
+def filter_bar() -> rx.Component:
+    """Search and filter form; the query runs on the server against the indexes."""
+    scores = [str(score) for score in range(11)]
+    return rx.el.form(
+        rx.el.input(
+            name="text",
+            placeholder="Search patient name or social number",
+            class_name=FILTER_INPUT_CLASS + " sm:col-span-2",
+        ),
+        filter_select("status", "Any status", ["Pending", "Evaluated", "Failed"]),
+        filter_select("sex", "Any sex", ["Male", "Female", "Other"]),
+        filter_select("age", "Any age", list(AGE_BUCKETS)),
+        filter_select("min_score", "Min score", scores),
+        filter_select("max_score", "Max score", scores),
+        rx.el.input(name="from", type="date", class_name=FILTER_INPUT_CLASS),
+        rx.el.input(name="to", type="date", class_name=FILTER_INPUT_CLASS),
+        rx.el.div(
+            rx.el.button(
+                "Search",
+                type="submit",
+                class_name="rounded-md bg-blue-600 px-3.5 py-2 text-sm font-semibold text-white shadow-sm hover:bg-blue-500",
+            ),
+            rx.el.button(
+                "Clear",
+                type="reset",
+                on_click=DoctorState.clear_filters,
+                class_name="rounded-md bg-white px-3.5 py-2 text-sm font-semibold text-gray-900 shadow-sm ring-1 ring-inset ring-gray-300 hover:bg-gray-50",
+            ),
+            class_name="flex gap-2",
+        ),
+        on_submit=DoctorState.apply_filters,
+        reset_on_submit=False,
+        class_name="mb-6 grid grid-cols-1 gap-3 sm:grid-cols-2 lg:grid-cols-5",
+    )
+
+
 def doctor_dashboard() -> rx.Component:
     """Dashboard for the doctor user role."""
     page_content = rx.el.div(
@@ -100,22 +192,60 @@ def doctor_dashboard() -> rx.Component:
             rx.el.h1(
                 "Pending Evaluations", class_name="text-2xl font-bold text-gray-900"
             ),
-            class_name="py-6",
+            rx.el.div(
+                sort_order_button("Newest", "recent"),
+                sort_order_button("Highest risk", "risk"),
+                class_name="inline-flex rounded-md shadow-sm",
+            ),
+            class_name="flex items-center justify-between py-6",
         ),
+        filter_bar(),
         rx.cond(
-            DoctorState.all_images.length() > 0,
-            rx.el.ul(
-                rx.foreach(DoctorState.all_images, doctor_image_card),
-                class_name="grid grid-cols-1 gap-x-4 gap-y-8 sm:grid-cols-2 sm:gap-x-6 lg:grid-cols-3 xl:gap-x-8",
+            DoctorState.all_images.length() + DoctorState.recent_images.length() > 0,
+            rx.el.div(
+                rx.cond(
+                    DoctorState.has_newer,
+                    worklist_page_button("Show newer", DoctorState.load_newer),
+                    None,
+                ),
+                rx.el.ul(
+                    rx.foreach(
+                        DoctorState.all_images,
+                        lambda image: rx.fragment(
+                            recent_cards_before(image.id),
+                            rx.cond(
+                                DoctorState.superseded_image_ids.contains(image.id),
+                                rx.fragment(),
+                                doctor_image_card(image),
+                            ),
+                        ),
+                    ),
+                    recent_cards_before(END_ANCHOR),
+                    class_name="grid grid-cols-1 gap-x-4 gap-y-8 sm:grid-cols-2 sm:gap-x-6 lg:grid-cols-3 xl:gap-x-8",
+                ),
+                rx.cond(
+                    DoctorState.has_older,
+                    worklist_page_button("Load more", DoctorState.load_older),
+                    None,
+                ),
+                class_name="flex flex-col gap-6",
             ),
             rx.el.div(
                 rx.icon("folder-check", class_name="mx-auto h-12 w-12 text-gray-400"),
                 rx.el.h3(
-                    "All caught up!",
+                    rx.cond(
+                        DoctorState.filters.length() > 0,
+                        "No matching images",
+                        "All caught up!",
+                    ),
                     class_name="mt-2 text-sm font-semibold text-gray-900",
                 ),
                 rx.el.p(
-                    "There are no new photos to evaluate.",
+                    rx.cond(
+                        DoctorState.filters.length() > 0,
+                        "No photos match these filters.",
+                        "There are no new photos to evaluate.",
+                    ),
                     class_name="mt-1 text-sm text-gray-500",
                 ),
                 class_name="relative block w-full rounded-lg border-2 border-dashed border-gray-300 p-12 text-center",
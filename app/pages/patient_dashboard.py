@@ -1,8 +1,10 @@
 import reflex as rx
 from app.states.auth_state import AuthState
-from app.states.patient_state import PatientState
+from app.states.patient_state import MAX_PATIENT_AGE, PatientState
 from app.models.mole_image import MoleImage
+from app.models.upload_progress import UploadProgress
 from app.components.sidebar import sidebar
+from app.services.media import MEDIA_ROUTE
 
 UPLOAD_ID = "upload_mole_images"
 
@@ -26,6 +28,13 @@ def status_badge(status: rx.Var[str]) -> rx.Component:
                     class_name="whitespace-nowrap rounded-md bg-green-100 px-2 py-1 text-xs font-medium text-green-700 ring-1 ring-inset ring-green-600/20 w-fit",
                 ),
             ),
+            (
+                "Failed",
+                rx.el.span(
+                    "Needs review",
+                    class_name="whitespace-nowrap rounded-md bg-red-100 px-2 py-1 text-xs font-medium text-red-700 ring-1 ring-inset ring-red-600/20 w-fit",
+                ),
+            ),
             (
                 "Archived",
                 rx.el.span(
@@ -38,13 +47,29 @@ def status_badge(status: rx.Var[str]) -> rx.Component:
     )
 
 
+def media_url(name: rx.Var[str]) -> rx.Var[str]:
+    """URL of an uploaded file on the cache-aware media route of the backend."""
+    return rx.Var.create(f"{rx.config.get_config().api_url}{MEDIA_ROUTE}/") + name
+
+
+def rendition_url(image: MoleImage, rendition: str) -> rx.Var[str]:
+    """URL of the given rendition of an image, falling back to the original upload."""
+    return media_url(
+        rx.cond(
+            image.renditions.contains(rendition),
+            image.renditions[rendition],
+            image.filename,
+        )
+    )
+
+
 def image_card(image: MoleImage) -> rx.Component:
     """A card component to display an uploaded mole image and its details."""
     return rx.el.li(
         rx.el.div(
             rx.el.div(
                 rx.el.image(
-                    src=rx.get_upload_url(image.filename),
+                    src=rendition_url(image, "thumb"),
                     class_name="aspect-[16/9] w-full rounded-t-lg bg-gray-100 object-cover",
                 ),
                 class_name="group aspect-h-7 aspect-w-10 block w-full overflow-hidden rounded-t-lg bg-gray-100",
@@ -59,7 +84,7 @@ def image_card(image: MoleImage) -> rx.Component:
                     class_name="flex items-center justify-between",
                 ),
                 rx.el.p(
-                    image.filename.split("_")[-1],
+                    image.original_filename,
                     class_name="mt-2 block truncate text-sm font-medium text-gray-900",
                 ),
                 class_name="p-4",
@@ -69,6 +94,23 @@ def image_card(image: MoleImage) -> rx.Component:
     )
 
 
+def upload_progress_row(progress: UploadProgress) -> rx.Component:
+    """A row showing how far one uploaded file has been processed."""
+    return rx.el.div(
+        rx.icon("file-image", class_name="h-5 w-5 text-gray-500"),
+        rx.el.p(progress.name, class_name="flex-1 text-sm text-gray-700 truncate"),
+        rx.el.p(
+            f"{progress.bytes_received // 1024} KB",
+            class_name="text-xs text-gray-500",
+        ),
+        rx.el.span(
+            progress.stage,
+            class_name="whitespace-nowrap rounded-md bg-gray-100 px-2 py-1 text-xs font-medium capitalize text-gray-700",
+        ),
+        class_name="flex items-center space-x-2 rounded-md border bg-white px-3 py-2",
+    )
+
+
 def upload_section() -> rx.Component:
     """Component for uploading new mole images."""
     return rx.el.div(
@@ -86,6 +128,8 @@ def upload_section() -> rx.Component:
                 rx.el.input(
                     placeholder="e.g., 34",
                     type="number",
+                    min=0,
+                    max=MAX_PATIENT_AGE,
                     on_change=PatientState.set_patient_age,
                     class_name="mt-1 block w-full rounded-md border-gray-300 shadow-sm focus:border-blue-500 focus:ring-blue-500 sm:text-sm",
                     default_value=PatientState.patient_age,
@@ -141,6 +185,10 @@ def upload_section() -> rx.Component:
             ),
             class_name="mt-4 space-y-2",
         ),
+        rx.el.div(
+            rx.foreach(PatientState.upload_progress, upload_progress_row),
+            class_name="mt-4 space-y-2",
+        ),
         rx.el.div(
             rx.el.button(
                 "Clear",
@@ -180,9 +228,19 @@ def patient_dashboard() -> rx.Component:
                     class_name="pb-4",
                 ),
                 rx.cond(
-                    PatientState.user_images.length() > 0,
+                    PatientState.user_images.length()
+                    + PatientState.recent_user_images.length()
+                    > 0,
                     rx.el.ul(
-                        rx.foreach(PatientState.user_images, image_card),
+                        rx.foreach(PatientState.recent_user_images, image_card),
+                        rx.foreach(
+                            PatientState.user_images,
+                            lambda image: rx.cond(
+                                PatientState.superseded_image_ids.contains(image.id),
+                                rx.fragment(),
+                                image_card(image),
+                            ),
+                        ),
                         class_name="grid grid-cols-1 gap-x-4 gap-y-8 sm:grid-cols-2 sm:gap-x-6 xl:grid-cols-2 2xl:grid-cols-3 xl:gap-x-8",
                     ),
                     rx.el.div(
@@ -0,0 +1,194 @@
+import asyncio
+import contextlib
+import fcntl
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+import reflex as rx
+from app.services.cpu_pool import cpu_pool
+from app.services.file_io import file_syncer
+from app.services.normalize import MASTER_EXTENSION, normalize_image
+from app.services.uploads import stream_upload_to_temp
+
+CONTENT_STORE_DIR = "cas"
+LOCK_DIR = ".locks"
+REFCOUNT_LOCK_STRIPES = 64
+
+
+class StoredBlob(NamedTuple):
+    name: str
+    sha256: str
+    size: int
+    is_new: bool
+
+
+class ContentStore:
+    """Stores each distinct upload once, addressed by the SHA-256 of the uploaded bytes.
+
+    Blobs live at `cas/<h[:2]>/<h[2:4]>/<h><ext>` under the upload directory,
+    next to a `<h>.refs` file holding the blob name and how many images point
+    at it. Uploading identical bytes again only bumps the reference count.
+    When a `normalize` function is given, new uploads are rewritten through it
+    in the CPU pool and the result is stored in place of the original bytes.
+    All disk access from `put` runs in worker threads. Writes of one hash are
+    serialized by a lock stripe, held both in-process and as an flock on a
+    file under `cas/.locks`, so identical uploads handled by different
+    backend workers still count their references.
+    """
+
+    def __init__(
+        self,
+        upload_dir: Optional[Path] = None,
+        normalize: Optional[Callable[[Path, Path], None]] = None,
+        normalized_extension: str = "",
+    ):
+        self._upload_dir = upload_dir
+        self.normalize = normalize
+        self.normalized_extension = normalized_extension
+        self._locks = [asyncio.Lock() for _ in range(REFCOUNT_LOCK_STRIPES)]
+        self._known_dirs: set[Path] = set()
+
+    @property
+    def upload_dir(self) -> Path:
+        return self._upload_dir or rx.get_upload_dir()
+
+    def shard_dir(self, sha256: str) -> Path:
+        return self.upload_dir / CONTENT_STORE_DIR / sha256[:2] / sha256[2:4]
+
+    def prepare(self):
+        """Create the staging directory; called once at startup, not per upload."""
+        (self.upload_dir / CONTENT_STORE_DIR / LOCK_DIR).mkdir(
+            parents=True, exist_ok=True
+        )
+
+    def path(self, name: str) -> Path:
+        """Absolute path of a blob given its name relative to the upload directory."""
+        return self.upload_dir / name
+
+    def lookup(self, sha256: str) -> Optional[tuple[str, int]]:
+        """Blob name and reference count for a hash, if the content is stored."""
+        refs_path = self.shard_dir(sha256) / f"{sha256}.refs"
+        try:
+            name, count = refs_path.read_text().split("\n")[:2]
+        except FileNotFoundError:
+            return None
+        return name, int(count)
+
+    async def put(
+        self,
+        file: rx.UploadFile,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> StoredBlob:
+        """Stream an upload into the store, deduplicating identical content."""
+        staging_dir = self.upload_dir / CONTENT_STORE_DIR
+        upload = await stream_upload_to_temp(file, staging_dir, on_progress)
+        async with self._lock(upload.sha256):
+            existing = await asyncio.to_thread(self.lookup, upload.sha256)
+            if existing is not None:
+                await asyncio.to_thread(upload.path.unlink)
+                name, count = existing
+                refs_path = await asyncio.to_thread(
+                    self._write_refs, upload.sha256, name, count + 1
+                )
+                await file_syncer.sync(refs_path)
+                return StoredBlob(name, upload.sha256, upload.size, is_new=False)
+            source_path = upload.path
+            extension = Path(file.name or "").suffix.lower()
+            if self.normalize is not None:
+                source_path = upload.path.with_suffix(".normalized")
+                try:
+                    await cpu_pool.run(self.normalize, upload.path, source_path)
+                except BaseException:
+                    source_path.unlink(missing_ok=True)
+                    raise
+                finally:
+                    await asyncio.to_thread(upload.path.unlink, missing_ok=True)
+                extension = self.normalized_extension
+            shard_dir = self.shard_dir(upload.sha256)
+            blob_path = shard_dir / f"{upload.sha256}{extension}"
+            await self._ensure_dir(shard_dir)
+            await asyncio.to_thread(os.replace, source_path, blob_path)
+            name = blob_path.relative_to(self.upload_dir).as_posix()
+            refs_path = await asyncio.to_thread(
+                self._write_refs, upload.sha256, name, 1
+            )
+            await file_syncer.sync(blob_path, refs_path, shard_dir)
+        return StoredBlob(name, upload.sha256, upload.size, is_new=True)
+
+    def _stripe(self, sha256: str) -> int:
+        return int(sha256[:8], 16) % REFCOUNT_LOCK_STRIPES
+
+    def _lock_file(self, stripe: int) -> int:
+        """Open and flock the lock file of a stripe, blocking until it is free."""
+        lock_path = self.upload_dir / CONTENT_STORE_DIR / LOCK_DIR / f"{stripe}.lock"
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        return fd
+
+    @contextlib.asynccontextmanager
+    async def _lock(self, sha256: str):
+        """Hold the stripe of a hash against other tasks and other processes."""
+        stripe = self._stripe(sha256)
+        async with self._locks[stripe]:
+            fd = await asyncio.to_thread(self._lock_file, stripe)
+            try:
+                yield
+            finally:
+                os.close(fd)
+
+    async def _ensure_dir(self, directory: Path):
+        if directory not in self._known_dirs:
+            await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+            self._known_dirs.add(directory)
+
+    def release(self, sha256: str) -> bool:
+        """Drop one reference to a blob, deleting it with the last one.
+
+        Returns whether the blob was deleted. Blocks on the hash's lock file,
+        so call it from a worker thread rather than the event loop.
+        """
+        fd = self._lock_file(self._stripe(sha256))
+        try:
+            existing = self.lookup(sha256)
+            if existing is None:
+                return False
+            name, count = existing
+            if count > 1:
+                self._write_refs(sha256, name, count - 1)
+                return False
+            self.path(name).unlink(missing_ok=True)
+            (self.shard_dir(sha256) / f"{sha256}.refs").unlink(missing_ok=True)
+            return True
+        finally:
+            os.close(fd)
+
+    def _write_refs(self, sha256: str, name: str, count: int) -> Path:
+        refs_path = self.shard_dir(sha256) / f"{sha256}.refs"
+        fd, tmp_name = tempfile.mkstemp(
+            dir=refs_path.parent, prefix=f".{refs_path.name}.", suffix=".part"
+        )
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                tmp.write(f"{name}\n{count}\n")
+            os.replace(tmp_name, refs_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        return refs_path
+
+
+content_store = ContentStore(
+    normalize=normalize_image, normalized_extension=MASTER_EXTENSION
+)
+
+
+@contextlib.asynccontextmanager
+async def content_store_lifespan():
+    """Create the upload directories once before the app serves uploads."""
+    await asyncio.to_thread(content_store.prepare)
+    yield
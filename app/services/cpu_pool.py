@@ -0,0 +1,115 @@
+import asyncio
+import contextlib
+import functools
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+CPU_POOL_WORKERS = int(os.environ.get("MOLE_CPU_WORKERS", "0")) or os.cpu_count() or 1
+CPU_POOL_MAX_PENDING = int(
+    os.environ.get("MOLE_CPU_MAX_PENDING", str(4 * CPU_POOL_WORKERS))
+)
+LOOP_LAG_INTERVAL = 0.1
+LOOP_LAG_WARN_THRESHOLD = 0.25
+
+
+class CpuPool:
+    """Runs CPU-bound work such as image decoding and scoring in worker processes.
+
+    At most `max_pending` jobs may be queued or running at once; further callers
+    wait for a free slot, which pushes back on the upload handlers instead of
+    letting the queue grow without bound. Workers are forked from a fork
+    server rather than from the backend, so they never inherit its open files:
+    a worker forked while the content store held a lock file would otherwise
+    keep that lock held for as long as it lives.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self._slots = asyncio.Semaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` in the pool, waiting for a slot if the queue is full."""
+        async with self._slots:
+            self.pending += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._get_executor(), functools.partial(fn, *args)
+                )
+            finally:
+                self.pending -= 1
+                self.completed += 1
+
+    def shutdown(self):
+        """Stop the worker processes, cancelling jobs that have not started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return self._executor
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from short sleeps.
+
+    Lag stays near zero while handlers yield to the loop; a blocking call in an
+    async handler shows up directly as a lag sample of the same length.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL, window: int = 600):
+        self.interval = interval
+        self.samples: deque[float] = deque(maxlen=window)
+        self.max_lag = 0.0
+
+    async def run(self):
+        """Sample loop lag until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > LOOP_LAG_WARN_THRESHOLD:
+                logger.warning("Event loop was blocked for %.0f ms.", lag * 1000)
+
+    def snapshot(self) -> dict[str, float]:
+        """Lag percentiles over the recent window and the all-time maximum, in seconds."""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {"p50": 0.0, "p99": 0.0, "max": self.max_lag}
+        return {
+            "p50": ordered[len(ordered) // 2],
+            "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            "max": self.max_lag,
+        }
+
+
+cpu_pool = CpuPool(CPU_POOL_WORKERS, CPU_POOL_MAX_PENDING)
+loop_lag_monitor = LoopLagMonitor()
+
+
+@contextlib.asynccontextmanager
+async def cpu_pool_lifespan():
+    """Monitor event-loop lag while the app runs and stop the pool on shutdown."""
+    monitor = asyncio.create_task(loop_lag_monitor.run())
+    try:
+        yield
+    finally:
+        monitor.cancel()
+        cpu_pool.shutdown()
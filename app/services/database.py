@@ -0,0 +1,404 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+from typing import Any, Callable, Iterable, Iterator
+from app.models.mole_image import MoleImage
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.environ.get("MOLE_DATABASE_URL", "sqlite:///mole.db")
+DATABASE_POOL_SIZE = int(os.environ.get("MOLE_DATABASE_POOL_SIZE", "4"))
+DATABASE_FLUSH_INTERVAL = 0.2
+BULK_LOAD_CHUNK_SIZE = 50_000
+
+USER_COLUMNS = ("id", "email", "password", "role", "name")
+IMAGE_COLUMNS = (
+    "id",
+    "patient_id",
+    "patient_name",
+    "filename",
+    "original_filename",
+    "content_hash",
+    "renditions",
+    "upload_date",
+    "uploaded_at",
+    "age",
+    "sex",
+    "social_number",
+    "status",
+    "evaluation_score",
+    "evaluation_notes",
+)
+SEQUENCES = ("users", "mole_images", "revision")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        email TEXT NOT NULL,
+        password TEXT NOT NULL,
+        role TEXT NOT NULL,
+        name TEXT NOT NULL,
+        revision INTEGER NOT NULL DEFAULT 0
+    )""",
+    "CREATE UNIQUE INDEX IF NOT EXISTS users_email ON users (lower(email))",
+    """CREATE TABLE IF NOT EXISTS mole_images (
+        id INTEGER PRIMARY KEY,
+        patient_id INTEGER NOT NULL,
+        patient_name TEXT NOT NULL,
+        filename TEXT NOT NULL,
+        original_filename TEXT NOT NULL,
+        content_hash TEXT,
+        renditions TEXT NOT NULL,
+        upload_date TEXT NOT NULL,
+        uploaded_at DOUBLE PRECISION NOT NULL,
+        age INTEGER NOT NULL,
+        sex TEXT NOT NULL,
+        social_number TEXT,
+        status TEXT NOT NULL,
+        evaluation_score INTEGER,
+        evaluation_notes TEXT,
+        revision INTEGER NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS sequences (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )""",
+)
+REVISION_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS users_revision ON users (revision)",
+    "CREATE INDEX IF NOT EXISTS mole_images_revision ON mole_images (revision)",
+)
+
+IMAGE_INDEXES = {
+    "mole_images_patient": "CREATE INDEX IF NOT EXISTS mole_images_patient ON mole_images (patient_id, uploaded_at)",
+    "mole_images_status": "CREATE INDEX IF NOT EXISTS mole_images_status ON mole_images (status, uploaded_at)",
+}
+
+
+class SQLitePool:
+    """A fixed-size pool of SQLite connections in WAL mode.
+
+    WAL lets readers proceed while a writer commits, and each connection is only
+    ever used by one thread at a time, so handlers can run queries through
+    `asyncio.to_thread` without sharing a cursor.
+    """
+
+    placeholder = "?"
+    integrity_error = sqlite3.IntegrityError
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._idle.get()
+        try:
+            if conn is None:
+                conn = self._connect()
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+
+class PostgresPool:
+    """Connection pool for a Postgres database, backed by psycopg_pool."""
+
+    placeholder = "%s"
+
+    def __init__(self, url: str, size: int):
+        from psycopg import IntegrityError
+        from psycopg_pool import ConnectionPool
+
+        self.integrity_error = IntegrityError
+        self._pool = ConnectionPool(url, min_size=1, max_size=size)
+
+    @contextlib.contextmanager
+    def connection(self):
+        with self._pool.connection() as conn:
+            yield conn
+
+
+def _upsert_sql(table: str, columns: tuple[str, ...], placeholder: str) -> str:
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) "
+        f"VALUES ({', '.join([placeholder] * len(columns))}) "
+        f"ON CONFLICT (id) DO UPDATE SET {updates}"
+    )
+
+
+def image_row(image: MoleImage) -> tuple:
+    """Flatten an image into a row in IMAGE_COLUMNS order."""
+    values = image.model_dump()
+    values["renditions"] = json.dumps(values["renditions"])
+    return tuple(values[column] for column in IMAGE_COLUMNS)
+
+
+def user_row(user: User) -> tuple:
+    return tuple(getattr(user, column) for column in USER_COLUMNS)
+
+
+def _image_from_row(row: tuple) -> MoleImage:
+    values = dict(zip(IMAGE_COLUMNS, row))
+    values["renditions"] = json.loads(values["renditions"])
+    return MoleImage(**values)
+
+
+def _user_from_row(row: tuple) -> User:
+    return User(**dict(zip(USER_COLUMNS, row)))
+
+
+class Database:
+    """Persists users and mole images, shared by every backend worker.
+
+    Queries stick to SQL shared by SQLite and Postgres, and writes are batched:
+    callers queue changed records and a background task flushes them in one
+    transaction per interval. Ids come from per-table sequences advanced
+    atomically in the database, and every flush stamps its rows with the next
+    value of the `revision` sequence, so a worker catches up on what the others
+    wrote by reading the rows past the last revision it has seen.
+    """
+
+    def __init__(self, url: str = DATABASE_URL, pool_size: int = DATABASE_POOL_SIZE):
+        if url.startswith("sqlite:///"):
+            self.pool = SQLitePool(url.removeprefix("sqlite:///"), pool_size)
+        elif url.startswith(("postgres://", "postgresql://")):
+            self.pool = PostgresPool(url, pool_size)
+        else:
+            raise ValueError(f"Unsupported database URL: {url}")
+        self._upsert_user = _upsert_sql(
+            "users", (*USER_COLUMNS, "revision"), self.pool.placeholder
+        )
+        self._upsert_image = _upsert_sql(
+            "mole_images", (*IMAGE_COLUMNS, "revision"), self.pool.placeholder
+        )
+        self._pending_users: dict[int, User] = {}
+        self._pending_images: dict[int, MoleImage] = {}
+        self._own_revisions: set[int] = set()
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking database call on a worker thread."""
+        return await asyncio.to_thread(fn, *args)
+
+    def create_schema(self):
+        with self.pool.connection() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+            for table in ("users", "mole_images"):
+                columns = conn.execute(f"SELECT * FROM {table} LIMIT 0").description
+                if "revision" not in [column[0] for column in columns]:
+                    conn.execute(
+                        f"ALTER TABLE {table} "
+                        "ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"
+                    )
+            for statement in (*REVISION_INDEXES, *IMAGE_INDEXES.values()):
+                conn.execute(statement)
+            conn.execute(
+                "INSERT INTO sequences (name, value) VALUES "
+                + ", ".join(f"('{name}', 0)" for name in SEQUENCES)
+                + " ON CONFLICT (name) DO NOTHING"
+            )
+            conn.commit()
+
+    def load_users(self) -> list[User]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(USER_COLUMNS)} FROM users ORDER BY id"
+            ).fetchall()
+        return [_user_from_row(row) for row in rows]
+
+    def load_image_rows(self) -> list[tuple]:
+        """Every image as a raw row in IMAGE_COLUMNS order, with renditions decoded.
+
+        Skips model validation, which would dominate loading a large corpus.
+        """
+        at = IMAGE_COLUMNS.index("renditions")
+        with self.pool.connection() as conn:
+            cursor = conn.execute(f"SELECT {', '.join(IMAGE_COLUMNS)} FROM mole_images")
+            return [(*row[:at], json.loads(row[at]), *row[at + 1 :]) for row in cursor]
+
+    def current_revision(self) -> int:
+        with self.pool.connection() as conn:
+            return self._revision(conn)
+
+    def load_changes(self, since: int) -> tuple[int, list[User], list[MoleImage]]:
+        """Rows other workers wrote after revision `since`, and the revision they reach.
+
+        Rows from this worker's own flushes are left out, since it already holds
+        them. A flush keeps the revision sequence locked until it commits, so
+        every row up to the returned revision is visible by the time it is read.
+        """
+        with self.pool.connection() as conn:
+            revision = self._revision(conn)
+            if revision == since:
+                return revision, [], []
+            where = f"WHERE revision > {self.pool.placeholder} AND revision <= {self.pool.placeholder}"
+            user_rows = conn.execute(
+                f"SELECT {', '.join(USER_COLUMNS)}, revision FROM users {where}",
+                (since, revision),
+            ).fetchall()
+            image_rows = conn.execute(
+                f"SELECT {', '.join(IMAGE_COLUMNS)}, revision FROM mole_images {where}",
+                (since, revision),
+            ).fetchall()
+        own = self._own_revisions
+        self._own_revisions = {value for value in own if value > revision}
+        return (
+            revision,
+            [_user_from_row(row[:-1]) for row in user_rows if row[-1] not in own],
+            [_image_from_row(row[:-1]) for row in image_rows if row[-1] not in own],
+        )
+
+    def allocate_ids(self, table: str, count: int) -> range:
+        """Reserve `count` consecutive ids for a table that no other worker will use.
+
+        The sequence first catches up with ids inserted without it, such as the
+        seed users or a bulk import.
+        """
+        p = self.pool.placeholder
+        highest = f"(SELECT COALESCE(MAX(id), 0) FROM {table})"
+        with self.pool.connection() as conn:
+            try:
+                conn.execute(
+                    f"UPDATE sequences SET value = {highest} "
+                    f"WHERE name = {p} AND value < {highest}",
+                    (table,),
+                )
+                last = self._advance(conn, table, count)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return range(last - count + 1, last + 1)
+
+    def queue_user(self, user: User):
+        """Schedule a user to be written with the next batch."""
+        self._pending_users[user.id] = user
+
+    def queue_images(self, images: Iterable[MoleImage]):
+        """Schedule images to be written with the next batch."""
+        for image in images:
+            self._pending_images[image.id] = image
+
+    def is_queued(self, record: User | MoleImage) -> bool:
+        """Whether a write of this record is waiting for the next batch."""
+        pending = (
+            self._pending_users if isinstance(record, User) else self._pending_images
+        )
+        return record.id in pending
+
+    def save_user(self, user: User):
+        """Write a user right away, raising ValueError if its email is taken.
+
+        The unique email index is the only check that holds across workers, so
+        account creation and email changes wait for it instead of being batched.
+        """
+        self._pending_users.pop(user.id, None)
+        try:
+            self._write({user.id: user}, {})
+        except self.pool.integrity_error:
+            raise ValueError(f"User with email '{user.email}' already exists.")
+
+    def flush(self):
+        """Write every queued record in a single transaction."""
+        users, self._pending_users = self._pending_users, {}
+        images, self._pending_images = self._pending_images, {}
+        if not users and not images:
+            return
+        try:
+            self._write(users, images)
+        except Exception:
+            self._pending_users = {**users, **self._pending_users}
+            self._pending_images = {**images, **self._pending_images}
+            raise
+
+    def _write(self, users: dict[int, User], images: dict[int, MoleImage]):
+        with self.pool.connection() as conn:
+            try:
+                revision = self._advance(conn, "revision", 1)
+                cursor = conn.cursor()
+                cursor.executemany(
+                    self._upsert_user,
+                    [(*user_row(user), revision) for user in users.values()],
+                )
+                cursor.executemany(
+                    self._upsert_image,
+                    [(*image_row(image), revision) for image in images.values()],
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        self._own_revisions.add(revision)
+
+    def _advance(self, conn, name: str, count: int) -> int:
+        """Add `count` to a sequence inside the caller's transaction.
+
+        The update locks the sequence until the transaction ends, which is what
+        makes allocations unique and revisions commit in order.
+        """
+        p = self.pool.placeholder
+        return conn.execute(
+            f"UPDATE sequences SET value = value + {p} WHERE name = {p} RETURNING value",
+            (count, name),
+        ).fetchone()[0]
+
+    def _revision(self, conn) -> int:
+        return conn.execute(
+            "SELECT value FROM sequences WHERE name = 'revision'"
+        ).fetchone()[0]
+
+    def bulk_load_images(self, rows: Iterable[tuple]) -> int:
+        """Insert raw rows in IMAGE_COLUMNS order as fast as the backend allows.
+
+        Rows skip model validation and are inserted in large chunks inside one
+        transaction, with the secondary indexes dropped and rebuilt once at the
+        end; meant for imports into an otherwise idle database.
+        """
+        insert = (
+            f"INSERT INTO mole_images ({', '.join(IMAGE_COLUMNS)}) "
+            f"VALUES ({', '.join([self.pool.placeholder] * len(IMAGE_COLUMNS))})"
+        )
+        count = 0
+        rows = iter(rows)
+        with self.pool.connection() as conn:
+            if isinstance(conn, sqlite3.Connection):
+                conn.execute("PRAGMA synchronous=OFF")
+            try:
+                for index_name in IMAGE_INDEXES:
+                    conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+                cursor = conn.cursor()
+                while True:
+                    chunk = [row for _, row in zip(range(BULK_LOAD_CHUNK_SIZE), rows)]
+                    if not chunk:
+                        break
+                    cursor.executemany(insert, chunk)
+                    count += len(chunk)
+                for statement in IMAGE_INDEXES.values():
+                    conn.execute(statement)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                if isinstance(conn, sqlite3.Connection):
+                    conn.execute("PRAGMA synchronous=NORMAL")
+        return count
+
+
+database = Database()
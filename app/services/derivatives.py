@@ -0,0 +1,67 @@
+import contextlib
+import os
+import tempfile
+from pathlib import Path
+from PIL import Image, ImageOps, features
+
+DERIVATIVES_DIR = "derivatives"
+THUMBNAIL_SIZE = (640, 360)
+PREVIEW_SIZE = (1280, 1280)
+RENDITIONS = ("thumb", "preview")
+DERIVATIVE_FORMAT, DERIVATIVE_EXTENSION = (
+    ("WEBP", "webp") if features.check("webp") else ("JPEG", "jpg")
+)
+DERIVATIVE_QUALITY = 82
+
+
+def derivative_name(content_hash: str, rendition: str) -> str:
+    """Path of a rendition relative to the upload directory, sharded by hash prefix."""
+    return f"{DERIVATIVES_DIR}/{content_hash[:2]}/{content_hash}_{rendition}.{DERIVATIVE_EXTENSION}"
+
+
+def _render(image: Image.Image, rendition: str) -> Image.Image:
+    if rendition == "thumb":
+        return ImageOps.fit(image, THUMBNAIL_SIZE, Image.Resampling.LANCZOS)
+    preview = image.copy()
+    preview.thumbnail(PREVIEW_SIZE, Image.Resampling.LANCZOS)
+    return preview
+
+
+def build_derivatives(
+    source: Path, upload_dir: Path, content_hash: str
+) -> dict[str, str]:
+    """Build the grid thumbnail and modal preview for an uploaded photo.
+
+    Renditions are cached on disk by content hash, so re-uploading the same bytes
+    reuses the existing files instead of decoding the original again. Each build
+    writes to its own temporary file, so concurrent builds of the same content
+    never collide and the last rename simply wins.
+    Returns a mapping of rendition name to its path relative to the upload directory.
+    """
+    renditions = {name: derivative_name(content_hash, name) for name in RENDITIONS}
+    missing = [
+        name for name, path in renditions.items() if not (upload_dir / path).exists()
+    ]
+    if not missing:
+        return renditions
+    with Image.open(source) as original:
+        image = original.convert("RGB")
+    for name in missing:
+        target = upload_dir / renditions[name]
+        if target.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(
+            dir=target.parent, prefix=f".{target.name}.", suffix=".part"
+        )
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                _render(image, name).save(
+                    tmp_file, DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY
+                )
+            os.replace(tmp_path, target)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+    return renditions
@@ -0,0 +1,226 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Callable, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+EVENT_BUS_URL = os.environ.get("MOLE_EVENT_BUS_URL", "")
+SUBSCRIPTION_QUEUE_SIZE = 256
+BROKER_RECONNECT_DELAY = 1.0
+DEFAULT_BROKER_HOST = "127.0.0.1"
+DEFAULT_BROKER_PORT = 7357
+
+Message = dict[str, Any]
+Deliver = Callable[[str, Message], None]
+
+
+class Subscription:
+    """Messages of one topic for one subscriber, buffered in a bounded queue.
+
+    A slow subscriber loses its oldest messages rather than holding up the
+    publisher; `overflowed` tells it to resynchronise from the source of truth.
+    """
+
+    def __init__(self, topic: str, maxsize: int = SUBSCRIPTION_QUEUE_SIZE):
+        self.topic = topic
+        self.overflowed = False
+        self._queue: asyncio.Queue[Message] = asyncio.Queue(maxsize)
+
+    def put(self, message: Message):
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.overflowed = True
+        self._queue.put_nowait(message)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Message]:
+        """The next message, or None if none arrives within `timeout` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def drain(self) -> list[Message]:
+        """Messages already waiting, without blocking."""
+        messages = []
+        while not self._queue.empty():
+            messages.append(self._queue.get_nowait())
+        return messages
+
+
+class InProcessBackend:
+    """Delivers messages to subscribers in this process only."""
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def publish(self, topic: str, message: Message):
+        self._deliver(topic, message)
+
+    def subscribe(self, topic: str):
+        pass
+
+    def unsubscribe(self, topic: str):
+        pass
+
+
+class BrokerBackend:
+    """Shares messages between worker processes through a broker on a local socket.
+
+    Every worker connects to the broker started by `run_broker`, tells it which
+    topics it has subscribers for, and receives each published message once,
+    including its own. Messages sent while disconnected are dropped; the
+    connection is re-established in the background.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._topics: dict[str, int] = {}
+        self._outbox: Optional[asyncio.Queue[bytes]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, deliver: Deliver):
+        self._deliver = deliver
+
+    def publish(self, topic: str, message: Message):
+        self._send({"op": "pub", "topic": topic, "message": message})
+
+    def subscribe(self, topic: str):
+        self._topics[topic] = self._topics.get(topic, 0) + 1
+        if self._topics[topic] == 1:
+            self._send({"op": "sub", "topic": topic})
+
+    def unsubscribe(self, topic: str):
+        self._topics[topic] -= 1
+        if not self._topics[topic]:
+            del self._topics[topic]
+            self._send({"op": "unsub", "topic": topic})
+
+    def _send(self, frame: Message):
+        if self._task is None:
+            self._outbox = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        self._outbox.put_nowait(json.dumps(frame).encode() + b"\n")
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                logger.warning(
+                    "Event broker at %s:%d unreachable.", self.host, self.port
+                )
+                await asyncio.sleep(BROKER_RECONNECT_DELAY)
+                continue
+            for topic in self._topics:
+                writer.write(json.dumps({"op": "sub", "topic": topic}).encode() + b"\n")
+            receiver = asyncio.create_task(self._receive(reader))
+            try:
+                while not receiver.done():
+                    sender = asyncio.create_task(self._outbox.get())
+                    await asyncio.wait(
+                        {sender, receiver}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not sender.done():
+                        sender.cancel()
+                        break
+                    writer.write(sender.result())
+                    await writer.drain()
+            except OSError:
+                logger.warning("Lost the connection to the event broker.")
+            finally:
+                receiver.cancel()
+                writer.close()
+            await asyncio.sleep(BROKER_RECONNECT_DELAY)
+
+    async def _receive(self, reader: asyncio.StreamReader):
+        while line := await reader.readline():
+            frame = json.loads(line)
+            self._deliver(frame["topic"], frame["message"])
+
+
+class EventBus:
+    """Publish/subscribe between parts of the app, over a pluggable backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._subscriptions: dict[str, set[Subscription]] = {}
+        backend.start(self._deliver)
+
+    def publish(self, topic: str, message: Message):
+        """Send a JSON-serialisable message to every subscriber of the topic."""
+        self.backend.publish(topic, message)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, topic: str) -> AsyncIterator[Subscription]:
+        """Receive the topic's messages for as long as the context is open."""
+        subscription = Subscription(topic)
+        self._subscriptions.setdefault(topic, set()).add(subscription)
+        self.backend.subscribe(topic)
+        try:
+            yield subscription
+        finally:
+            self._subscriptions[topic].discard(subscription)
+            self.backend.unsubscribe(topic)
+
+    def _deliver(self, topic: str, message: Message):
+        for subscription in self._subscriptions.get(topic, ()):
+            subscription.put(message)
+
+
+def broker_address(url: str) -> tuple[str, int]:
+    address = urlparse(url)
+    if address.scheme != "tcp":
+        raise ValueError(f"Unsupported event bus URL '{url}'.")
+    return address.hostname or DEFAULT_BROKER_HOST, address.port or DEFAULT_BROKER_PORT
+
+
+def default_backend(url: str = EVENT_BUS_URL):
+    """In-process delivery unless MOLE_EVENT_BUS_URL points at a `tcp://host:port` broker."""
+    if not url:
+        return InProcessBackend()
+    return BrokerBackend(*broker_address(url))
+
+
+event_bus = EventBus(default_backend())
+
+
+async def run_broker(host: str, port: int):
+    """Relay published messages to every connection subscribed to their topic."""
+    subscribers: dict[str, set[asyncio.StreamWriter]] = {}
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                frame = json.loads(line)
+                topic = frame["topic"]
+                if frame["op"] == "sub":
+                    subscribers.setdefault(topic, set()).add(writer)
+                elif frame["op"] == "unsub":
+                    subscribers.get(topic, set()).discard(writer)
+                elif frame["op"] == "pub":
+                    for subscriber in list(subscribers.get(topic, ())):
+                        subscriber.write(line)
+        except (OSError, ValueError):
+            pass
+        finally:
+            for topic_subscribers in subscribers.values():
+                topic_subscribers.discard(writer)
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if EVENT_BUS_URL:
+        host, port = broker_address(EVENT_BUS_URL)
+    else:
+        host, port = DEFAULT_BROKER_HOST, DEFAULT_BROKER_PORT
+    asyncio.run(run_broker(host, port))
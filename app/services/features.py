@@ -0,0 +1,198 @@
+import math
+from typing import NamedTuple
+import numpy as np
+
+COLOR_HISTOGRAM_BINS = 8
+
+
+class LesionFeatures(NamedTuple):
+    """ABCD-style lesion features for a batch, one row per image."""
+
+    threshold: np.ndarray
+    area: np.ndarray
+    asymmetry: np.ndarray
+    border_irregularity: np.ndarray
+    color_variance: np.ndarray
+    color_histogram: np.ndarray
+    diameter: np.ndarray
+
+
+def _grayscale(batch: np.ndarray) -> np.ndarray:
+    """Integer luminance in [0, 255] as the mean of the three channels."""
+    return batch.astype(np.intp).sum(axis=-1) // 3
+
+
+def _otsu_thresholds(gray: np.ndarray) -> np.ndarray:
+    """Per-image Otsu threshold over an integer (B, H, W) grayscale batch."""
+    batch_size = gray.shape[0]
+    offsets = (np.arange(batch_size) * 256)[:, None, None]
+    hist = np.bincount((gray + offsets).ravel(), minlength=batch_size * 256)
+    hist = hist.reshape(batch_size, 256).astype(np.float64)
+    levels = np.arange(256, dtype=np.float64)
+    weight_low = np.cumsum(hist, axis=1)
+    weight_high = weight_low[:, -1:] - weight_low
+    sum_low = np.cumsum(hist * levels, axis=1)
+    sum_high = sum_low[:, -1:] - sum_low
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_low = sum_low / weight_low
+        mean_high = sum_high / weight_high
+        between = weight_low * weight_high * (mean_low - mean_high) ** 2
+    between = np.nan_to_num(between, nan=-1.0)
+    return between.argmax(axis=1)
+
+
+def extract_features(batch: np.ndarray) -> LesionFeatures:
+    """Compute lesion features for a stacked (B, H, W, 3) uint8 batch without per-pixel loops.
+
+    The lesion is segmented as the pixels at or below each image's Otsu
+    threshold. Asymmetry is the mismatch between the mask and its mirror images
+    about the image centre lines, border irregularity is the isoperimetric ratio
+    (1 for a disc, larger for ragged borders) and the diameter is the equivalent
+    circular diameter in pixels.
+    """
+    batch_size, height, width, _ = batch.shape
+    gray = _grayscale(batch)
+    threshold = _otsu_thresholds(gray)
+    mask = gray <= threshold[:, None, None]
+    area = mask.sum(axis=(1, 2))
+    safe_area = np.maximum(area, 1)
+
+    mismatch = (mask ^ mask[:, :, ::-1]).sum(axis=(1, 2)) + (
+        mask ^ mask[:, ::-1, :]
+    ).sum(axis=(1, 2))
+    asymmetry = mismatch / (4.0 * safe_area)
+
+    padded = np.pad(mask, ((0, 0), (1, 1), (1, 1)))
+    interior = (
+        padded[:, :-2, 1:-1]
+        & padded[:, 2:, 1:-1]
+        & padded[:, 1:-1, :-2]
+        & padded[:, 1:-1, 2:]
+    )
+    perimeter = (mask & ~interior).sum(axis=(1, 2))
+    border_irregularity = perimeter**2 / (4.0 * math.pi * safe_area)
+
+    pixels = batch.astype(np.float64)
+    weights = mask[..., None]
+    mean = (pixels * weights).sum(axis=(1, 2)) / safe_area[:, None]
+    variance = (((pixels - mean[:, None, None, :]) ** 2) * weights).sum(
+        axis=(1, 2)
+    ) / safe_area[:, None]
+    color_variance = variance.mean(axis=1) / 255.0**2
+
+    bins = batch.astype(np.intp) * COLOR_HISTOGRAM_BINS // 256
+    offsets = (
+        np.arange(batch_size)[:, None] * 3 + np.arange(3)[None, :]
+    ) * COLOR_HISTOGRAM_BINS
+    lesion_bins = (bins + offsets[:, None, None, :])[mask]
+    color_histogram = (
+        np.bincount(
+            lesion_bins.ravel(), minlength=batch_size * 3 * COLOR_HISTOGRAM_BINS
+        ).reshape(batch_size, 3, COLOR_HISTOGRAM_BINS)
+        / safe_area[:, None, None]
+    )
+
+    diameter = np.sqrt(4.0 * area / math.pi)
+    return LesionFeatures(
+        threshold=threshold,
+        area=area / float(height * width),
+        asymmetry=asymmetry,
+        border_irregularity=border_irregularity,
+        color_variance=color_variance,
+        color_histogram=color_histogram,
+        diameter=diameter,
+    )
+
+
+def extract_features_reference(image: np.ndarray) -> dict[str, object]:
+    """Scalar, loop-based version of `extract_features` for a single (H, W, 3) image.
+
+    Kept deliberately simple so the vectorized implementation can be checked
+    against it; it is far too slow for the upload path.
+    """
+    height, width, _ = image.shape
+    gray = [
+        [
+            (int(image[y, x, 0]) + int(image[y, x, 1]) + int(image[y, x, 2])) // 3
+            for x in range(width)
+        ]
+        for y in range(height)
+    ]
+    hist = [0] * 256
+    for row in gray:
+        for value in row:
+            hist[value] += 1
+    total = height * width
+    total_sum = sum(level * count for level, count in enumerate(hist))
+    best_threshold, best_between = 0, -1.0
+    weight_low, sum_low = 0, 0
+    for level in range(256):
+        weight_low += hist[level]
+        sum_low += level * hist[level]
+        weight_high = total - weight_low
+        if weight_low == 0 or weight_high == 0:
+            between = -1.0
+        else:
+            mean_low = sum_low / weight_low
+            mean_high = (total_sum - sum_low) / weight_high
+            between = weight_low * weight_high * (mean_low - mean_high) ** 2
+        if between > best_between:
+            best_threshold, best_between = level, between
+    mask = [[value <= best_threshold for value in row] for row in gray]
+    area = sum(sum(row) for row in mask)
+    safe_area = max(area, 1)
+
+    mismatch = 0
+    perimeter = 0
+    for y in range(height):
+        for x in range(width):
+            mismatch += mask[y][x] != mask[y][width - 1 - x]
+            mismatch += mask[y][x] != mask[height - 1 - y][x]
+            if mask[y][x]:
+                neighbours = [
+                    mask[ny][nx] if 0 <= ny < height and 0 <= nx < width else False
+                    for ny, nx in ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1))
+                ]
+                perimeter += not all(neighbours)
+
+    lesion = [
+        [float(c) for c in image[y, x]]
+        for y in range(height)
+        for x in range(width)
+        if mask[y][x]
+    ]
+    means = [sum(pixel[c] for pixel in lesion) / safe_area for c in range(3)]
+    variances = [
+        sum((pixel[c] - means[c]) ** 2 for pixel in lesion) / safe_area
+        for c in range(3)
+    ]
+    histogram = [[0.0] * COLOR_HISTOGRAM_BINS for _ in range(3)]
+    for pixel in lesion:
+        for c in range(3):
+            histogram[c][int(pixel[c]) * COLOR_HISTOGRAM_BINS // 256] += 1 / safe_area
+
+    return {
+        "threshold": best_threshold,
+        "area": area / total,
+        "asymmetry": mismatch / (4.0 * safe_area),
+        "border_irregularity": perimeter**2 / (4.0 * math.pi * safe_area),
+        "color_variance": sum(variances) / 3 / 255.0**2,
+        "color_histogram": histogram,
+        "diameter": math.sqrt(4.0 * area / math.pi),
+    }
+
+
+def risk_logits(features: LesionFeatures, image_size: int) -> np.ndarray:
+    """Combine the ABCD features into a per-image risk logit.
+
+    Weights follow the relative emphasis of the dermoscopic total dermoscopy
+    score: asymmetry and colour count most, then border and diameter.
+    """
+    relative_diameter = features.diameter / image_size
+    return (
+        2.6 * np.clip(features.asymmetry, 0.0, 1.0)
+        + 0.3 * np.clip(features.border_irregularity - 1.0, 0.0, 8.0)
+        + 20.0 * features.color_variance
+        + 3.0 * relative_diameter
+        - 3.5
+    )
@@ -0,0 +1,69 @@
+import asyncio
+import os
+from pathlib import Path
+from typing import Iterable, Optional
+
+FSYNC_POLICIES = ("none", "always", "batch")
+FSYNC_POLICY = os.environ.get("MOLE_UPLOAD_FSYNC", "batch")
+FSYNC_BATCH_WINDOW = float(os.environ.get("MOLE_UPLOAD_FSYNC_WINDOW", "0.01"))
+
+
+def fsync_paths(paths: Iterable[Path]):
+    """fsync each file or directory, so data and renames survive a crash."""
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class FileSyncer:
+    """Flushes written files to stable storage off the event loop.
+
+    With the `always` policy every call fsyncs its own paths in a worker thread.
+    With `batch`, calls arriving within `batch_window` seconds share a single
+    thread hop and each path is synced once, like a group commit; callers still
+    only return once their files are durable. `none` leaves it to the OS.
+    """
+
+    def __init__(
+        self, policy: str = FSYNC_POLICY, batch_window: float = FSYNC_BATCH_WINDOW
+    ):
+        if policy not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{policy}'.")
+        self.policy = policy
+        self.batch_window = batch_window
+        self._pending: list[tuple[tuple[Path, ...], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def sync(self, *paths: Path):
+        if self.policy == "none" or not paths:
+            return
+        if self.policy == "always":
+            await asyncio.to_thread(fsync_paths, paths)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((paths, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        await future
+
+    async def _flush(self):
+        await asyncio.sleep(self.batch_window)
+        batch, self._pending = self._pending, []
+        self._flush_task = None
+        paths = dict.fromkeys(path for paths, _ in batch for path in paths)
+        try:
+            await asyncio.to_thread(fsync_paths, list(paths))
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+
+file_syncer = FileSyncer()
@@ -0,0 +1,40 @@
+import asyncio
+import os
+from typing import Iterator
+from app.services.database import Database, database
+
+ID_BLOCK_SIZE = int(os.environ.get("MOLE_ID_BLOCK_SIZE", "32"))
+
+
+class IdAllocator:
+    """Hands out ids for one table from blocks reserved in the shared database.
+
+    Reserving a block is one atomic sequence update, so no two workers ever
+    hand out the same id while most calls never touch the database. Ids from
+    different workers interleave, and the unused rest of a block is skipped
+    when a worker stops.
+    """
+
+    def __init__(
+        self, table: str, block_size: int = ID_BLOCK_SIZE, db: Database = database
+    ):
+        self.table = table
+        self.block_size = block_size
+        self.db = db
+        self._ids: Iterator[int] = iter(())
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        async with self._lock:
+            next_id = next(self._ids, None)
+            if next_id is None:
+                block = await self.db.run(
+                    self.db.allocate_ids, self.table, self.block_size
+                )
+                self._ids = iter(block)
+                next_id = next(self._ids)
+            return next_id
+
+
+image_ids = IdAllocator("mole_images")
+user_ids = IdAllocator("users", block_size=1)
@@ -0,0 +1,282 @@
+import itertools
+from array import array
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+from app.models.mole_image import MoleImage
+from app.services.derivatives import derivative_name
+
+IMAGE_FIELDS = (
+    "id",
+    "patient_id",
+    "patient_name",
+    "filename",
+    "original_filename",
+    "content_hash",
+    "renditions",
+    "upload_date",
+    "uploaded_at",
+    "age",
+    "sex",
+    "social_number",
+    "status",
+    "evaluation_score",
+    "evaluation_notes",
+)
+NO_SCORE = -1
+
+
+class CodedColumn:
+    """A column of repeated values, stored as one small integer code per row."""
+
+    def __init__(self, typecode: str = "I"):
+        self.codes = array(typecode)
+        self.values: list = []
+        self._code_of: dict = {}
+
+    def code(self, value) -> int:
+        code = self._code_of.get(value)
+        if code is None:
+            code = self._code_of[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def extend(self, values: Sequence):
+        for value in set(values).difference(self._code_of):
+            self.code(value)
+        self.codes.extend(map(self._code_of.__getitem__, values))
+
+    def __getitem__(self, row: int):
+        return self.values[self.codes[row]]
+
+    def __setitem__(self, row: int, value):
+        self.codes[row] = self.code(value)
+
+
+class ImageTable:
+    """Image metadata stored column by column, one row per image.
+
+    Numbers live in typed arrays, and values shared by many images (names,
+    sexes, statuses, dates, notes) are stored once and referenced by code.
+    Renditions are kept as the tuple of rendition names whenever their paths
+    follow `derivative_name`, which they do for every upload. A row costs a
+    few hundred bytes instead of a model instance with its own dicts and
+    strings; models are built only for rows that leave the repository.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.patient_ids = array("q")
+        self.uploaded_at = array("d")
+        self.ages = array("h")
+        self.scores = array("h")
+        self.sexes = CodedColumn("B")
+        self.statuses = CodedColumn("B")
+        self.patient_names = CodedColumn()
+        self.social_numbers = CodedColumn()
+        self.upload_dates = CodedColumn()
+        self.notes = CodedColumn()
+        self.original_filenames = CodedColumn()
+        self.rendition_names = CodedColumn("B")
+        self.filenames: list[str] = []
+        self.content_hashes: list[Optional[str]] = []
+        self._custom_renditions: dict[int, dict[str, str]] = {}
+        self._rows: dict[int, int] = {}
+        self._columns: dict[str, Any] = {
+            "patient_id": self.patient_ids,
+            "patient_name": self.patient_names,
+            "filename": self.filenames,
+            "original_filename": self.original_filenames,
+            "upload_date": self.upload_dates,
+            "uploaded_at": self.uploaded_at,
+            "age": self.ages,
+            "sex": self.sexes,
+            "social_number": self.social_numbers,
+            "status": self.statuses,
+            "evaluation_notes": self.notes,
+        }
+        getters: dict[str, Callable[[int], Any]] = {
+            "id": self.ids.__getitem__,
+            "content_hash": self.content_hashes.__getitem__,
+            "renditions": self._renditions,
+            "evaluation_score": self._score,
+        }
+        for field, column in self._columns.items():
+            getters[field] = column.__getitem__
+        self._getters = {field: getters[field] for field in IMAGE_FIELDS}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def row_of(self, image_id: int) -> Optional[int]:
+        return self._rows.get(image_id)
+
+    def append(self, values: Sequence) -> int:
+        """Add an image given as field values in IMAGE_FIELDS order, returning its row."""
+        self.extend([values])
+        return len(self.ids) - 1
+
+    def extend(self, rows: Iterable[Sequence]):
+        """Add images given as rows in IMAGE_FIELDS order, filling each column in one pass."""
+        start = len(self.ids)
+        columns = dict(zip(IMAGE_FIELDS, zip(*rows)))
+        if not columns:
+            return
+        hashes = columns["content_hash"]
+        try:
+            self.ids.extend(columns["id"])
+            self.content_hashes.extend(hashes)
+            for field, column in self._columns.items():
+                column.extend(columns[field])
+            self.scores.extend(
+                NO_SCORE if score is None else score
+                for score in columns["evaluation_score"]
+            )
+            self.rendition_names.extend(
+                [
+                    self._pack_renditions(row, content_hash, renditions)
+                    for row, content_hash, renditions in zip(
+                        itertools.count(start), hashes, columns["renditions"]
+                    )
+                ]
+            )
+        except Exception:
+            self._truncate(start)
+            raise
+        self._rows.update(zip(columns["id"], itertools.count(start)))
+
+    def get(self, row: int, field: str) -> Any:
+        return self._getters[field](row)
+
+    def set(self, row: int, field: str, value: Any):
+        if field == "evaluation_score":
+            self.scores[row] = NO_SCORE if value is None else value
+        elif field == "renditions":
+            self.rendition_names[row] = self._pack_renditions(
+                row, self.content_hashes[row], value
+            )
+        elif field == "content_hash":
+            renditions = self._renditions(row)
+            self.content_hashes[row] = value
+            self.rendition_names[row] = self._pack_renditions(row, value, renditions)
+        elif field == "id":
+            raise ValueError("Image ids cannot change.")
+        else:
+            self._columns[field][row] = value
+
+    def rows(self, fields: Sequence[str], start: int = 0) -> Iterator[tuple]:
+        """Values of the given fields for each row from `start` on, in row order."""
+        return zip(*(self._values(field, start) for field in fields))
+
+    def views(self, image_ids: Iterable[int]) -> Iterator["ImageRow"]:
+        """An ImageRow for each of the given image ids."""
+        return map(
+            ImageRow, itertools.repeat(self), map(self._rows.__getitem__, image_ids)
+        )
+
+    def model(self, row: int) -> MoleImage:
+        """A standalone MoleImage of the row; changing it does not change the table."""
+        return MoleImage.model_construct(
+            **{field: getter(row) for field, getter in self._getters.items()}
+        )
+
+    def _truncate(self, length: int):
+        """Drop rows from `length` on, so a rejected value cannot leave columns uneven."""
+        for column in (
+            self.ids,
+            self.content_hashes,
+            self.scores,
+            *self._columns.values(),
+            self.rendition_names,
+        ):
+            if isinstance(column, CodedColumn):
+                column = column.codes
+            del column[length:]
+        for row in [row for row in self._custom_renditions if row >= length]:
+            del self._custom_renditions[row]
+
+    def _values(self, field: str, start: int) -> Iterable:
+        column = self._columns.get(field)
+        if isinstance(column, CodedColumn):
+            return map(column.values.__getitem__, column.codes[start:])
+        if column is not None:
+            return column[start:]
+        if field == "id":
+            return self.ids[start:]
+        return map(self._getters[field], range(start, len(self.ids)))
+
+    def _score(self, row: int) -> Optional[int]:
+        score = self.scores[row]
+        return None if score == NO_SCORE else score
+
+    def _renditions(self, row: int) -> dict[str, str]:
+        custom = self._custom_renditions.get(row)
+        if custom is not None:
+            return dict(custom)
+        content_hash = self.content_hashes[row]
+        return {
+            name: derivative_name(content_hash, name)
+            for name in self.rendition_names[row]
+        }
+
+    def _pack_renditions(
+        self, row: int, content_hash: Optional[str], renditions: dict[str, str]
+    ) -> tuple[str, ...]:
+        self._custom_renditions.pop(row, None)
+        if not all(
+            content_hash is not None and path == derivative_name(content_hash, name)
+            for name, path in renditions.items()
+        ):
+            self._custom_renditions[row] = dict(renditions)
+        return tuple(renditions)
+
+
+class ImageRow:
+    """Read-only view of one table row under MoleImage's attribute names.
+
+    Lets the indexes and query filters read a row without building a model.
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table: ImageTable, row: int):
+        self.table = table
+        self.row = row
+
+    @property
+    def id(self) -> int:
+        return self.table.ids[self.row]
+
+    @property
+    def patient_id(self) -> int:
+        return self.table.patient_ids[self.row]
+
+    @property
+    def patient_name(self) -> str:
+        return self.table.patient_names[self.row]
+
+    @property
+    def social_number(self) -> Optional[str]:
+        return self.table.social_numbers[self.row]
+
+    @property
+    def uploaded_at(self) -> float:
+        return self.table.uploaded_at[self.row]
+
+    @property
+    def age(self) -> int:
+        return self.table.ages[self.row]
+
+    @property
+    def sex(self) -> str:
+        return self.table.sexes[self.row]
+
+    @property
+    def status(self) -> str:
+        return self.table.statuses[self.row]
+
+    @property
+    def evaluation_score(self) -> Optional[int]:
+        score = self.table.scores[self.row]
+        return None if score == NO_SCORE else score
+
+    def __getattr__(self, field: str) -> Any:
+        return self.table.get(self.row, field)
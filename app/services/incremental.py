@@ -0,0 +1,78 @@
+import bisect
+from typing import Any, Callable, Iterable, NamedTuple
+
+INCREMENTAL_MAX_RECENT = 24
+END_ANCHOR = -1
+
+
+class IncrementalList(NamedTuple):
+    """A list var split so that appends and updates only resend a short tail.
+
+    `base` is the snapshot sent on page load, `recent` holds items added or
+    changed since then, and `superseded` lists the ids of base items that have
+    a newer copy in `recent` and should be hidden. Reflex resends a var in full
+    whenever it changes, so keeping `base` untouched limits each update to the
+    size of the change.
+    """
+
+    base: list
+    recent: list
+    superseded: list[int]
+
+
+def apply_changes(
+    current: IncrementalList,
+    changed: Iterable[Any],
+    key: Callable[[Any], Any],
+    max_recent: int = INCREMENTAL_MAX_RECENT,
+    removed: Iterable[int] = (),
+) -> tuple[IncrementalList, bool]:
+    """Fold changed items into the recent tail, ordered by `key`.
+
+    Items whose ids are in `removed` are hidden wherever they are. Once the
+    tail grows past `max_recent` everything is compacted back into a fresh
+    base. Returns the new list and whether `base` was replaced.
+    """
+    recent_by_id = {item.id: item for item in current.recent}
+    superseded = list(current.superseded)
+    hidden = set(superseded)
+    base_ids = None
+
+    def hide(item_id: int):
+        nonlocal base_ids
+        if base_ids is None:
+            base_ids = {base_item.id for base_item in current.base}
+        if item_id in base_ids and item_id not in hidden:
+            hidden.add(item_id)
+            superseded.append(item_id)
+
+    for item_id in removed:
+        recent_by_id.pop(item_id, None)
+        hide(item_id)
+    for item in changed:
+        hide(item.id)
+        recent_by_id[item.id] = item
+    recent = sorted(recent_by_id.values(), key=key)
+    if len(recent) <= max_recent:
+        return IncrementalList(current.base, recent, superseded), False
+    base = sorted(
+        [item for item in current.base if item.id not in hidden] + recent,
+        key=key,
+    )
+    return IncrementalList(base, [], []), True
+
+
+def anchors(current: IncrementalList, key: Callable[[Any], Any]) -> list[int]:
+    """For each recent item, the id of the base item it is shown in front of.
+
+    `base` must be sorted by `key`; items that sort after all of it get
+    END_ANCHOR.
+    """
+    base_keys = [key(item) for item in current.base]
+    anchor_ids = []
+    for item in current.recent:
+        position = bisect.bisect_right(base_keys, key(item))
+        anchor_ids.append(
+            current.base[position].id if position < len(base_keys) else END_ANCHOR
+        )
+    return anchor_ids
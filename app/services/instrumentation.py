@@ -0,0 +1,125 @@
+import contextvars
+import functools
+import itertools
+import os
+import time
+from typing import Optional
+from reflex.state import BaseState
+from reflex.utils.format import json_dumps
+from app.services.cpu_pool import loop_lag_monitor
+from app.services.metrics import (
+    BYTES_BUCKETS,
+    COUNT_BUCKETS,
+    SECONDS_BUCKETS,
+    metrics,
+)
+
+HANDLER_METRICS_ENABLED = os.environ.get("MOLE_HANDLER_METRICS", "1") != "0"
+# Measure delta sizes on 1 in this many events; 0 turns the measurement off.
+HANDLER_DELTA_SAMPLE_RATE = int(os.environ.get("MOLE_HANDLER_DELTA_SAMPLE", "10"))
+
+handler_seconds = metrics.histogram(
+    "mole_handler_seconds",
+    "Wall time of an event handler, from dispatch to its final update.",
+    "handler",
+    SECONDS_BUCKETS,
+)
+handler_delta_bytes = metrics.histogram(
+    "mole_handler_delta_bytes",
+    "Serialized size of all state deltas sent for one sampled event.",
+    "handler",
+    BYTES_BUCKETS,
+)
+handler_get_state_calls = metrics.histogram(
+    "mole_handler_get_state_calls",
+    "get_state calls made while handling one event.",
+    "handler",
+    COUNT_BUCKETS,
+)
+state_delta_bytes = metrics.histogram(
+    "mole_state_delta_bytes",
+    "Serialized size of one state's part of a sampled delta.",
+    "state",
+    BYTES_BUCKETS,
+)
+metrics.gauge(
+    "mole_event_loop_lag_p99_seconds",
+    "99th percentile of recent event-loop wake-up lag.",
+    lambda: loop_lag_monitor.snapshot()["p99"],
+)
+
+_events = itertools.count()
+_get_state_calls: contextvars.ContextVar[Optional[list[int]]] = contextvars.ContextVar(
+    "get_state_calls", default=None
+)
+
+
+def short_state_name(full_name: str) -> str:
+    """`doctor_state` for `reflex___state____state.app___states___doctor_state____doctor_state`."""
+    return full_name.rpartition(".")[2].rpartition("____")[2]
+
+
+def handler_label(event_name: str) -> str:
+    state, _, method = event_name.rpartition(".")
+    return f"{short_state_name(state)}.{method}"
+
+
+def _is_sampled() -> bool:
+    rate = HANDLER_DELTA_SAMPLE_RATE
+    return rate > 0 and next(_events) % rate == 0
+
+
+def _timed_process(process):
+    @functools.wraps(process)
+    async def wrapper(self, event):
+        label = handler_label(event.name)
+        calls = [0]
+        _get_state_calls.set(calls)
+        sampled = _is_sampled()
+        delta_bytes = 0
+        started = time.perf_counter()
+        try:
+            async for update in process(self, event):
+                if sampled:
+                    for state, values in update.delta.items():
+                        size = len(json_dumps(values))
+                        state_delta_bytes.observe(short_state_name(state), size)
+                        delta_bytes += size
+                yield update
+        finally:
+            _get_state_calls.set(None)
+            handler_seconds.observe(label, time.perf_counter() - started)
+            if sampled:
+                handler_delta_bytes.observe(label, delta_bytes)
+            handler_get_state_calls.observe(label, calls[0])
+
+    return wrapper
+
+
+def _counted_get_state(get_state):
+    @functools.wraps(get_state)
+    async def wrapper(self, state_cls):
+        calls = _get_state_calls.get()
+        if calls is not None:
+            calls[0] += 1
+        return await get_state(self, state_cls)
+
+    return wrapper
+
+
+def instrument_handlers():
+    """Record wall time, delta size and get_state calls for every handled event.
+
+    Reflex runs every websocket and upload event through `BaseState._process`
+    and has no hook around it that also sees uploads, so both it and
+    `get_state` are wrapped here once at startup. Background tasks are not
+    timed, since they are meant to run for as long as they watch something.
+
+    Delta sizes are only measured on 1 in HANDLER_DELTA_SAMPLE_RATE events:
+    measuring serializes the delta a second time on the event loop, about as
+    costly as sending it (around 0.5 ms for a 16 KB worklist page).
+    """
+    if not HANDLER_METRICS_ENABLED or hasattr(BaseState._process, "__wrapped__"):
+        return
+    BaseState._process = _timed_process(BaseState._process)
+    BaseState.get_state = _counted_get_state(BaseState.get_state)
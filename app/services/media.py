@@ -0,0 +1,81 @@
+import re
+import stat
+from pathlib import Path
+from typing import Optional
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from app.services.content_store import CONTENT_STORE_DIR, content_store
+from app.services.derivatives import DERIVATIVES_DIR, RENDITIONS
+
+MEDIA_ROUTE = "/media"
+IMMUTABLE_NAMES = (
+    re.compile(
+        rf"{CONTENT_STORE_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/[0-9a-f]{{64}}(\.\w+)?"
+    ),
+    re.compile(
+        rf"{DERIVATIVES_DIR}/[0-9a-f]{{2}}/[0-9a-f]{{64}}_({'|'.join(RENDITIONS)})\.\w+"
+    ),
+)
+PRIVATE_SUFFIXES = (".refs", ".part")
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def resolve_media_path(name: str) -> Optional[Path]:
+    """Absolute path of an uploaded file, or None if it escapes the upload directory."""
+    root = content_store.upload_dir.resolve()
+    path = (root / name).resolve()
+    if path == root or root not in path.parents:
+        return None
+    return path
+
+
+def is_private(name: str) -> bool:
+    """Whether a file is store bookkeeping: dotfiles, locks, temp files and reference counts."""
+    return name.endswith(PRIVATE_SUFFIXES) or any(
+        part.startswith(".") for part in name.split("/")
+    )
+
+
+def is_immutable(name: str) -> bool:
+    """Whether a file is a hash-named blob or rendition, so its bytes never change under its name."""
+    return not is_private(name) and any(
+        pattern.fullmatch(name) for pattern in IMMUTABLE_NAMES
+    )
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in tags
+
+
+async def serve_media(request: Request) -> Response:
+    """Serve an uploaded file with cache validators and byte-range support.
+
+    Content-addressed files (`cas/` blobs and `derivatives/`) carry their hash
+    in the file name, so they get a strong ETag built from it and a year-long
+    immutable Cache-Control. It is private: these are patient photos, so only
+    the browser may keep them, never a shared proxy or CDN. Anything else is revalidated on every use, and
+    the store's own bookkeeping files are never served.
+    Ranges, If-Range and the zero-copy `pathsend` extension are handled by
+    Starlette's FileResponse.
+    """
+    name = request.path_params["path"]
+    if is_private(name):
+        return Response(status_code=404)
+    path = resolve_media_path(name)
+    try:
+        stat_result = path.stat() if path is not None else None
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        return Response(status_code=404)
+    headers = {"Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if is_immutable(name):
+        etag = f'"{path.stem}"'
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=304, headers=headers)
+    return FileResponse(path, headers=headers, stat_result=stat_result)
@@ -0,0 +1,115 @@
+import bisect
+import hmac
+import os
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(1024 * 4**power for power in range(8))
+COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32)
+METRICS_ROUTE = "/metrics"
+DEBUG_TOKEN = os.environ.get("MOLE_DEBUG_TOKEN", "")
+
+
+class Histogram:
+    """A Prometheus histogram with one series per label value."""
+
+    def __init__(self, name: str, help_text: str, label: str, buckets: tuple):
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = buckets
+        self._series: dict[str, list] = {}
+
+    def observe(self, label_value: str, value: float):
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [[0] * len(self.buckets), 0.0, 0]
+        counts, _, _ = series
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(counts):
+            counts[index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for label_value, (counts, total, count) in sorted(self._series.items()):
+            labels = f'{self.label}="{label_value}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(
+                    f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Gauge:
+    """A Prometheus gauge whose value is read when the metrics are scraped."""
+
+    def __init__(self, name: str, help_text: str, read):
+        self.name = name
+        self.help_text = help_text
+        self.read = read
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.read()}",
+        ]
+
+
+class MetricsRegistry:
+    """Holds the app's metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: list = []
+
+    def histogram(
+        self, name: str, help_text: str, label: str, buckets: tuple
+    ) -> Histogram:
+        metric = Histogram(name, help_text, label, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name: str, help_text: str, read) -> Gauge:
+        metric = Gauge(name, help_text, read)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render())
+
+
+metrics = MetricsRegistry()
+
+
+def is_debug_request(request: Request, token: str = DEBUG_TOKEN) -> bool:
+    """Whether a request carries the debug token, so metrics and profiles stay private.
+
+    Without `MOLE_DEBUG_TOKEN` set the debug routes are off. The client address
+    is not trusted: behind a reverse proxy every request arrives from loopback.
+    """
+    if not token:
+        return False
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        credentials.encode(), token.encode()
+    )
+
+
+async def serve_metrics(request: Request) -> Response:
+    """Expose the collected metrics to a Prometheus scraper holding the debug token."""
+    if not is_debug_request(request):
+        return Response(status_code=404)
+    return PlainTextResponse(
+        metrics.render() + "\n", media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,36 @@
+import io
+import os
+from pathlib import Path
+from PIL import Image, ImageCms, ImageOps
+
+MASTER_MAX_EDGE = int(os.environ.get("MOLE_MASTER_MAX_EDGE", "2048"))
+MASTER_QUALITY = 90
+MASTER_EXTENSION = ".jpg"
+
+_SRGB_PROFILE = ImageCms.createProfile("sRGB")
+
+
+def _to_srgb(image: Image.Image) -> Image.Image:
+    icc_profile = image.info.get("icc_profile")
+    if icc_profile:
+        try:
+            source_profile = ImageCms.ImageCmsProfile(io.BytesIO(icc_profile))
+            return ImageCms.profileToProfile(
+                image.convert("RGB"), source_profile, _SRGB_PROFILE, outputMode="RGB"
+            )
+        except ImageCms.PyCMSError:
+            pass
+    return image.convert("RGB")
+
+
+def normalize_image(source: Path, target: Path):
+    """Write the canonical master of an uploaded photo.
+
+    Applies the EXIF orientation, converts to sRGB, caps the longest edge at
+    MASTER_MAX_EDGE and re-encodes as JPEG without any metadata, which drops
+    EXIF (including GPS) and embedded colour profiles.
+    """
+    with Image.open(source) as original:
+        image = _to_srgb(ImageOps.exif_transpose(original))
+    image.thumbnail((MASTER_MAX_EDGE, MASTER_MAX_EDGE), Image.Resampling.LANCZOS)
+    image.save(target, "JPEG", quality=MASTER_QUALITY, optimize=True, progressive=True)
@@ -0,0 +1,66 @@
+import asyncio
+import contextlib
+import logging
+from app.models.mole_image import MoleImage
+from app.models.user import User
+from app.services.database import DATABASE_FLUSH_INTERVAL, IMAGE_COLUMNS, database
+from app.services.image_repository import image_repository
+from app.services.user_directory import hash_password, is_password_hash
+from app.states.auth_state import user_directory
+
+logger = logging.getLogger(__name__)
+
+
+def _merge_changes(users: list[User], images: list[MoleImage]):
+    for user in users:
+        if database.is_queued(user):
+            continue
+        try:
+            user_directory.merge(user)
+        except ValueError:
+            logger.warning("Skipped user %d, which clashes with a local user.", user.id)
+    for image in images:
+        if not database.is_queued(image):
+            image_repository.merge(image)
+
+
+async def _sync_periodically(revision: int):
+    """Write this worker's changes and pick up the other workers' each interval."""
+    while True:
+        await asyncio.sleep(DATABASE_FLUSH_INTERVAL)
+        database.queue_images(image_repository.take_dirty())
+        try:
+            await database.run(database.flush)
+            revision, users, images = await database.run(
+                database.load_changes, revision
+            )
+        except Exception:
+            logger.exception("Syncing with the database failed.")
+            continue
+        _merge_changes(users, images)
+
+
+@contextlib.asynccontextmanager
+async def persistence_lifespan():
+    """Hydrate users and images from the database and keep them in sync with it."""
+    await database.run(database.create_schema)
+    revision = await database.run(database.current_revision)
+    users = await database.run(database.load_users)
+    if users:
+        for user in users:
+            if not is_password_hash(user.password):
+                user.password = await asyncio.to_thread(hash_password, user.password)
+                database.queue_user(user)
+        user_directory.load(users)
+    else:
+        for user in user_directory.all():
+            database.queue_user(user)
+    await database.run(database.flush)
+    image_repository.load(await database.run(database.load_image_rows), IMAGE_COLUMNS)
+    flusher = asyncio.create_task(_sync_periodically(revision))
+    try:
+        yield
+    finally:
+        flusher.cancel()
+        database.queue_images(image_repository.take_dirty())
+        await database.run(database.flush)
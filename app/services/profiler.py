@@ -0,0 +1,84 @@
+import collections
+import os
+import sys
+import threading
+from typing import Optional
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from app.services.metrics import is_debug_request
+
+PROFILER_INTERVAL = float(os.environ.get("MOLE_PROFILER_INTERVAL", "0.01"))
+PROFILER_ROUTE = "/debug/profiler"
+
+
+class SamplingProfiler:
+    """Periodically samples the event-loop thread's stack from a side thread.
+
+    Sampling costs one stack walk per interval and nothing while stopped, so it
+    is safe to switch on in production. Results are collapsed stacks, one line
+    per distinct stack with its sample count, as read by flamegraph tools.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL):
+        self.interval = interval
+        self.samples: collections.Counter[str] = collections.Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._target_id = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        """Start sampling the calling thread, normally the event loop's."""
+        if self.running:
+            return
+        self.samples.clear()
+        self._target_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.collapsed()
+
+    def collapsed(self) -> str:
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.samples.most_common()
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+profiler = SamplingProfiler()
+
+
+async def toggle_profiler(request: Request) -> Response:
+    """POST starts the profiler; DELETE stops it and returns what it collected."""
+    if not is_debug_request(request):
+        return Response(status_code=404)
+    if request.method == "POST":
+        profiler.start()
+        return PlainTextResponse("started\n")
+    if request.method == "DELETE":
+        return PlainTextResponse(profiler.stop() + "\n")
+    return PlainTextResponse(f"running={profiler.running}\n" + profiler.collapsed())
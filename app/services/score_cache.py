@@ -0,0 +1,179 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional
+
+SCORE_CACHE_PATH = os.environ.get("MOLE_SCORE_CACHE_PATH", "score_cache.db")
+SCORE_CACHE_MEMORY_ENTRIES = int(os.environ.get("MOLE_SCORE_CACHE_ENTRIES", "4096"))
+SCORE_CACHE_DISK_ENTRIES = int(
+    os.environ.get("MOLE_SCORE_CACHE_DISK_ENTRIES", "1000000")
+)
+
+SCORE_CACHE_EVICTION_TARGET = 0.9
+
+CacheKey = tuple[str, str]
+CachedScore = tuple[int, str]
+
+
+class ScoreCache:
+    """Memoizes scoring results by (content_hash, model_version).
+
+    Lookups go to an in-memory LRU first and fall back to an SQLite table on
+    disk, so identical bytes scored by the same model are never run through
+    inference again, even across restarts. Both levels are size-bounded.
+    The in-memory level is only touched on the event loop; SQLite calls run on
+    worker threads, one at a time.
+    """
+
+    def __init__(
+        self,
+        path: str = SCORE_CACHE_PATH,
+        max_memory_entries: int = SCORE_CACHE_MEMORY_ENTRIES,
+        max_disk_entries: int = SCORE_CACHE_DISK_ENTRIES,
+    ):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[CacheKey, CachedScore] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_entries = 0
+        self._lock = threading.Lock()
+
+    async def get(self, content_hash: str, model_version: str) -> Optional[CachedScore]:
+        """The cached score and notes for this content and model, if any."""
+        key = (content_hash, model_version)
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return cached
+        row = await asyncio.to_thread(self._read, key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.disk_hits += 1
+        self._remember(key, row)
+        return row
+
+    async def put_many(
+        self, model_version: str, results: Iterable[tuple[str, int, str]]
+    ):
+        """Record (content_hash, score, notes) results for a model in both cache levels."""
+        rows = [
+            (content_hash, model_version, score, notes, time.time())
+            for content_hash, score, notes in results
+        ]
+        for content_hash, _, score, notes, _ in rows:
+            self._remember((content_hash, model_version), (score, notes))
+        await asyncio.to_thread(self._write, rows)
+
+    async def retain_model(self, model_version: str) -> int:
+        """Drop every entry scored by another model version, returning how many were removed."""
+        self._memory = OrderedDict(
+            (key, value)
+            for key, value in self._memory.items()
+            if key[1] == model_version
+        )
+        return await asyncio.to_thread(self._delete_other_models, model_version)
+
+    def stats(self) -> dict[str, int]:
+        """Hit and miss counters plus the in-memory size."""
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_entries": len(self._memory),
+        }
+
+    def _remember(self, key: CacheKey, value: CachedScore):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: CacheKey) -> Optional[CachedScore]:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT score, notes FROM score_cache WHERE content_hash = ? AND model_version = ?",
+                    key,
+                )
+                .fetchone()
+            )
+        return None if row is None else (row[0], row[1])
+
+    def _write(self, rows: list[tuple]):
+        """Upsert rows, evicting the oldest entries once the table outgrows its cap.
+
+        The entry count is tracked as rows are added, so the table is only
+        counted and trimmed when it crosses the cap; trimming goes down to
+        SCORE_CACHE_EVICTION_TARGET of the cap so that happens rarely.
+        """
+        with self._lock:
+            db = self._connection()
+            with db:
+                for row in rows:
+                    if db.execute(
+                        "INSERT OR IGNORE INTO score_cache VALUES (?, ?, ?, ?, ?)", row
+                    ).rowcount:
+                        self._disk_entries += 1
+                    else:
+                        db.execute(
+                            "UPDATE score_cache SET score = ?, notes = ?, created_at = ? "
+                            "WHERE content_hash = ? AND model_version = ?",
+                            (*row[2:], *row[:2]),
+                        )
+                if self._disk_entries > self.max_disk_entries:
+                    self._disk_entries = self._count(db)
+                if self._disk_entries > self.max_disk_entries:
+                    excess = self._disk_entries - int(
+                        self.max_disk_entries * SCORE_CACHE_EVICTION_TARGET
+                    )
+                    db.execute(
+                        "DELETE FROM score_cache WHERE rowid IN (SELECT rowid FROM score_cache "
+                        "ORDER BY created_at LIMIT ?)",
+                        (excess,),
+                    )
+                    self._disk_entries -= excess
+
+    def _delete_other_models(self, model_version: str) -> int:
+        with self._lock:
+            db = self._connection()
+            with db:
+                cursor = db.execute(
+                    "DELETE FROM score_cache WHERE model_version != ?", (model_version,)
+                )
+            self._disk_entries -= cursor.rowcount
+        return cursor.rowcount
+
+    @staticmethod
+    def _count(db: sqlite3.Connection) -> int:
+        return db.execute("SELECT COUNT(*) FROM score_cache").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS score_cache ("
+                "content_hash TEXT NOT NULL, model_version TEXT NOT NULL, "
+                "score INTEGER NOT NULL, notes TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (content_hash, model_version))"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS score_cache_created ON score_cache (created_at)"
+            )
+            self._disk_entries = self._count(self._db)
+        return self._db
+
+
+score_cache = ScoreCache()
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import NamedTuple, Optional
+import numpy as np
+from PIL import Image
+from app.services.cpu_pool import cpu_pool
+from app.services.event_bus import event_bus
+from app.services.features import extract_features, risk_logits
+from app.services.image_repository import image_repository
+from app.services.score_cache import ScoreCache, score_cache
+
+logger = logging.getLogger(__name__)
+
+MODEL_INPUT_SIZE = (224, 224)
+SCORING_BATCH_SIZE = int(os.environ.get("MOLE_SCORING_BATCH_SIZE", "8"))
+SCORING_MAX_WAIT = float(os.environ.get("MOLE_SCORING_MAX_WAIT", "0.25"))
+IMAGE_SCORED_TOPIC = "images.scored"
+SCORING_FAILED_NOTES = "Automatic analysis failed. A doctor will review this image."
+
+
+class ScoreResult(NamedTuple):
+    score: int
+    notes: str
+
+
+def score_notes(score: int) -> str:
+    """Human-readable notes for an AI risk score between 1 and 10."""
+    notes = f"AI analysis suggests a score of {score}. "
+    if score > 7:
+        return notes + "High-risk features detected. Follow-up recommended."
+    if score > 4:
+        return notes + "Moderate-risk features detected. Monitoring advised."
+    return notes + "Low-risk features detected. Routine check-up sufficient."
+
+
+def load_batch(paths: list[Path], size: tuple[int, int]) -> np.ndarray:
+    """Decode images into a stacked (B, H, W, 3) uint8 array at the model input size."""
+    batch = np.empty((len(paths), size[1], size[0], 3), dtype=np.uint8)
+    for index, path in enumerate(paths):
+        with Image.open(path) as image:
+            batch[index] = np.asarray(
+                image.convert("RGB").resize(size, Image.Resampling.BILINEAR)
+            )
+    return batch
+
+
+def probabilities_to_scores(probabilities: np.ndarray) -> list[ScoreResult]:
+    """Map per-image risk probabilities in [0, 1] onto 1-10 scores with notes."""
+    scores = np.clip(np.rint(1 + 9 * probabilities), 1, 10).astype(int)
+    return [ScoreResult(int(score), score_notes(int(score))) for score in scores]
+
+
+class ScoringModel(ABC):
+    """A CPU model that scores a batch of mole photos in one call."""
+
+    model_version: str
+
+    @abstractmethod
+    def score_batch(self, paths: list[Path]) -> list[ScoreResult]:
+        """Score the images at the given paths, returning results in the same order."""
+
+
+class ReferenceScoringModel(ScoringModel):
+    """NumPy reference model scoring the ABCD lesion features of each image."""
+
+    model_version = "reference-2"
+
+    def score_batch(self, paths: list[Path]) -> list[ScoreResult]:
+        features = extract_features(load_batch(paths, MODEL_INPUT_SIZE))
+        logits = risk_logits(features, min(MODEL_INPUT_SIZE))
+        return probabilities_to_scores(1.0 / (1.0 + np.exp(-logits)))
+
+
+class OnnxScoringModel(ScoringModel):
+    """Scores images with an ONNX model that outputs one risk probability per image."""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.model_version = f"onnx-{Path(model_path).stem}"
+        self._session = None
+
+    def __getstate__(self):
+        # Inference sessions cannot be pickled; each pool worker opens its own.
+        return {**self.__dict__, "_session": None}
+
+    def score_batch(self, paths: list[Path]) -> list[ScoreResult]:
+        if self._session is None:
+            import onnxruntime
+
+            self._session = onnxruntime.InferenceSession(
+                self.model_path, providers=["CPUExecutionProvider"]
+            )
+        pixels = load_batch(paths, MODEL_INPUT_SIZE).astype(np.float32) / 255.0
+        input_name = self._session.get_inputs()[0].name
+        (probabilities,) = self._session.run(None, {input_name: pixels})
+        return probabilities_to_scores(np.asarray(probabilities).reshape(-1))
+
+
+def default_model() -> ScoringModel:
+    """The ONNX model named by MOLE_SCORING_MODEL, or the NumPy reference model."""
+    model_path = os.environ.get("MOLE_SCORING_MODEL")
+    if model_path:
+        return OnnxScoringModel(model_path)
+    return ReferenceScoringModel()
+
+
+class ScoringRequest(NamedTuple):
+    image_id: int
+    path: Path
+    content_hash: str
+    future: asyncio.Future
+
+
+class ScoringScheduler:
+    """Collects images across uploads and scores them in batches.
+
+    A batch is dispatched once it holds `max_batch_size` images or the oldest
+    queued image has waited `max_wait` seconds. Results are written back to the
+    image repository, which moves the image from Pending to Evaluated.
+    Content already scored by the current model is answered from the score
+    cache without being queued.
+    """
+
+    def __init__(
+        self,
+        model: ScoringModel,
+        cache: ScoreCache,
+        max_batch_size: int = SCORING_BATCH_SIZE,
+        max_wait: float = SCORING_MAX_WAIT,
+    ):
+        self.model = model
+        self.cache = cache
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, image_id: int, path: Path, content_hash: str) -> ScoreResult:
+        """Score an image from the cache or through the next batch, returning the result."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        cached = await self.cache.get(content_hash, self.model.model_version)
+        if cached is not None:
+            self._complete(image_id, ScoreResult(*cached))
+            return ScoreResult(*cached)
+        future = loop.create_future()
+        self._queue.put_nowait(ScoringRequest(image_id, path, content_hash, future))
+        return await future
+
+    def _complete(self, image_id: int, result: ScoreResult):
+        image = image_repository.update(
+            image_id,
+            status="Evaluated",
+            evaluation_score=result.score,
+            evaluation_notes=result.notes,
+        )
+        event_bus.publish(IMAGE_SCORED_TOPIC, image.model_dump())
+
+    def _fail(self, image_id: int):
+        """Flag an image the model could not score, so a doctor reviews it by hand."""
+        image = image_repository.update(
+            image_id, status="Failed", evaluation_notes=SCORING_FAILED_NOTES
+        )
+        event_bus.publish(IMAGE_SCORED_TOPIC, image.model_dump())
+
+    async def _next_batch(self) -> list[ScoringRequest]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        try:
+            await self.cache.retain_model(self.model.model_version)
+        except Exception:
+            logger.exception("Pruning the score cache failed.")
+        while True:
+            batch = await self._next_batch()
+            try:
+                results = await cpu_pool.run(
+                    self.model.score_batch, [request.path for request in batch]
+                )
+            except Exception as exc:
+                logger.exception("Scoring a batch of %d images failed.", len(batch))
+                for request in batch:
+                    self._fail(request.image_id)
+                    request.future.set_exception(exc)
+                continue
+            for request, result in zip(batch, results):
+                self._complete(request.image_id, result)
+                request.future.set_result(result)
+            try:
+                await self.cache.put_many(
+                    self.model.model_version,
+                    [
+                        (request.content_hash, result.score, result.notes)
+                        for request, result in zip(batch, results)
+                    ],
+                )
+            except Exception:
+                logger.exception("Caching %d scores failed.", len(batch))
+
+
+scoring_scheduler = ScoringScheduler(default_model(), score_cache)
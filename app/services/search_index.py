@@ -0,0 +1,212 @@
+import bisect
+import re
+from typing import Iterable, Iterator, NamedTuple, Optional
+from app.models.mole_image import MoleImage
+
+SEARCH_FIELDS = frozenset(
+    {"patient_name", "social_number", "sex", "age", "evaluation_score"}
+)
+SEARCH_LOAD_FIELDS = (
+    "id",
+    "patient_name",
+    "social_number",
+    "sex",
+    "age",
+    "evaluation_score",
+)
+_TOKEN_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Lower-case alphanumeric words of a name or query."""
+    return [token for token in _TOKEN_SPLIT.split((text or "").lower()) if token]
+
+
+def social_token(social_number: Optional[str]) -> str:
+    """Social number with separators removed, so `850101-1234` matches `8501011234`."""
+    return "".join(tokenize(social_number))
+
+
+def image_tokens(image: MoleImage) -> set[str]:
+    return name_tokens(image.patient_name, image.social_number)
+
+
+def name_tokens(patient_name: str, social_number: Optional[str]) -> set[str]:
+    tokens = set(tokenize(patient_name))
+    social = social_token(social_number)
+    if social:
+        tokens.add(social)
+    return tokens
+
+
+class ImageQuery(NamedTuple):
+    """Filters for a worklist search; unset fields do not restrict the result."""
+
+    text: str = ""
+    statuses: Optional[tuple[str, ...]] = None
+    sex: Optional[str] = None
+    min_age: Optional[int] = None
+    max_age: Optional[int] = None
+    min_score: Optional[int] = None
+    max_score: Optional[int] = None
+    uploaded_from: Optional[float] = None
+    uploaded_to: Optional[float] = None
+
+    def terms(self) -> list[str]:
+        """Prefixes every match must contain; words with digits match social numbers."""
+        terms = []
+        for word in self.text.split():
+            if any(char.isdigit() for char in word):
+                terms.append(social_token(word))
+            else:
+                terms.extend(tokenize(word))
+        return [term for term in terms if term]
+
+    def matches(self, image: MoleImage, terms: list[str]) -> bool:
+        """Whether an image passes every filter, given the query's `terms()`."""
+        if self.statuses is not None and image.status not in self.statuses:
+            return False
+        if self.sex is not None and image.sex != self.sex:
+            return False
+        if not _in_range(image.age, self.min_age, self.max_age):
+            return False
+        if (self.min_score is not None or self.max_score is not None) and not _in_range(
+            image.evaluation_score, self.min_score, self.max_score
+        ):
+            return False
+        if not _in_range(image.uploaded_at, self.uploaded_from, self.uploaded_to):
+            return False
+        if terms:
+            tokens = image_tokens(image)
+            return all(
+                any(token.startswith(term) for token in tokens) for term in terms
+            )
+        return True
+
+
+def _in_range(value, low, high) -> bool:
+    if value is None:
+        return low is None and high is None
+    return (low is None or value >= low) and (high is None or value <= high)
+
+
+class Candidates(NamedTuple):
+    """Ids one filter could match, with a size estimate that is cheap to compute."""
+
+    estimate: int
+    ids: Iterable[int]
+
+
+class SearchIndex:
+    """Inverted and value indexes over the searchable image fields.
+
+    Name words and social numbers map to posting sets, with a sorted vocabulary
+    so a prefix resolves to a contiguous run of tokens. Sex, age and score map
+    each value to the ids holding it, so an equality or range filter is a union
+    over a few small sets. The indexes only propose candidates; every candidate
+    is still checked with `ImageQuery.matches`.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, set[int]] = {}
+        self._vocabulary: list[str] = []
+        self._by_sex: dict[str, set[int]] = {}
+        self._by_age: dict[int, set[int]] = {}
+        self._by_score: dict[Optional[int], set[int]] = {}
+
+    def add(self, image: MoleImage, fields: Iterable[str] = SEARCH_FIELDS):
+        fields = set(fields)
+        if fields & {"patient_name", "social_number"}:
+            for token in image_tokens(image):
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    bisect.insort(self._vocabulary, token)
+                postings.add(image.id)
+        if "sex" in fields:
+            self._by_sex.setdefault(image.sex, set()).add(image.id)
+        if "age" in fields:
+            self._by_age.setdefault(image.age, set()).add(image.id)
+        if "evaluation_score" in fields:
+            self._by_score.setdefault(image.evaluation_score, set()).add(image.id)
+
+    def discard(self, image: MoleImage, fields: Iterable[str] = SEARCH_FIELDS):
+        fields = set(fields)
+        if fields & {"patient_name", "social_number"}:
+            for token in image_tokens(image):
+                self._postings.get(token, set()).discard(image.id)
+        if "sex" in fields:
+            self._by_sex.get(image.sex, set()).discard(image.id)
+        if "age" in fields:
+            self._by_age.get(image.age, set()).discard(image.id)
+        if "evaluation_score" in fields:
+            self._by_score.get(image.evaluation_score, set()).discard(image.id)
+
+    def load(self, rows: Iterable[tuple]):
+        """Bulk-build the indexes from rows of SEARCH_LOAD_FIELDS values.
+
+        The vocabulary is sorted once, and since names and social numbers repeat
+        across a patient's images, each distinct pair is tokenized once.
+        """
+        tokens_of: dict[tuple, set[str]] = {}
+        for image_id, patient_name, social_number, sex, age, score in rows:
+            names = (patient_name, social_number)
+            tokens = tokens_of.get(names)
+            if tokens is None:
+                tokens = tokens_of[names] = name_tokens(*names)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(image_id)
+            self._by_sex.setdefault(sex, set()).add(image_id)
+            self._by_age.setdefault(age, set()).add(image_id)
+            self._by_score.setdefault(score, set()).add(image_id)
+        self._vocabulary = sorted(self._postings)
+
+    def candidates(self, query: ImageQuery) -> list[Candidates]:
+        """Candidate id sources for each indexed filter in the query."""
+        sources = []
+        for term in query.terms():
+            sources.append(self._union(self._prefix_postings(term)))
+        if query.sex is not None:
+            sources.append(self._union([self._by_sex.get(query.sex, set())]))
+        if query.min_age is not None or query.max_age is not None:
+            sources.append(
+                self._union(
+                    ids
+                    for age, ids in self._by_age.items()
+                    if _in_range(age, query.min_age, query.max_age)
+                )
+            )
+        if query.min_score is not None or query.max_score is not None:
+            sources.append(
+                self._union(
+                    ids
+                    for score, ids in self._by_score.items()
+                    if _in_range(score, query.min_score, query.max_score)
+                )
+            )
+        return sources
+
+    def _prefix_postings(self, prefix: str) -> Iterator[set[int]]:
+        index = bisect.bisect_left(self._vocabulary, prefix)
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(
+            prefix
+        ):
+            yield self._postings[self._vocabulary[index]]
+            index += 1
+
+    @staticmethod
+    def _union(postings: Iterable[set[int]]) -> Candidates:
+        postings = [ids for ids in postings if ids]
+        return Candidates(
+            sum(len(ids) for ids in postings),
+            postings[0] if len(postings) == 1 else _chain_unique(postings),
+        )
+
+
+def _chain_unique(postings: list[set[int]]) -> Iterator[int]:
+    seen: set[int] = set()
+    for ids in postings:
+        for image_id in ids:
+            if image_id not in seen:
+                seen.add(image_id)
+                yield image_id
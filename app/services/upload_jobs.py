@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import logging
+import os
+import time
+import uuid
+from typing import Any, Optional
+import reflex as rx
+from app.models.mole_image import MoleImage
+from app.models.upload_progress import UploadProgress, UploadStage
+from app.services.content_store import content_store
+from app.services.cpu_pool import cpu_pool
+from app.services.derivatives import build_derivatives
+from app.services.id_allocator import image_ids
+from app.services.image_repository import image_repository
+from app.services.scoring import scoring_scheduler
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CONCURRENCY = int(os.environ.get("MOLE_UPLOAD_CONCURRENCY", "3"))
+UPLOAD_PROGRESS_INTERVAL = 0.1
+UPLOAD_MAX_QUEUED_BYTES = int(
+    os.environ.get("MOLE_UPLOAD_MAX_QUEUED_BYTES", str(512 * 1024 * 1024))
+)
+UPLOAD_BATCH_TTL = 600.0
+
+
+class UploadJob:
+    """One uploaded file on its way through storage, derivatives and scoring."""
+
+    def __init__(self, batch: "UploadBatch", file: rx.UploadFile):
+        self.batch = batch
+        self.file: Optional[rx.UploadFile] = file
+        self.name = file.name or ""
+        self.size = file.size or 0
+        self.bytes_received = 0
+        self.stage: UploadStage = "queued"
+        self.image: Optional[MoleImage] = None
+
+    def report(self, stage: UploadStage, bytes_received: Optional[int] = None):
+        self.stage = stage
+        if bytes_received is not None:
+            self.bytes_received = bytes_received
+        self.batch.updated.set()
+
+    def progress(self) -> UploadProgress:
+        return UploadProgress(
+            name=self.name,
+            size=max(self.size, self.bytes_received),
+            bytes_received=self.bytes_received,
+            stage=self.stage,
+        )
+
+
+class UploadBatch:
+    """The files of one upload request, sharing the patient data they were sent with."""
+
+    def __init__(self, files: list[rx.UploadFile], image_fields: dict[str, Any]):
+        self.batch_id = uuid.uuid4().hex
+        self.image_fields = image_fields
+        self.updated = asyncio.Event()
+        self.jobs = [UploadJob(self, file) for file in files]
+        self.finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return all(job.stage in ("scored", "failed") for job in self.jobs)
+
+    @property
+    def size(self) -> int:
+        return sum(job.size for job in self.jobs)
+
+    @property
+    def failed(self) -> int:
+        return sum(job.stage == "failed" for job in self.jobs)
+
+    def progress(self) -> list[UploadProgress]:
+        return [job.progress() for job in self.jobs]
+
+    async def wait_for_update(self):
+        """Wait for the next progress change, coalescing bursts of chunk updates."""
+        await self.updated.wait()
+        await asyncio.sleep(UPLOAD_PROGRESS_INTERVAL)
+        self.updated.clear()
+
+
+class UploadQueue:
+    """Processes uploaded files as background jobs, at most `concurrency` at a time.
+
+    Handlers submit a batch and return immediately; a background event then
+    follows the batch's progress, so the user's state lock is never held while
+    files are written, decoded or scored. A batch is refused while the files
+    still waiting to be stored exceed `max_queued_bytes`, and finished batches
+    nobody discarded are dropped after `batch_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = UPLOAD_CONCURRENCY,
+        max_queued_bytes: int = UPLOAD_MAX_QUEUED_BYTES,
+        batch_ttl: float = UPLOAD_BATCH_TTL,
+    ):
+        self._slots = asyncio.Semaphore(concurrency)
+        self.max_queued_bytes = max_queued_bytes
+        self.batch_ttl = batch_ttl
+        self.queued_bytes = 0
+        self._batches: dict[str, UploadBatch] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def submit(
+        self, files: list[rx.UploadFile], image_fields: dict[str, Any]
+    ) -> UploadBatch:
+        """Start processing files, tagging each resulting image with `image_fields`.
+
+        Raises ValueError if the queue is too full to take the batch.
+        """
+        self._expire()
+        batch = UploadBatch(files, image_fields)
+        if self.queued_bytes and self.queued_bytes + batch.size > self.max_queued_bytes:
+            raise ValueError(
+                "Too many uploads are in progress. Please try again shortly."
+            )
+        self.queued_bytes += batch.size
+        self._batches[batch.batch_id] = batch
+        for job in batch.jobs:
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return batch
+
+    def get(self, batch_id: str) -> Optional[UploadBatch]:
+        return self._batches.get(batch_id)
+
+    def discard(self, batch_id: str):
+        self._batches.pop(batch_id, None)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.batch_ttl
+        for batch_id, batch in list(self._batches.items()):
+            if batch.finished_at is not None and batch.finished_at < cutoff:
+                del self._batches[batch_id]
+
+    async def _run(self, job: UploadJob):
+        try:
+            try:
+                async with self._slots:
+                    await self._store(job)
+            finally:
+                self.queued_bytes -= job.size
+            job.report("scoring")
+            await scoring_scheduler.submit(
+                job.image.id,
+                content_store.path(job.image.filename),
+                job.image.content_hash,
+            )
+            job.report("scored")
+        except Exception:
+            logger.exception("Processing upload %r failed.", job.name)
+            job.report("failed")
+        if job.batch.done:
+            job.batch.finished_at = time.monotonic()
+
+    async def _store(self, job: UploadJob):
+        job.report("receiving")
+        uploaded_at = datetime.datetime.now()
+        try:
+            stored = await content_store.put(
+                job.file, on_progress=lambda size: job.report("receiving", size)
+            )
+        finally:
+            await job.file.close()
+            job.file = None
+        job.report("stored", stored.size)
+        try:
+            renditions = await cpu_pool.run(
+                build_derivatives,
+                content_store.path(stored.name),
+                content_store.upload_dir,
+                stored.sha256,
+            )
+            job.image = MoleImage(
+                id=await image_ids.next_id(),
+                filename=stored.name,
+                original_filename=job.name,
+                content_hash=stored.sha256,
+                renditions=renditions,
+                upload_date=uploaded_at.strftime("%B %d, %Y"),
+                uploaded_at=uploaded_at.timestamp(),
+                status="Pending",
+                **job.batch.image_fields,
+            )
+            image_repository.add(job.image)
+        except BaseException:
+            job.image = None
+            await asyncio.to_thread(content_store.release, stored.sha256)
+            raise
+        job.batch.updated.set()
+
+
+upload_queue = UploadQueue()
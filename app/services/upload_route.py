@@ -0,0 +1,86 @@
+import functools
+from pathlib import Path
+from typing import Optional, get_args, get_type_hints
+import reflex as rx
+from reflex import constants
+from reflex.event import Event, EventHandler
+from reflex.state import State
+from starlette.datastructures import UploadFile as StarletteUploadFile
+from starlette.exceptions import HTTPException
+from starlette.requests import ClientDisconnect, Request
+from starlette.responses import Response, StreamingResponse
+
+UPLOAD_ROUTE = str(constants.Endpoint.UPLOAD)
+
+
+def upload_parameter(handler: str) -> Optional[str]:
+    """Name of the `list[rx.UploadFile]` parameter of an upload event handler."""
+    state_path, _, name = handler.rpartition(".")
+    try:
+        func = getattr(State.get_class_substate(state_path), name)
+    except (AttributeError, ValueError):
+        return None
+    if not isinstance(func, EventHandler) or func.is_background:
+        return None
+    func = func.fn
+    if isinstance(func, functools.partial):
+        func = func.func
+    for parameter, annotation in get_type_hints(func).items():
+        args = get_args(annotation)
+        if args and isinstance(args[0], type) and issubclass(args[0], rx.UploadFile):
+            return parameter
+    return None
+
+
+def streaming_upload(app: rx.App):
+    """Reflex's upload endpoint without its copy of every file into memory.
+
+    Reflex reads each uploaded file into a BytesIO before calling the handler,
+    so a request holds all of its files in memory at once. Here the multipart
+    parser spools each file to a temporary file on disk past its first
+    megabyte and the handler gets those files as they are; whoever consumes a
+    file closes it. Mounted ahead of Reflex's route on the same path, so the
+    upload component and its progress reporting work unchanged.
+    """
+
+    async def upload_file(request: Request) -> Response:
+        token = request.headers.get("reflex-client-token")
+        handler = request.headers.get("reflex-event-handler")
+        if not token or not handler:
+            raise HTTPException(
+                status_code=400,
+                detail="Missing reflex-client-token or reflex-event-handler header.",
+            )
+        parameter = upload_parameter(handler)
+        if parameter is None:
+            raise HTTPException(
+                status_code=400, detail=f"`{handler}` is not an upload handler."
+            )
+        try:
+            form = await request.form()
+        except ClientDisconnect:
+            return Response()
+        files = [
+            rx.UploadFile(
+                file=file.file,
+                path=Path(file.filename.lstrip("/")) if file.filename else None,
+                size=file.size,
+                headers=file.headers,
+            )
+            for file in form.getlist("files")
+            if isinstance(file, StarletteUploadFile)
+        ]
+        if not files:
+            await form.close()
+            raise HTTPException(status_code=400, detail="No files were uploaded.")
+        event = Event(token=token, name=handler, payload={parameter: files})
+
+        async def updates():
+            async with app.state_manager.modify_state(event.substate_token) as state:
+                async for update in state._process(event):
+                    update = await app._postprocess(state, event, update)
+                    yield update.json() + "\n"
+
+        return StreamingResponse(updates(), media_type="application/x-ndjson")
+
+    return upload_file
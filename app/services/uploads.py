@@ -0,0 +1,55 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Callable, NamedTuple, Optional
+import reflex as rx
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _write_chunk(tmp: BinaryIO, digest, chunk: bytes):
+    digest.update(chunk)
+    tmp.write(chunk)
+
+
+class StoredUpload(NamedTuple):
+    path: Path
+    sha256: str
+    size: int
+
+
+async def stream_upload_to_temp(
+    file: rx.UploadFile,
+    directory: Path,
+    on_progress: Optional[Callable[[int], None]] = None,
+) -> StoredUpload:
+    """Stream an uploaded file into a temporary file in fixed-size chunks, hashing it on the way.
+
+    The temporary file lives in `directory` so the caller can rename it into
+    place atomically once it knows the final name. `on_progress` is called with
+    the running byte count after every chunk. Hashing and disk writes run in a
+    worker thread so slow storage never stalls the event loop.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_name = await asyncio.to_thread(
+        tempfile.mkstemp, dir=directory, prefix=".upload-", suffix=".part"
+    )
+    tmp = os.fdopen(fd, "wb")
+    try:
+        while True:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            await asyncio.to_thread(_write_chunk, tmp, digest, chunk)
+            size += len(chunk)
+            if on_progress is not None:
+                on_progress(size)
+        await asyncio.to_thread(tmp.close)
+    except BaseException:
+        tmp.close()
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return StoredUpload(path=Path(tmp_name), sha256=digest.hexdigest(), size=size)
@@ -0,0 +1,119 @@
+import asyncio
+import hashlib
+import hmac
+import os
+from typing import Iterable, Optional
+from app.models.user import User
+
+PASSWORD_HASH_SCHEME = "pbkdf2_sha256"
+PASSWORD_HASH_ITERATIONS = int(os.environ.get("MOLE_PASSWORD_ITERATIONS", "200000"))
+
+
+def hash_password(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    """Salted PBKDF2-SHA256 hash encoded as `scheme$iterations$salt$digest`."""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return f"{PASSWORD_HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+
+def is_password_hash(value: str) -> bool:
+    return value.startswith(f"{PASSWORD_HASH_SCHEME}$")
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Check a password against an encoded hash in constant time."""
+    _, iterations, salt, expected = encoded.split("$")
+    digest = hashlib.pbkdf2_hmac(
+        "sha256", password.encode(), bytes.fromhex(salt), int(iterations)
+    )
+    return hmac.compare_digest(digest.hex(), expected)
+
+
+async def hash_password_async(password: str) -> str:
+    """`hash_password` on a worker thread, keeping the event loop free."""
+    return await asyncio.to_thread(hash_password, password)
+
+
+_DUMMY_HASH = hash_password("")
+
+
+class UserDirectory:
+    """Users indexed by id and by case-folded email.
+
+    Login and uniqueness checks are dictionary lookups; the only per-login cost
+    that grows with security settings is the password hash, which runs off the
+    event loop.
+    """
+
+    def __init__(self, users: Iterable[User] = ()):
+        self._by_id: dict[int, User] = {}
+        self._by_email: dict[str, int] = {}
+        self.load(users)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(self, users: Iterable[User]):
+        """Replace the directory contents."""
+        self._by_id = {}
+        self._by_email = {}
+        for user in users:
+            self.add(user)
+
+    def all(self) -> list[User]:
+        """Every user, ordered by id."""
+        return sorted(self._by_id.values(), key=lambda u: u.id)
+
+    def get(self, user_id: int) -> Optional[User]:
+        return self._by_id.get(user_id)
+
+    def find_by_email(self, email: str) -> Optional[User]:
+        user_id = self._by_email.get(email.casefold())
+        return None if user_id is None else self._by_id[user_id]
+
+    def email_taken(self, email: str, exclude_id: Optional[int] = None) -> bool:
+        """Whether another user already has this email, ignoring case."""
+        user_id = self._by_email.get(email.casefold())
+        return user_id is not None and user_id != exclude_id
+
+    def add(self, user: User):
+        """Add a user, rejecting duplicate ids and emails."""
+        if user.id in self._by_id:
+            raise ValueError(f"User {user.id} already exists.")
+        if self.email_taken(user.email):
+            raise ValueError(f"User with email '{user.email}' already exists.")
+        self._by_id[user.id] = user
+        self._by_email[user.email.casefold()] = user.id
+
+    def update(self, user_id: int, **changes) -> User:
+        """Apply field changes to a user, re-indexing the email if it changed."""
+        user = self._by_id[user_id]
+        new_email = changes.get("email", user.email)
+        if self.email_taken(new_email, exclude_id=user_id):
+            raise ValueError(f"User with email '{new_email}' already exists.")
+        del self._by_email[user.email.casefold()]
+        for field, value in changes.items():
+            setattr(user, field, value)
+        self._by_email[user.email.casefold()] = user_id
+        return user
+
+    def merge(self, user: User):
+        """Add or overwrite a user another worker persisted."""
+        if user.id in self._by_id:
+            self.update(
+                user.id, **{field: getattr(user, field) for field in User.model_fields}
+            )
+        else:
+            self.add(user)
+
+    async def authenticate(self, email: str, password: str) -> Optional[User]:
+        """The user with these credentials, or None.
+
+        Unknown emails are still checked against a dummy hash, so a failed login
+        costs the same whether or not the account exists.
+        """
+        user = self.find_by_email(email)
+        encoded = user.password if user is not None else _DUMMY_HASH
+        if await asyncio.to_thread(verify_password, password, encoded):
+            return user
+        return None
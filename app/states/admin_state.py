@@ -1,13 +1,18 @@
 import reflex as rx
-from app.states.auth_state import AuthState, mock_users
-from app.models.user import User
+from app.states.auth_state import AuthState, user_directory
+from app.models.user import User, UserProfile
+from app.services.database import database
+from app.services.id_allocator import user_ids
+from app.services.incremental import IncrementalList, apply_changes
+from app.services.user_directory import hash_password_async
 import random
 
 
 class AdminState(rx.State):
     """Manages admin-specific functionality like user management."""
 
-    all_users: list[User] = []
+    all_users: list[UserProfile] = []
+    recent_users: list[UserProfile] = []
     is_modal_open: bool = False
 
     @rx.event
@@ -15,22 +20,46 @@ class AdminState(rx.State):
         """Load all users when the admin dashboard loads."""
         auth_state = await self.get_state(AuthState)
         if auth_state.is_authenticated and auth_state.user_role == "admin":
-            self.all_users = sorted(mock_users, key=lambda u: u.id)
+            self._load_users()
+
+    def _load_users(self):
+        self.all_users = [user.profile() for user in user_directory.all()]
+        self.recent_users = []
 
     @rx.event
-    def create_user(self, form_data: dict):
+    async def create_user(self, form_data: dict):
         """Create a new user and add to the mock database."""
         name = form_data.get("name")
         email = form_data.get("email")
         password = form_data.get("password")
         role = form_data.get("role")
         if not name or not email or (not password) or (not role):
-            return rx.toast.error("Please fill all fields.")
-        if any((u.email.lower() == email.lower() for u in mock_users)):
-            return rx.toast.error(f"User with email '{email}' already exists.")
-        new_id = max((u.id for u in mock_users)) + 1 if mock_users else 1
-        new_user = User(id=new_id, name=name, email=email, password=password, role=role)
-        mock_users.append(new_user)
+            yield rx.toast.error("Please fill all fields.")
+            return
+        if user_directory.email_taken(email):
+            yield rx.toast.error(f"User with email '{email}' already exists.")
+            return
+        password_hash = await hash_password_async(password)
+        new_user = User(
+            id=await user_ids.next_id(),
+            name=name,
+            email=email,
+            password=password_hash,
+            role=role,
+        )
+        try:
+            await database.run(database.save_user, new_user)
+            user_directory.add(new_user)
+        except ValueError as e:
+            yield rx.toast.error(str(e))
+            return
         self.is_modal_open = False
-        yield AdminState.on_load
+        users, compacted = apply_changes(
+            IncrementalList(self.all_users, self.recent_users, []),
+            [new_user.profile()],
+            lambda user: user.id,
+        )
+        if compacted:
+            self.all_users = users.base
+        self.recent_users = users.recent
         yield rx.toast.success(f"User '{name}' created successfully.")
\ No newline at end of file
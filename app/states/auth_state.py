@@ -1,88 +1,96 @@
 import reflex as rx
-from typing import Optional
 from app.models.user import User
+from app.services.user_directory import UserDirectory, hash_password
 
-mock_users: list[User] = [
-    User(
-        id=1,
-        email="patient@example.com",
-        password="password",
-        role="patient",
-        name="John Patient",
-    ),
-    User(
-        id=2,
-        email="doctor@example.com",
-        password="password",
-        role="doctor",
-        name="Dr. Ada Heals",
-    ),
-    User(
-        id=3,
-        email="admin@example.com",
-        password="password",
-        role="admin",
-        name="Eva Admin",
-    ),
-]
+user_directory = UserDirectory(
+    [
+        User(
+            id=1,
+            email="patient@example.com",
+            password=hash_password("password"),
+            role="patient",
+            name="John Patient",
+        ),
+        User(
+            id=2,
+            email="doctor@example.com",
+            password=hash_password("password"),
+            role="doctor",
+            name="Dr. Ada Heals",
+        ),
+        User(
+            id=3,
+            email="admin@example.com",
+            password=hash_password("password"),
+            role="admin",
+            name="Eva Admin",
+        ),
+    ]
+)
 
 
 class AuthState(rx.State):
     """Manages user authentication and session."""
 
-    logged_in_user: Optional[User] = None
     login_error: str = ""
     is_loading: bool = False
     is_sidebar_open: bool = False
+    _user_id: int = -1
+    _user_role: str = ""
+    _user_name: str = ""
+    _user_email: str = ""
 
     @rx.var
     def is_authenticated(self) -> bool:
         """Check if a user is currently logged in."""
-        return self.logged_in_user is not None
+        return self._user_id != -1
 
     @rx.var
     def user_role(self) -> str:
         """Get the role of the logged-in user."""
-        if self.logged_in_user is None:
-            return ""
-        if isinstance(self.logged_in_user, dict):
-            user_obj = User.model_validate(self.logged_in_user)
-            return user_obj.role
-        return self.logged_in_user.role
+        return self._user_role
 
     @rx.var
     def logged_in_user_id(self) -> int:
         """Get the ID of the logged-in user."""
-        if self.logged_in_user is None:
-            return -1
-        if isinstance(self.logged_in_user, dict):
-            user_obj = User.model_validate(self.logged_in_user)
-            return user_obj.id
-        return self.logged_in_user.id
+        return self._user_id
 
     @rx.var
     def user_name(self) -> str:
         """Get the name of the logged-in user."""
-        if self.logged_in_user is None:
-            return ""
-        if isinstance(self.logged_in_user, dict):
-            user_obj = User.model_validate(self.logged_in_user)
-            return user_obj.name
-        return self.logged_in_user.name
+        return self._user_name
+
+    @rx.var
+    def user_email(self) -> str:
+        """Get the email of the logged-in user."""
+        return self._user_email
+
+    def _set_session(self, user: User):
+        """Cache the session identity as primitives; called on login and profile save."""
+        self._user_id = user.id
+        self._user_role = user.role
+        self._user_name = user.name
+        self._user_email = user.email
+
+    def _clear_session(self):
+        self._user_id = -1
+        self._user_role = ""
+        self._user_name = ""
+        self._user_email = ""
 
     @rx.event
-    def login(self, form_data: dict[str, str]):
+    async def login(self, form_data: dict[str, str]):
         """Handle the login form submission."""
         self.is_loading = True
         yield
-        email = form_data.get("email", "").lower()
+        email = form_data.get("email", "")
         password = form_data.get("password", "")
-        for user in mock_users:
-            if user.email.lower() == email and user.password == password:
-                self.logged_in_user = user
-                self.login_error = ""
-                self.is_loading = False
-                return
+        user = await user_directory.authenticate(email, password)
+        if user is not None:
+            self._set_session(user)
+            self.login_error = ""
+            self.is_loading = False
+            return
         self.login_error = "Invalid email or password. Please try again."
         self.is_loading = False
 
@@ -94,7 +102,7 @@ class AuthState(rx.State):
     @rx.event
     def logout(self):
         """Log the user out and redirect to the login page."""
-        self.logged_in_user = None
+        self._clear_session()
         return rx.redirect("/")
 
     @rx.event
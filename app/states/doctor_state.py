@@ -1,27 +1,262 @@
 import reflex as rx
+import datetime
 from typing import Optional
 from app.models.mole_image import MoleImage
 from app.states.auth_state import AuthState
-from app.states.patient_state import mock_mole_images
+from reflex.utils.prerequisites import get_and_validate_app
+from app.services.event_bus import event_bus
+from app.services.image_repository import ORDERINGS, image_repository
+from app.services.incremental import IncrementalList, anchors, apply_changes
+from app.services.scoring import IMAGE_SCORED_TOPIC
+from app.services.search_index import ImageQuery
+
+WORKLIST_STATUSES = ("Pending", "Evaluated", "Failed")
+WORKLIST_PAGE_SIZE = 24
+WORKLIST_WINDOW_SIZE = 3 * WORKLIST_PAGE_SIZE
+AGE_BUCKETS = {"0-17": (0, 17), "18-39": (18, 39), "40-64": (40, 64), "65+": (65, None)}
+LIVE_CHECK_INTERVAL = 30.0
+FILTER_FIELDS = ("text", "status", "sex", "age", "min_score", "max_score", "from", "to")
+_watching_clients: set[str] = set()
+
+
+def _client_connected(client_token: str) -> bool:
+    event_namespace = get_and_validate_app().app.event_namespace
+    return event_namespace is not None and client_token in event_namespace.token_to_sid
+
+
+def _parse_int(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def _parse_day(value: Optional[str], end: bool = False) -> Optional[float]:
+    """Timestamp of the start of a `YYYY-MM-DD` day, or of its last moment with `end`."""
+    try:
+        day = datetime.datetime.strptime(value, "%Y-%m-%d") if value else None
+    except ValueError:
+        return None
+    if day is None:
+        return None
+    if end:
+        day += datetime.timedelta(days=1, microseconds=-1)
+    return day.timestamp()
 
 
 class DoctorState(rx.State):
     """Manages the doctor's dashboard, including viewing and evaluating images."""
 
     all_images: list[MoleImage] = []
+    recent_images: list[MoleImage] = []
+    recent_anchor_ids: list[int] = []
+    superseded_image_ids: list[int] = []
+    has_newer: bool = False
+    has_older: bool = False
+    sort_order: str = "recent"
+    filters: dict[str, str] = {}
     selected_image: Optional[MoleImage] = None
     is_modal_open: bool = False
 
     @rx.event
     async def on_load(self):
-        """Load all images for the doctor to review."""
+        """Load the first page of the worklist for the doctor to review."""
         auth_state = await self.get_state(AuthState)
         if auth_state.is_authenticated and auth_state.user_role == "doctor":
-            self.all_images = sorted(
-                [img for img in mock_mole_images if img.status != "Archived"],
-                key=lambda img: img.upload_date,
-                reverse=True,
+            self._load_worklist()
+            return DoctorState.watch_scored_images
+
+    @rx.event(background=True)
+    async def watch_scored_images(self):
+        """Insert images into the open worklist as their scores are published.
+
+        Running watchers are tracked in this process rather than in the saved
+        session, so a session restored by a restarted worker starts a new one.
+        """
+        async with self:
+            client_token = self.router.session.client_token
+        if client_token in _watching_clients:
+            return
+        _watching_clients.add(client_token)
+        try:
+            async with event_bus.subscribe(IMAGE_SCORED_TOPIC) as scored:
+                while _client_connected(client_token):
+                    message = await scored.get(timeout=LIVE_CHECK_INTERVAL)
+                    if message is None:
+                        continue
+                    images = [
+                        MoleImage.model_validate(pending)
+                        for pending in [message, *scored.drain()]
+                    ]
+                    async with self:
+                        auth_state = await self.get_state(AuthState)
+                        if auth_state.user_role != "doctor":
+                            break
+                        if scored.overflowed:
+                            scored.overflowed = False
+                            self._load_worklist()
+                        else:
+                            self._insert_live(images)
+        finally:
+            _watching_clients.discard(client_token)
+
+    def _insert_live(self, images: list[MoleImage]):
+        """Fold newly scored images into the short recent tail instead of reloading.
+
+        Only images that sort inside the loaded window are shown; an image
+        already on screen that now sorts outside it, or no longer matches the
+        filters, is hidden. Each tail image is drawn in front of the base
+        image it precedes.
+        """
+        query = self._query()
+        terms = query.terms()
+        inside = [
+            image
+            for image in images
+            if query.matches(image, terms) and self._in_window(image)
+        ]
+        inside_ids = {image.id for image in inside}
+        leaving = [image.id for image in images if image.id not in inside_ids]
+        if not inside and not self._shown(leaving):
+            return
+        worklist, compacted = apply_changes(
+            IncrementalList(
+                self.all_images, self.recent_images, self.superseded_image_ids
+            ),
+            inside,
+            self._cursor,
+            removed=leaving,
+        )
+        if compacted:
+            self.all_images = worklist.base[:WORKLIST_WINDOW_SIZE]
+            if len(worklist.base) > WORKLIST_WINDOW_SIZE:
+                self.has_older = True
+        self.recent_images = worklist.recent
+        self.recent_anchor_ids = anchors(worklist, self._cursor)
+        self.superseded_image_ids = worklist.superseded
+
+    def _fold_recent(self):
+        """Merge the recent tail into the window so paging starts from its true ends."""
+        worklist, compacted = apply_changes(
+            IncrementalList(
+                self.all_images, self.recent_images, self.superseded_image_ids
+            ),
+            [],
+            self._cursor,
+            max_recent=0,
+        )
+        if compacted:
+            self.all_images = worklist.base
+            self.recent_images = []
+            self.recent_anchor_ids = []
+            self.superseded_image_ids = []
+
+    def _in_window(self, image: MoleImage) -> bool:
+        """Whether an image sorts between the first and last loaded worklist rows."""
+        if not self.all_images:
+            return not self.has_older
+        key = self._cursor(image)
+        if self.has_newer and key < self._cursor(self.all_images[0]):
+            return False
+        return not (self.has_older and key > self._cursor(self.all_images[-1]))
+
+    def _shown(self, image_ids: list[int]) -> bool:
+        shown = {image.id for image in self.all_images}
+        shown.update(image.id for image in self.recent_images)
+        return not shown.isdisjoint(image_ids)
+
+    @rx.event
+    def set_sort_order(self, order: str):
+        """Switch the worklist between newest-first and highest-risk-first."""
+        if order in ORDERINGS and order != self.sort_order:
+            self.sort_order = order
+            self._load_worklist()
+
+    @rx.event
+    def apply_filters(self, form_data: dict[str, str]):
+        """Search the worklist on the server with the submitted filters."""
+        self.filters = {
+            field: value.strip()
+            for field, value in form_data.items()
+            if field in FILTER_FIELDS and value.strip()
+        }
+        self._load_worklist()
+
+    @rx.event
+    def clear_filters(self):
+        """Show the whole worklist again."""
+        if self.filters:
+            self.filters = {}
+            self._load_worklist()
+
+    def _cursor(self, image: MoleImage):
+        return ORDERINGS[self.sort_order](image)
+
+    def _query(self) -> ImageQuery:
+        filters = self.filters
+        status = filters.get("status")
+        min_age, max_age = AGE_BUCKETS.get(filters.get("age", ""), (None, None))
+        return ImageQuery(
+            text=filters.get("text", ""),
+            statuses=(status,) if status in WORKLIST_STATUSES else WORKLIST_STATUSES,
+            sex=filters.get("sex"),
+            min_age=min_age,
+            max_age=max_age,
+            min_score=_parse_int(filters.get("min_score")),
+            max_score=_parse_int(filters.get("max_score")),
+            uploaded_from=_parse_day(filters.get("from")),
+            uploaded_to=_parse_day(filters.get("to"), end=True),
+        )
+
+    def _page(self, cursor, before: bool = False) -> list[MoleImage]:
+        """The next worklist page past the cursor, searching only when filters are set."""
+        if self.filters:
+            return image_repository.search(
+                self._query(),
+                cursor,
+                WORKLIST_PAGE_SIZE + 1,
+                self.sort_order,
+                before,
             )
+        page = image_repository.page_before if before else image_repository.page_after
+        return page(cursor, WORKLIST_PAGE_SIZE + 1, WORKLIST_STATUSES, self.sort_order)
+
+    def _load_worklist(self):
+        page = self._page(None)
+        self.all_images = page[:WORKLIST_PAGE_SIZE]
+        self.recent_images = []
+        self.recent_anchor_ids = []
+        self.superseded_image_ids = []
+        self.has_older = len(page) > WORKLIST_PAGE_SIZE
+        self.has_newer = False
+
+    @rx.event
+    def load_older(self):
+        """Extend the worklist window with the next page further down the worklist."""
+        if not self.all_images:
+            return
+        self._fold_recent()
+        page = self._page(self._cursor(self.all_images[-1]))
+        self.has_older = len(page) > WORKLIST_PAGE_SIZE
+        window = self.all_images + page[:WORKLIST_PAGE_SIZE]
+        if len(window) > WORKLIST_WINDOW_SIZE:
+            window = window[-WORKLIST_WINDOW_SIZE:]
+            self.has_newer = True
+        self.all_images = window
+
+    @rx.event
+    def load_newer(self):
+        """Extend the worklist window with the previous page further up the worklist."""
+        if not self.all_images:
+            return
+        self._fold_recent()
+        page = self._page(self._cursor(self.all_images[0]), before=True)
+        self.has_newer = len(page) > WORKLIST_PAGE_SIZE
+        window = page[-WORKLIST_PAGE_SIZE:] + self.all_images
+        if len(window) > WORKLIST_WINDOW_SIZE:
+            window = window[:WORKLIST_WINDOW_SIZE]
+            self.has_older = True
+        self.all_images = window
 
     @rx.event
     def open_image_modal(self, image: MoleImage):
@@ -0,0 +1,27 @@
+import reflex as rx
+from app.states.auth_state import AuthState
+from app.states.patient_state import PatientState
+from app.states.doctor_state import DoctorState
+from app.states.admin_state import AdminState
+
+
+class IndexState(rx.State):
+    """Routes the index page load to the dashboard of the logged-in user's role."""
+
+    @rx.event
+    async def on_load(self):
+        """Check the role once and hydrate only the matching dashboard state."""
+        auth_state = await self.get_state(AuthState)
+        if not auth_state.is_authenticated:
+            return
+        role = auth_state.user_role
+        if role == "patient":
+            patient_state = await self.get_state(PatientState)
+            patient_state._load_images(auth_state.logged_in_user_id)
+        elif role == "doctor":
+            doctor_state = await self.get_state(DoctorState)
+            doctor_state._load_worklist()
+            return DoctorState.watch_scored_images
+        elif role == "admin":
+            admin_state = await self.get_state(AdminState)
+            admin_state._load_users()
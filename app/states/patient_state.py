@@ -1,18 +1,23 @@
 import reflex as rx
-import datetime
-from typing import Optional
 from app.models.mole_image import MoleImage
 from app.states.auth_state import AuthState
+from app.services.image_repository import image_repository, recency_key
+from app.services.incremental import IncrementalList, apply_changes
+from app.services.upload_jobs import upload_queue
+from app.models.upload_progress import UploadProgress
 
-mock_mole_images: list[MoleImage] = []
-next_image_id = 1
+MAX_PATIENT_AGE = 130
 
 
 class PatientState(rx.State):
     """Manages the patient dashboard, including photo uploads and viewing evaluations."""
 
     user_images: list[MoleImage] = []
+    recent_user_images: list[MoleImage] = []
+    superseded_image_ids: list[int] = []
     is_uploading: bool = False
+    upload_progress: list[UploadProgress] = []
+    _upload_batch_id: str = ""
     patient_age: str = ""
     patient_sex: str = ""
     patient_social_number: str = ""
@@ -22,71 +27,111 @@ class PatientState(rx.State):
         """Load the user's images when the page loads."""
         auth_state = await self.get_state(AuthState)
         if auth_state.is_authenticated and auth_state.user_role == "patient":
-            self.user_images = sorted(
-                [
-                    img
-                    for img in mock_mole_images
-                    if img.patient_id == auth_state.logged_in_user_id
-                ],
-                key=lambda img: img.upload_date,
-                reverse=True,
-            )
+            self._load_images(auth_state.logged_in_user_id)
+
+    def _load_images(self, patient_id: int):
+        self.user_images = image_repository.for_patient(patient_id)
+        self.recent_user_images = []
+        self.superseded_image_ids = []
+
+    def _apply_image_changes(self, changed: list[MoleImage]):
+        """Send only new or updated images instead of re-sending the whole history."""
+        images, compacted = apply_changes(
+            IncrementalList(
+                self.user_images, self.recent_user_images, self.superseded_image_ids
+            ),
+            changed,
+            recency_key,
+        )
+        if compacted:
+            self.user_images = images.base
+        self.recent_user_images = images.recent
+        self.superseded_image_ids = images.superseded
 
     @rx.event
     async def handle_upload(self, files: list[rx.UploadFile]):
-        """Handle the upload of mole images."""
-        if not self.patient_age or not self.patient_sex:
-            yield rx.toast.error("Please fill in age and sex before uploading.")
-            return
-        if not files:
-            yield rx.toast.error("Please select at least one file to upload.")
-            return
+        """Queue uploaded mole images for background processing.
+
+        The upload queue closes the files it takes; any upload turned away here
+        is closed before returning, so its spooled temporary files go away.
+        """
+        submitted = False
+        try:
+            if not self.patient_age or not self.patient_sex:
+                yield rx.toast.error("Please fill in age and sex before uploading.")
+                return
+            try:
+                age = int(self.patient_age)
+            except ValueError:
+                age = -1
+            if not 0 <= age <= MAX_PATIENT_AGE:
+                yield rx.toast.error(
+                    f"Age must be a whole number from 0 to {MAX_PATIENT_AGE}."
+                )
+                return
+            if not files:
+                yield rx.toast.error("Please select at least one file to upload.")
+                return
+            auth_state = await self.get_state(AuthState)
+            if not auth_state.is_authenticated:
+                yield rx.toast.error("You must be logged in to upload files.")
+                return
+            try:
+                batch = upload_queue.submit(
+                    files,
+                    {
+                        "patient_id": auth_state.logged_in_user_id,
+                        "patient_name": auth_state.user_name,
+                        "age": age,
+                        "sex": self.patient_sex,
+                        "social_number": self.patient_social_number,
+                    },
+                )
+            except ValueError as e:
+                yield rx.toast.error(str(e))
+                return
+            submitted = True
+        finally:
+            if not submitted:
+                for file in files:
+                    await file.close()
+        self._upload_batch_id = batch.batch_id
+        self.upload_progress = batch.progress()
         self.is_uploading = True
-        yield
-        auth_state = await self.get_state(AuthState)
-        if not auth_state.logged_in_user:
-            self.is_uploading = False
-            yield rx.toast.error("You must be logged in to upload files.")
-            return
-        global next_image_id
-        for file in files:
-            upload_data = await file.read()
-            unique_suffix = f"{int(datetime.datetime.now().timestamp())}_{file.name}"
-            upload_dir = rx.get_upload_dir()
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            file_path = upload_dir / unique_suffix
-            with file_path.open("wb") as f:
-                f.write(upload_data)
-            ai_score = int(unique_suffix[5:7]) % 10 + 1
-            ai_notes = f"AI analysis suggests a score of {ai_score}. "
-            if ai_score > 7:
-                ai_notes += "High-risk features detected. Follow-up recommended."
-            elif ai_score > 4:
-                ai_notes += "Moderate-risk features detected. Monitoring advised."
-            else:
-                ai_notes += "Low-risk features detected. Routine check-up sufficient."
-            new_image = MoleImage(
-                id=next_image_id,
-                patient_id=auth_state.logged_in_user_id,
-                patient_name=auth_state.user_name,
-                filename=unique_suffix,
-                upload_date=datetime.datetime.now().strftime("%B %d, %Y"),
-                age=int(self.patient_age),
-                sex=self.patient_sex,
-                social_number=self.patient_social_number,
-                status="Evaluated",
-                evaluation_score=ai_score,
-                evaluation_notes=ai_notes,
-            )
-            mock_mole_images.append(new_image)
-            next_image_id += 1
-            yield
-        self.is_uploading = False
         self.patient_age = ""
         self.patient_sex = ""
         self.patient_social_number = ""
-        yield PatientState.on_load
-        yield rx.toast.success(
-            f"Successfully uploaded and analyzed {len(files)} image(s)."
-        )
-        yield rx.clear_selected_files("upload_mole_images")
\ No newline at end of file
+        yield rx.clear_selected_files("upload_mole_images")
+        yield PatientState.watch_upload_progress
+
+    @rx.event(background=True)
+    async def watch_upload_progress(self):
+        """Mirror the progress of the current upload batch into the state until it finishes."""
+        async with self:
+            batch = upload_queue.get(self._upload_batch_id)
+        if batch is None:
+            return
+        reported_stages: dict[int, str] = {}
+        while True:
+            await batch.wait_for_update()
+            done = batch.done
+            changed = []
+            for index, job in enumerate(batch.jobs):
+                if job.image is not None and reported_stages.get(index) != job.stage:
+                    reported_stages[index] = job.stage
+                    changed.append(image_repository.get(job.image.id))
+            async with self:
+                self.upload_progress = batch.progress()
+                if changed:
+                    self._apply_image_changes(changed)
+                if done:
+                    self.is_uploading = False
+            if done:
+                break
+        upload_queue.discard(batch.batch_id)
+        if batch.failed:
+            yield rx.toast.error(f"{batch.failed} image(s) could not be processed.")
+        else:
+            yield rx.toast.success(
+                f"Successfully uploaded and analyzed {len(batch.jobs)} image(s)."
+            )
\ No newline at end of file
@@ -1,6 +1,8 @@
 import reflex as rx
-from app.states.auth_state import AuthState, mock_users
+from app.states.auth_state import AuthState, user_directory
 from app.models.user import User
+from app.services.database import database
+from app.services.user_directory import hash_password_async
 
 
 class SettingsState(rx.State):
@@ -17,12 +19,9 @@ class SettingsState(rx.State):
     async def on_load(self):
         """Load user data into the form when the page loads."""
         auth_state = await self.get_state(AuthState)
-        if auth_state.logged_in_user:
+        if auth_state.is_authenticated:
             self.name = auth_state.user_name
-            if isinstance(auth_state.logged_in_user, dict):
-                self.email = auth_state.logged_in_user.get("email", "")
-            else:
-                self.email = auth_state.logged_in_user.email
+            self.email = auth_state.user_email
             self.is_editing = False
             self.success_message = ""
 
@@ -44,18 +43,23 @@ class SettingsState(rx.State):
         if self.password and self.password != self.confirm_password:
             yield rx.toast.error("Passwords do not match.")
             return
-        if any((u.email == self.email and u.id != user_id for u in mock_users)):
+        if user_directory.email_taken(self.email, exclude_id=user_id):
             yield rx.toast.error("Email is already in use by another account.")
             return
-        user_to_update = next((u for u in mock_users if u.id == user_id), None)
-        if not user_to_update:
+        user = user_directory.get(user_id)
+        if user is None:
             yield rx.toast.error("User not found in mock database.")
             return
-        user_to_update.name = self.name
-        user_to_update.email = self.email
+        changes = {"name": self.name, "email": self.email}
         if self.password:
-            user_to_update.password = self.password
-        auth_state.logged_in_user = user_to_update
+            changes["password"] = await hash_password_async(self.password)
+        try:
+            await database.run(database.save_user, user.model_copy(update=changes))
+            user_to_update = user_directory.update(user_id, **changes)
+        except ValueError:
+            yield rx.toast.error("Email is already in use by another account.")
+            return
+        auth_state._set_session(user_to_update)
         self.is_editing = False
         self.password = ""
         self.confirm_password = ""
@@ -0,0 +1,16 @@
+from app.models.mole_image import MoleImage
+
+
+def make_image(image_id: int, **fields) -> MoleImage:
+    values = dict(
+        id=image_id,
+        patient_id=1,
+        patient_name="Anna Berg",
+        filename=f"cas/{image_id}.jpg",
+        upload_date="October 18, 2026",
+        uploaded_at=float(image_id),
+        age=40,
+        sex="Female",
+    )
+    values.update(fields)
+    return MoleImage(**values)
@@ -0,0 +1,18 @@
+from reflex.state import State
+from reflex.utils.format import json_dumps
+import app.app
+from app.states.admin_state import AdminState
+from app.states.auth_state import user_directory
+
+
+def test_admin_user_list_carries_no_password_hashes():
+    root = State(_reflex_internal_init=True)
+    state = root.get_substate(AdminState.get_full_name().split(".")[1:])
+    state._load_users()
+    sent = json_dumps(state.dict())
+    assert [user.email for user in state.all_users] == [
+        user.email for user in user_directory.all()
+    ]
+    for user in user_directory.all():
+        assert user.password not in sent
+    assert "password" not in sent
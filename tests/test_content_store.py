@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import io
+import multiprocessing
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import reflex as rx
+from app.services import content_store
+from app.services.content_store import ContentStore
+from app.services.cpu_pool import CpuPool
+
+PAYLOADS = [b"same mole photo" * 1000, b"other mole photo" * 1000]
+
+
+def upload_all(upload_dir: Path, copies: int) -> list[str]:
+    store = ContentStore(upload_dir=upload_dir)
+
+    async def upload(data: bytes) -> str:
+        file = rx.UploadFile(file=io.BytesIO(data), path=Path("mole.jpg"))
+        return (await store.put(file)).name
+
+    async def main() -> list[str]:
+        return await asyncio.gather(
+            *(upload(data) for data in PAYLOADS for _ in range(copies))
+        )
+
+    return asyncio.run(main())
+
+
+def test_concurrent_uploads_from_several_processes(tmp_path):
+    ContentStore(upload_dir=tmp_path).prepare()
+    with ProcessPoolExecutor(4) as pool:
+        futures = [pool.submit(upload_all, tmp_path, 10) for _ in range(8)]
+        names = {name for future in futures for name in future.result()}
+    store = ContentStore(upload_dir=tmp_path)
+    assert len(names) == len(PAYLOADS)
+    for data in PAYLOADS:
+        name, count = store.lookup(hashlib.sha256(data).hexdigest())
+        assert count == 8 * 10
+        assert store.path(name).read_bytes() == data
+    assert not list(tmp_path.rglob("*.part"))
+
+
+def normalize_twice(upload_dir: Path, done: multiprocessing.Queue):
+    """Store normalized uploads of one hash, starting the CPU pool under its lock."""
+    pool = content_store.cpu_pool = CpuPool(max_workers=1, max_pending=4)
+    store = ContentStore(upload_dir=upload_dir, normalize=shutil.copyfile)
+
+    async def main():
+        for _ in range(2):
+            file = rx.UploadFile(file=io.BytesIO(PAYLOADS[0]), path=Path("mole.jpg"))
+            await store.put(file)
+
+    asyncio.run(main())
+    pool._executor.shutdown()
+    done.put(True)
+
+
+def test_cpu_pool_workers_do_not_keep_the_lock_file(tmp_path):
+    ContentStore(upload_dir=tmp_path).prepare()
+    done = multiprocessing.Queue()
+    worker = multiprocessing.Process(target=normalize_twice, args=(tmp_path, done))
+    worker.start()
+    try:
+        assert done.get(timeout=60)
+        worker.join()
+    finally:
+        worker.kill()
+    _, count = ContentStore(upload_dir=tmp_path).lookup(
+        hashlib.sha256(PAYLOADS[0]).hexdigest()
+    )
+    assert count == 2
@@ -0,0 +1,100 @@
+import sqlite3
+import pytest
+from app.models.mole_image import MoleImage
+from app.models.user import User
+from app.services.database import IMAGE_COLUMNS, IMAGE_INDEXES, Database, image_row
+from conftest import make_image
+
+
+def make_user(user_id: int, email: str) -> User:
+    return User(
+        id=user_id, email=email, password="hash", role="patient", name=f"User {user_id}"
+    )
+
+
+@pytest.fixture
+def url(tmp_path) -> str:
+    url = f"sqlite:///{tmp_path / 'mole.db'}"
+    Database(url).create_schema()
+    return url
+
+
+def test_flush_writes_queued_records_in_one_round_trip(url):
+    db = Database(url)
+    user = make_user(1, "anna@example.com")
+    images = [
+        make_image(1, renditions={"thumb": "derivatives/1-thumb.webp"}),
+        make_image(2),
+    ]
+    db.queue_user(user)
+    db.queue_images(images)
+    assert db.is_queued(user) and db.is_queued(images[0])
+    db.flush()
+    assert not db.is_queued(user)
+    reader = Database(url)
+    assert reader.load_users() == [user]
+    loaded = [
+        MoleImage(**dict(zip(IMAGE_COLUMNS, row))) for row in reader.load_image_rows()
+    ]
+    assert sorted(loaded, key=lambda image: image.id) == images
+
+
+def test_failed_flush_keeps_records_queued_and_newer_versions_win(url, monkeypatch):
+    db = Database(url)
+    db.queue_images([make_image(1, status="Pending")])
+
+    def fail(users, images):
+        raise sqlite3.OperationalError("database is locked")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(db, "_write", fail)
+        with pytest.raises(sqlite3.OperationalError):
+            db.flush()
+    assert db.is_queued(make_image(1))
+    db.queue_images([make_image(1, status="Evaluated", evaluation_score=40)])
+    db.flush()
+    [row] = Database(url).load_image_rows()
+    assert row[-3:] == ("Evaluated", 40, None)
+
+
+def test_save_user_rejects_a_taken_email(url):
+    db = Database(url)
+    db.save_user(make_user(1, "anna@example.com"))
+    with pytest.raises(ValueError):
+        db.save_user(make_user(2, "Anna@Example.com"))
+    db.save_user(make_user(1, "anna.berg@example.com"))
+    assert [user.email for user in Database(url).load_users()] == [
+        "anna.berg@example.com"
+    ]
+
+
+def test_load_changes_skips_the_workers_own_revisions(url):
+    first, second = Database(url), Database(url)
+    first.queue_images([make_image(1)])
+    first.flush()
+    second.queue_images([make_image(2)])
+    second.queue_user(make_user(1, "anna@example.com"))
+    second.flush()
+    revision, users, images = first.load_changes(0)
+    assert revision == first.current_revision() == 2
+    assert [user.id for user in users] == [1]
+    assert [image.id for image in images] == [2]
+    assert first.load_changes(revision) == (revision, [], [])
+    _, _, images = second.load_changes(0)
+    assert [image.id for image in images] == [1]
+
+
+def test_bulk_load_inserts_rows_and_rebuilds_the_indexes(url):
+    db = Database(url)
+    images = [make_image(image_id) for image_id in range(1, 1001)]
+    assert db.bulk_load_images(image_row(image) for image in images) == 1000
+    assert len(db.load_image_rows()) == 1000
+    assert db.allocate_ids("mole_images", 2) == range(1001, 1003)
+    with db.pool.connection() as conn:
+        indexes = {
+            name
+            for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+    assert set(IMAGE_INDEXES) <= indexes
@@ -0,0 +1,20 @@
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from app.services.derivatives import RENDITIONS, build_derivatives
+
+
+def test_concurrent_builds_of_the_same_content(tmp_path):
+    source = tmp_path / "source.jpg"
+    Image.new("RGB", (1600, 1200), (180, 120, 90)).save(source, "JPEG")
+    upload_dir = tmp_path / "uploads"
+    with ProcessPoolExecutor(4) as pool:
+        futures = [
+            pool.submit(build_derivatives, source, upload_dir, "ab" * 32)
+            for _ in range(16)
+        ]
+        results = [future.result() for future in futures]
+    assert all(result == results[0] for result in results)
+    assert sorted(results[0]) == sorted(RENDITIONS)
+    for path in results[0].values():
+        assert (upload_dir / path).stat().st_size > 0
+    assert not list(upload_dir.rglob("*.part"))
@@ -0,0 +1,82 @@
+import asyncio
+import shutil
+from reflex.event import Event
+from reflex.istate.data import RouterData
+from reflex.state import State
+from reflex.istate.manager.disk import StateManagerDisk
+from reflex.utils import prerequisites
+from app.app import app
+from app.states import doctor_state
+from app.states.doctor_state import DoctorState
+
+CLIENT_TOKEN = "doctor-watcher-test"
+WATCH = Event(
+    token=CLIENT_TOKEN, name=f"{DoctorState.get_full_name()}.watch_scored_images"
+)
+
+
+async def run_watcher(on_check=None) -> list[str]:
+    """Run the watcher until its first connection check; return the clients checked."""
+    checked = []
+
+    def connected(client_token: str) -> bool:
+        checked.append(client_token)
+        if on_check is not None:
+            on_check()
+        return False
+
+    doctor_state._client_connected = connected
+    root = await app.state_manager.get_state(WATCH.substate_token)
+    root.router = RouterData.from_router_data({"token": CLIENT_TOKEN})
+    substate, handler = root._get_event_handler(WATCH)
+    async for _ in root._process_event(handler, substate, {}):
+        pass
+    return checked
+
+
+def start_worker(monkeypatch, states_dir):
+    """A fresh worker process: its own session manager and no running watchers."""
+    monkeypatch.setattr(prerequisites, "get_states_dir", lambda: states_dir)
+    manager = StateManagerDisk(state=State, _write_debounce_seconds=0)
+    monkeypatch.setattr(app, "_state_manager", manager)
+    monkeypatch.setattr(doctor_state, "_watching_clients", set())
+    monkeypatch.setattr(doctor_state, "_client_connected", None)
+    return manager
+
+
+def test_a_client_gets_one_watcher(monkeypatch, tmp_path):
+    manager = start_worker(monkeypatch, tmp_path)
+    doctor_state._watching_clients.add(CLIENT_TOKEN)
+
+    async def watch():
+        try:
+            return await run_watcher()
+        finally:
+            await manager.close()
+
+    assert asyncio.run(watch()) == []
+
+
+def test_session_saved_mid_watch_starts_a_watcher_after_restart(monkeypatch, tmp_path):
+    saved = tmp_path / "saved"
+    restored = tmp_path / "restored"
+
+    async def crash():
+        manager = start_worker(monkeypatch, saved)
+        try:
+            checked = await run_watcher(
+                lambda: shutil.copytree(saved, restored, dirs_exist_ok=True)
+            )
+        finally:
+            await manager.close()
+        return checked
+
+    async def restart():
+        manager = start_worker(monkeypatch, restored)
+        try:
+            return await run_watcher()
+        finally:
+            await manager.close()
+
+    assert asyncio.run(crash()) == [CLIENT_TOKEN]
+    assert asyncio.run(restart()) == [CLIENT_TOKEN]
@@ -0,0 +1,87 @@
+from reflex.state import State
+from reflex.utils.format import json_dumps
+import app.app
+from app.services.image_repository import ImageRepository
+from app.services.incremental import END_ANCHOR
+from app.states import doctor_state
+from app.states.doctor_state import (
+    DoctorState,
+    WORKLIST_PAGE_SIZE,
+    WORKLIST_WINDOW_SIZE,
+)
+from conftest import make_image
+
+DELTA_CAP_BYTES = 64 * 1024
+
+
+def open_worklist(monkeypatch, count: int, **fields) -> DoctorState:
+    repository = ImageRepository()
+    for image_id in range(1, count + 1):
+        repository.add(make_image(image_id, **fields))
+    monkeypatch.setattr(doctor_state, "image_repository", repository)
+    root = State(_reflex_internal_init=True)
+    state = root.get_substate(DoctorState.get_full_name().split(".")[1:])
+    state._load_worklist()
+    return state
+
+
+def test_live_images_outside_the_window_are_not_inserted(monkeypatch):
+    state = open_worklist(monkeypatch, 100)
+    bottom = state.all_images[-1].id
+    state._insert_live([make_image(bottom - 5, status="Evaluated")])
+    assert state.recent_images == []
+    state._insert_live([make_image(101)])
+    assert [image.id for image in state.recent_images] == [101]
+    assert state.recent_anchor_ids == [state.all_images[0].id]
+
+
+def test_rescored_image_is_drawn_in_its_new_place(monkeypatch):
+    state = open_worklist(monkeypatch, 10)
+    state.sort_order = "risk"
+    state.all_images = [
+        make_image(1, evaluation_score=90),
+        make_image(2, evaluation_score=50),
+        make_image(3, evaluation_score=20),
+    ]
+    state._insert_live([make_image(3, evaluation_score=70)])
+    assert state.superseded_image_ids == [3]
+    assert state.recent_anchor_ids == [2]
+    state._insert_live([make_image(1, evaluation_score=10)])
+    assert state.recent_anchor_ids == [2, END_ANCHOR]
+
+
+def test_compaction_keeps_the_window_capped(monkeypatch):
+    state = open_worklist(monkeypatch, 100)
+    state.load_older()
+    state.load_older()
+    window = len(state.all_images)
+    state._insert_live([make_image(image_id) for image_id in range(101, 131)])
+    assert state.recent_images == []
+    assert len(state.all_images) == window
+    assert state.has_older
+    state._insert_live([make_image(131)])
+    assert len(state.all_images) + len(state.recent_images) <= window + 1
+    assert window == 3 * WORKLIST_PAGE_SIZE
+
+
+def delta_size(state: DoctorState) -> int:
+    root = state.parent_state
+    size = len(json_dumps(root.get_delta()))
+    root._clean()
+    return size
+
+
+def test_worklist_deltas_stay_capped_on_a_large_queue(monkeypatch):
+    state = open_worklist(
+        monkeypatch, 5000, evaluation_notes="Irregular border, review. " * 4
+    )
+    assert delta_size(state) < DELTA_CAP_BYTES
+    while state.has_older:
+        state.load_older()
+        assert len(state.all_images) <= WORKLIST_WINDOW_SIZE
+        assert delta_size(state) < DELTA_CAP_BYTES
+    assert state.all_images[-1].id == 1
+    while state.has_newer:
+        state.load_newer()
+        assert delta_size(state) < DELTA_CAP_BYTES
+    assert state.all_images[0].id == 5000
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from app.services.features import (
+    LesionFeatures,
+    extract_features,
+    extract_features_reference,
+)
+
+
+def lesion_batch(seed: int, size: int = 24) -> np.ndarray:
+    """Noisy skin-toned images, each with a dark blob of random shape and place."""
+    rng = np.random.default_rng(seed)
+    batch = rng.integers(150, 230, size=(4, size, size, 3), dtype=np.uint8)
+    y, x = np.mgrid[:size, :size]
+    for image in batch:
+        cy, cx = rng.uniform(6, size - 6, size=2)
+        ry, rx = rng.uniform(3, 8, size=2)
+        blob = ((y - cy) / ry) ** 2 + ((x - cx) / rx) ** 2 <= 1
+        image[blob] = rng.integers(20, 110, size=(blob.sum(), 3), dtype=np.uint8)
+    return batch
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_vectorized_features_match_the_reference(seed):
+    batch = lesion_batch(seed)
+    features = extract_features(batch)
+    for index, image in enumerate(batch):
+        expected = extract_features_reference(image)
+        for field in LesionFeatures._fields:
+            np.testing.assert_allclose(
+                getattr(features, field)[index],
+                expected[field],
+                rtol=1e-9,
+                atol=1e-12,
+                err_msg=field,
+            )
+
+
+def test_uniform_image_has_no_nan_features():
+    batch = np.full((1, 16, 16, 3), 128, dtype=np.uint8)
+    features = extract_features(batch)
+    expected = extract_features_reference(batch[0])
+    for field in LesionFeatures._fields:
+        value = getattr(features, field)[0]
+        assert not np.isnan(value).any()
+        np.testing.assert_allclose(value, expected[field], err_msg=field)
@@ -0,0 +1,24 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from app.services.database import Database
+from app.services.id_allocator import IdAllocator
+
+
+def allocate(url: str, count: int, block_size: int) -> list[int]:
+    allocator = IdAllocator("mole_images", block_size=block_size, db=Database(url))
+
+    async def main() -> list[int]:
+        return await asyncio.gather(*(allocator.next_id() for _ in range(count)))
+
+    return asyncio.run(main())
+
+
+def test_workers_never_hand_out_the_same_id(tmp_path):
+    url = f"sqlite:///{tmp_path / 'mole.db'}"
+    Database(url).create_schema()
+    with ProcessPoolExecutor(6) as pool:
+        futures = [
+            pool.submit(allocate, url, 150, block_size) for block_size in (1, 7, 32) * 2
+        ]
+        ids = [image_id for future in futures for image_id in future.result()]
+    assert len(ids) == len(set(ids)) == 900
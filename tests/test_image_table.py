@@ -0,0 +1,15 @@
+import pytest
+from app.services.image_repository import ImageRepository
+from conftest import make_image
+
+
+def test_rejected_row_leaves_table_usable():
+    repository = ImageRepository()
+    repository.add(make_image(1))
+    with pytest.raises(OverflowError):
+        repository.add(make_image(2, age=40_000))
+    table = repository._table
+    assert len(table.ids) == len(table.ages) == len(table.scores) == 1
+    repository.add(make_image(3))
+    assert [image.id for image in repository.recent()] == [3, 1]
+    assert repository.get(2) is None
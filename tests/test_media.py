@@ -0,0 +1,52 @@
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+from app.services import media
+from app.services.content_store import ContentStore
+from app.services.derivatives import derivative_name
+from app.services.media import MEDIA_ROUTE, serve_media
+
+HASH = "ab" * 32
+
+
+def media_client(tmp_path, monkeypatch) -> TestClient:
+    monkeypatch.setattr(media, "content_store", ContentStore(upload_dir=tmp_path))
+    files = {
+        f"cas/ab/ab/{HASH}.jpg": b"blob",
+        f"cas/ab/ab/{HASH}.refs": b"cas/ab/ab/x.jpg\n1\n",
+        f"cas/ab/ab/.{HASH}.refs.x1.part": b"",
+        "cas/.upload-x1.part": b"partial",
+        "cas/.locks/3.lock": b"",
+        "cas/ab/ab/notes.txt": b"mutable",
+        derivative_name(HASH, "thumb"): b"thumb",
+    }
+    for name, data in files.items():
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_bytes(data)
+    app = Starlette(
+        routes=[Route(MEDIA_ROUTE + "/{path:path}", serve_media, methods=["GET"])]
+    )
+    return TestClient(app)
+
+
+def test_only_hash_named_files_are_immutable(tmp_path, monkeypatch):
+    client = media_client(tmp_path, monkeypatch)
+    for name in (f"cas/ab/ab/{HASH}.jpg", derivative_name(HASH, "thumb")):
+        response = client.get(f"{MEDIA_ROUTE}/{name}")
+        cache_control = response.headers["cache-control"]
+        assert cache_control == "private, max-age=31536000, immutable"
+        assert response.headers["etag"].strip('"').startswith(HASH)
+    response = client.get(f"{MEDIA_ROUTE}/cas/ab/ab/notes.txt")
+    assert response.headers["cache-control"] == media.REVALIDATE_CACHE_CONTROL
+    assert "etag" not in response.headers or HASH not in response.headers["etag"]
+
+
+def test_store_bookkeeping_is_not_served(tmp_path, monkeypatch):
+    client = media_client(tmp_path, monkeypatch)
+    for name in (
+        f"cas/ab/ab/{HASH}.refs",
+        f"cas/ab/ab/.{HASH}.refs.x1.part",
+        "cas/.upload-x1.part",
+        "cas/.locks/3.lock",
+    ):
+        assert client.get(f"{MEDIA_ROUTE}/{name}").status_code == 404
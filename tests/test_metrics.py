@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+from starlette.requests import Request
+from app.services import instrumentation
+from app.services.metrics import is_debug_request
+
+
+def request_from(host: str, authorization: str = "") -> Request:
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return Request(
+        {"type": "http", "client": (host, 1234), "headers": headers, "path": "/"}
+    )
+
+
+def test_debug_routes_need_the_token_even_from_loopback():
+    assert not is_debug_request(request_from("127.0.0.1"), token="")
+    assert not is_debug_request(request_from("127.0.0.1"), token="s3cret")
+    assert not is_debug_request(
+        request_from("127.0.0.1", "Bearer wrong"), token="s3cret"
+    )
+    assert is_debug_request(
+        request_from("203.0.113.9", "Bearer s3cret"), token="s3cret"
+    )
+
+
+def test_delta_sizes_are_measured_on_sampled_events_only(monkeypatch):
+    monkeypatch.setattr(instrumentation, "HANDLER_DELTA_SAMPLE_RATE", 3)
+    monkeypatch.setattr(instrumentation, "_events", iter(range(6)))
+
+    async def process(self, event):
+        yield SimpleNamespace(delta={"state.sampled_state": {"count": 1}})
+
+    timed = instrumentation._timed_process(process)
+    event = SimpleNamespace(name="state.sampled_state.increment")
+
+    async def handle_all():
+        for _ in range(6):
+            async for _ in timed(None, event):
+                pass
+
+    asyncio.run(handle_all())
+    label = "sampled_state.increment"
+    assert instrumentation.handler_seconds._series[label][2] == 6
+    assert instrumentation.handler_delta_bytes._series[label][2] == 2
@@ -0,0 +1,46 @@
+from PIL import ExifTags, Image
+from app.services.normalize import MASTER_MAX_EDGE, normalize_image
+
+RED, BLUE = (200, 30, 30), (30, 30, 200)
+
+
+def assert_close(pixel, colour):
+    assert all(abs(a - b) <= 12 for a, b in zip(pixel, colour)), (pixel, colour)
+
+
+def test_camera_photo_is_upright_capped_and_stripped(tmp_path):
+    source, target = tmp_path / "camera.jpg", tmp_path / "master.jpg"
+    photo = Image.new("RGB", (4000, 3000), BLUE)
+    photo.paste(RED, (0, 0, 2000, 3000))
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6
+    exif[ExifTags.IFD.GPSInfo] = {
+        ExifTags.GPS.GPSLatitudeRef: "N",
+        ExifTags.GPS.GPSLatitude: (59.0, 19.0, 48.0),
+    }
+    photo.save(source, "JPEG", exif=exif)
+    with Image.open(source) as written:
+        assert written.getexif().get_ifd(ExifTags.IFD.GPSInfo)
+
+    normalize_image(source, target)
+
+    with Image.open(target) as master:
+        assert master.format == "JPEG" and master.mode == "RGB"
+        # Orientation 6 is displayed rotated 90° clockwise: the left half goes on top.
+        assert master.size == (MASTER_MAX_EDGE * 3 // 4, MASTER_MAX_EDGE)
+        assert_close(master.getpixel((master.width // 2, master.height // 4)), RED)
+        assert_close(master.getpixel((master.width // 2, master.height * 3 // 4)), BLUE)
+        assert not master.getexif()
+        assert "exif" not in master.info and "icc_profile" not in master.info
+
+
+def test_alpha_and_cmyk_uploads_become_rgb(tmp_path):
+    target = tmp_path / "master.jpg"
+    Image.new("RGBA", (300, 200), (*RED, 128)).save(tmp_path / "alpha.png")
+    Image.new("CMYK", (300, 200), (0, 255, 255, 0)).save(tmp_path / "cmyk.jpg")
+    for name in ("alpha.png", "cmyk.jpg"):
+        normalize_image(tmp_path / name, target)
+        with Image.open(target) as master:
+            assert master.mode == "RGB" and master.size == (300, 200)
+            red, green, blue = master.getpixel((150, 100))
+            assert red > 150 and green < 80 and blue < 80
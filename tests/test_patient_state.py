@@ -0,0 +1,80 @@
+import asyncio
+import tempfile
+from pathlib import Path
+import pytest
+import reflex as rx
+from reflex.state import State
+import app.app
+from app.states import patient_state
+from app.states.auth_state import AuthState
+from app.states.patient_state import PatientState
+
+
+class FakeBatch:
+    batch_id = "batch"
+
+    def progress(self):
+        return []
+
+
+class RecordingQueue:
+    def __init__(self, full: bool = False):
+        self.full = full
+        self.submitted = []
+
+    def submit(self, files, image_fields):
+        if self.full:
+            raise ValueError("Too many uploads are in progress.")
+        self.submitted.append(files)
+        return FakeBatch()
+
+
+def spooled_upload() -> rx.UploadFile:
+    file = tempfile.SpooledTemporaryFile(max_size=10)
+    file.write(b"x" * 100)
+    file.seek(0)
+    return rx.UploadFile(file=file, path=Path("mole.jpg"), size=100)
+
+
+def run_upload(monkeypatch, queue, logged_in=True, **fields) -> rx.UploadFile:
+    monkeypatch.setattr(patient_state, "upload_queue", queue)
+    root = State(_reflex_internal_init=True)
+    state = root.get_substate(PatientState.get_full_name().split(".")[1:])
+    if logged_in:
+        auth = root.get_substate(AuthState.get_full_name().split(".")[1:])
+        auth._user_id = 1
+    for field, value in fields.items():
+        setattr(state, field, value)
+    upload = spooled_upload()
+
+    async def handle():
+        async for _ in PatientState.handle_upload.fn(state, [upload]):
+            pass
+
+    asyncio.run(handle())
+    return upload
+
+
+@pytest.mark.parametrize(
+    "fields, logged_in, full",
+    [
+        ({"patient_age": "", "patient_sex": "Female"}, True, False),
+        ({"patient_age": "old", "patient_sex": "Female"}, True, False),
+        ({"patient_age": "40", "patient_sex": "Female"}, False, False),
+        ({"patient_age": "40", "patient_sex": "Female"}, True, True),
+    ],
+    ids=["missing age", "bad age", "logged out", "queue full"],
+)
+def test_rejected_upload_closes_its_files(monkeypatch, fields, logged_in, full):
+    queue = RecordingQueue(full=full)
+    upload = run_upload(monkeypatch, queue, logged_in, **fields)
+    assert upload.file.closed
+    assert queue.submitted == []
+
+
+def test_queued_upload_leaves_its_files_to_the_queue(monkeypatch):
+    queue = RecordingQueue()
+    upload = run_upload(monkeypatch, queue, patient_age="40", patient_sex="Female")
+    assert queue.submitted == [[upload]]
+    assert not upload.file.closed
+    upload.file.close()
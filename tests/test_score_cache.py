@@ -0,0 +1,30 @@
+import asyncio
+from app.services.score_cache import ScoreCache
+
+
+def test_disk_level_is_capped_and_keeps_newest(tmp_path):
+    cache = ScoreCache(
+        str(tmp_path / "scores.db"), max_memory_entries=2, max_disk_entries=10
+    )
+
+    async def fill():
+        for index in range(25):
+            await cache.put_many("v1", [(f"{index:064x}", index % 10 + 1, "notes")])
+        return [await cache.get(f"{index:064x}", "v1") for index in range(25)]
+
+    cached = asyncio.run(fill())
+    assert all(cached[index] == (index % 10 + 1, "notes") for index in range(20, 25))
+    assert cached[0] is None
+    assert cache._count(cache._connection()) <= 10
+
+
+def test_retain_model_drops_other_versions(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.db"))
+
+    async def run():
+        await cache.put_many("v1", [("a" * 64, 3, "old")])
+        await cache.put_many("v2", [("a" * 64, 5, "new")])
+        removed = await cache.retain_model("v2")
+        return removed, await cache.get("a" * 64, "v1"), await cache.get("a" * 64, "v2")
+
+    assert asyncio.run(run()) == (1, None, (5, "new"))
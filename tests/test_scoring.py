@@ -0,0 +1,104 @@
+import asyncio
+from pathlib import Path
+import pytest
+from app.models.mole_image import MoleImage
+from app.services import scoring
+from app.services.image_repository import ImageRepository
+from app.services.score_cache import ScoreCache
+from conftest import make_image
+
+
+class BrokenPool:
+    async def run(self, fn, *args):
+        raise RuntimeError("model crashed")
+
+
+def test_failed_batch_marks_images_failed(tmp_path, monkeypatch):
+    repository = ImageRepository()
+    repository.add(
+        MoleImage(
+            id=1,
+            patient_id=1,
+            patient_name="Anna Berg",
+            filename="cas/1.jpg",
+            upload_date="October 18, 2026",
+            age=40,
+            sex="Female",
+        )
+    )
+    monkeypatch.setattr(scoring, "image_repository", repository)
+    monkeypatch.setattr(scoring, "cpu_pool", BrokenPool())
+    scheduler = scoring.ScoringScheduler(
+        scoring.ReferenceScoringModel(),
+        ScoreCache(str(tmp_path / "scores.db")),
+        max_wait=0,
+    )
+
+    async def score():
+        with pytest.raises(RuntimeError):
+            await scheduler.submit(1, Path("missing.jpg"), "0" * 64)
+
+    asyncio.run(score())
+    image = repository.get(1)
+    assert image.status == "Failed"
+    assert image.evaluation_notes == scoring.SCORING_FAILED_NOTES
+
+
+class StubModel(scoring.ScoringModel):
+    model_version = "stub-1"
+
+    def score_batch(self, paths):
+        return [scoring.ScoreResult(int(path.stem) % 10 + 1, "stub") for path in paths]
+
+
+class RecordingPool:
+    """Runs batches inline, recording each batch's size and when it was dispatched."""
+
+    def __init__(self):
+        self.batches: list[tuple[int, float]] = []
+
+    async def run(self, fn, paths):
+        self.batches.append((len(paths), asyncio.get_running_loop().time()))
+        return fn(paths)
+
+
+def test_scheduler_batches_writes_back_and_answers_repeats_from_the_cache(
+    tmp_path, monkeypatch
+):
+    repository = ImageRepository()
+    for image_id in range(1, 12):
+        repository.add(make_image(image_id))
+    pool = RecordingPool()
+    monkeypatch.setattr(scoring, "image_repository", repository)
+    monkeypatch.setattr(scoring, "cpu_pool", pool)
+    max_wait = 0.5
+    scheduler = scoring.ScoringScheduler(
+        StubModel(),
+        ScoreCache(str(tmp_path / "scores.db")),
+        max_batch_size=4,
+        max_wait=max_wait,
+    )
+
+    def submit(image_id: int, content_id: int):
+        return scheduler.submit(image_id, Path(f"{image_id}.jpg"), f"{content_id:064x}")
+
+    async def score():
+        started = asyncio.get_running_loop().time()
+        results = await asyncio.gather(*(submit(i, i) for i in range(1, 11)))
+        cached = await submit(11, 3)
+        return started, results, cached
+
+    started, results, cached = asyncio.run(score())
+    assert [size for size, _ in pool.batches] == [4, 4, 2]
+    (_, second), (_, last) = pool.batches[1:]
+    assert second - started < max_wait
+    assert last - second >= max_wait * 0.9
+    for image_id, result in enumerate(results, start=1):
+        image = repository.get(image_id)
+        assert image.status == "Evaluated"
+        assert (image.evaluation_score, image.evaluation_notes) == result
+        assert result.score == image_id % 10 + 1
+    assert cached == results[2]
+    assert len(pool.batches) == 3
+    assert repository.get(11).status == "Evaluated"
+    assert repository.get(11).evaluation_score == results[2].score
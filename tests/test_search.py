@@ -0,0 +1,142 @@
+import random
+import re
+import pytest
+from app.services import image_repository as image_repository_module
+from app.services.image_repository import ORDERINGS, ImageRepository
+from app.services.image_table import IMAGE_FIELDS
+from app.services.search_index import ImageQuery
+from conftest import make_image
+
+FIRST_NAMES = ("Anna", "Anders", "Annika", "Bo", "Britt", "Erik", "Eva")
+LAST_NAMES = ("Berg", "Bergman", "Lind", "Lindqvist", "Holm")
+STATUSES = ("Pending", "Evaluated", "Failed", "Archived")
+QUERIES = [
+    ImageQuery(),
+    ImageQuery(text="ann"),
+    ImageQuery(text="an berg"),
+    ImageQuery(text="lind", sex="Male"),
+    ImageQuery(text="8501"),
+    ImageQuery(text="850101-12"),
+    ImageQuery(statuses=("Pending",)),
+    ImageQuery(statuses=("Evaluated", "Failed"), min_age=30, max_age=60),
+    ImageQuery(min_score=4, max_score=8),
+    ImageQuery(text="e", statuses=("Evaluated",), min_score=2),
+    ImageQuery(uploaded_from=20.0, uploaded_to=60.0, sex="Female"),
+    ImageQuery(text="nobody"),
+]
+
+
+def random_image(rng: random.Random, image_id: int):
+    status = rng.choice(STATUSES)
+    return make_image(
+        image_id,
+        patient_id=rng.randrange(1, 20),
+        patient_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        social_number=rng.choice(
+            (
+                None,
+                f"85{rng.randrange(1, 3):02}{rng.randrange(1, 4):02}-12{image_id:02}",
+            )
+        ),
+        uploaded_at=float(rng.randrange(100)),
+        age=rng.randrange(18, 90),
+        sex=rng.choice(("Female", "Male")),
+        status=status,
+        evaluation_score=rng.randrange(1, 11) if status == "Evaluated" else None,
+    )
+
+
+def build_repository() -> ImageRepository:
+    """Images added one by one, bulk loaded and then edited, so every index path is used."""
+    rng = random.Random(7)
+    repository = ImageRepository()
+    for image_id in range(1, 151):
+        repository.add(random_image(rng, image_id))
+    repository.load(
+        [getattr(random_image(rng, image_id), field) for field in IMAGE_FIELDS]
+        for image_id in range(151, 301)
+    )
+    for image_id in rng.sample(range(1, 301), 60):
+        edited = random_image(rng, image_id)
+        repository.update(
+            image_id,
+            patient_name=edited.patient_name,
+            social_number=edited.social_number,
+            status=edited.status,
+            evaluation_score=edited.evaluation_score,
+            age=edited.age,
+        )
+    return repository
+
+
+def brute_force(repository: ImageRepository, query: ImageQuery, order: str):
+    """Every stored image filtered field by field and sorted, without any index."""
+
+    def matches(image) -> bool:
+        if query.statuses is not None and image.status not in query.statuses:
+            return False
+        if query.sex is not None and image.sex != query.sex:
+            return False
+        if query.min_age is not None and image.age < query.min_age:
+            return False
+        if query.max_age is not None and image.age > query.max_age:
+            return False
+        if query.min_score is not None or query.max_score is not None:
+            score = image.evaluation_score
+            if score is None:
+                return False
+            if query.min_score is not None and score < query.min_score:
+                return False
+            if query.max_score is not None and score > query.max_score:
+                return False
+        if query.uploaded_from is not None and image.uploaded_at < query.uploaded_from:
+            return False
+        if query.uploaded_to is not None and image.uploaded_at > query.uploaded_to:
+            return False
+        words = image.patient_name.lower().split()
+        social = re.sub("[^0-9]", "", image.social_number or "")
+        for word in query.text.lower().split():
+            if any(char.isdigit() for char in word):
+                if not social or not social.startswith(re.sub("[^0-9]", "", word)):
+                    return False
+            elif not any(name.startswith(word) for name in words):
+                return False
+        return True
+
+    images = [repository.get(image_id) for image_id in range(1, len(repository) + 1)]
+    return sorted(filter(matches, images), key=ORDERINGS[order])
+
+
+@pytest.fixture(scope="module")
+def repository() -> ImageRepository:
+    return build_repository()
+
+
+@pytest.mark.parametrize("sort_limit", [20_000, -1], ids=["sorted", "walked"])
+@pytest.mark.parametrize("order", sorted(ORDERINGS))
+def test_search_pages_match_brute_force(repository, monkeypatch, sort_limit, order):
+    monkeypatch.setattr(image_repository_module, "SEARCH_SORT_LIMIT", sort_limit)
+    sort_key = ORDERINGS[order]
+    limit = 7
+    for query in QUERIES:
+        expected = [image.id for image in brute_force(repository, query, order)]
+        pages, cursor = [], None
+        while True:
+            page = repository.search(query, cursor, limit, order)
+            if not page:
+                break
+            pages.append([image.id for image in page])
+            cursor = sort_key(page[-1])
+        assert [image_id for page in pages for image_id in page] == expected, query
+        assert all(len(page) == limit for page in pages[:-1])
+        if not pages:
+            continue
+        back = []
+        cursor = sort_key(repository.get(pages[-1][0]))
+        while True:
+            page = repository.search(query, cursor, limit, order, before=True)
+            if not page:
+                break
+            back.append([image.id for image in page])
+            cursor = sort_key(page[0])
+        assert back == pages[-2::-1], query
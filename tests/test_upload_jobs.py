@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import io
+from pathlib import Path
+import pytest
+import reflex as rx
+from app.services import upload_jobs
+from app.services.content_store import ContentStore
+from app.services.upload_jobs import UploadQueue
+from conftest import make_image
+
+
+class InstantScoring:
+    async def submit(self, image_id, path, content_hash):
+        return None
+
+
+def upload(size: int) -> rx.UploadFile:
+    return rx.UploadFile(file=io.BytesIO(b"x" * size), path=Path("mole.jpg"), size=size)
+
+
+def test_queue_refuses_batches_past_its_byte_limit_and_expires_finished_ones(
+    monkeypatch,
+):
+    monkeypatch.setattr(upload_jobs, "scoring_scheduler", InstantScoring())
+
+    async def main():
+        queue = UploadQueue(max_queued_bytes=100)
+        stored = asyncio.Event()
+
+        async def store(job):
+            await stored.wait()
+            job.image = make_image(1)
+            job.file = None
+
+        queue._store = store
+        first = queue.submit([upload(60)], {})
+        with pytest.raises(ValueError):
+            queue.submit([upload(60)], {})
+        stored.set()
+        await asyncio.gather(*queue._tasks)
+        assert first.done and queue.queued_bytes == 0
+        queue.batch_ttl = 0
+        second = queue.submit([upload(60)], {})
+        assert queue.get(first.batch_id) is None
+        assert queue.get(second.batch_id) is second
+        await asyncio.gather(*queue._tasks)
+
+    asyncio.run(main())
+
+
+class FailingPool:
+    async def run(self, fn, *args):
+        raise OSError("derivatives failed")
+
+
+def test_failed_job_releases_its_blob_reference(monkeypatch, tmp_path):
+    store = ContentStore(upload_dir=tmp_path)
+    store.prepare()
+    monkeypatch.setattr(upload_jobs, "content_store", store)
+    monkeypatch.setattr(upload_jobs, "cpu_pool", FailingPool())
+    data = b"x" * 100
+    content_hash = hashlib.sha256(data).hexdigest()
+
+    async def main():
+        kept = await store.put(upload(100))
+        queue = UploadQueue()
+        first = queue.submit([upload(100)], {})
+        await asyncio.gather(*queue._tasks)
+        assert first.failed == 1
+        assert store.lookup(content_hash) == (kept.name, 1)
+        await asyncio.to_thread(store.release, content_hash)
+        second = queue.submit([upload(100)], {})
+        await asyncio.gather(*queue._tasks)
+        assert second.failed == 1
+        assert store.lookup(content_hash) is None
+        assert not store.path(kept.name).exists()
+
+    asyncio.run(main())
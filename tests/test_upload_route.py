@@ -0,0 +1,16 @@
+from app.app import api
+from app.states.patient_state import PatientState
+from app.services.upload_route import UPLOAD_ROUTE, upload_parameter
+
+HANDLE_UPLOAD = f"{PatientState.get_full_name()}.handle_upload"
+
+
+def test_upload_parameter_finds_the_files_argument():
+    assert upload_parameter(HANDLE_UPLOAD) == "files"
+    assert upload_parameter(f"{PatientState.get_full_name()}.on_load") is None
+    assert upload_parameter(f"{PatientState.get_full_name()}.missing") is None
+
+
+def test_streaming_route_shadows_the_reflex_upload_route():
+    paths = [getattr(route, "path", None) for route in api.routes]
+    assert UPLOAD_ROUTE in paths
@@ -0,0 +1,85 @@
+"""Import speed of the image table: bulk load against the batched write path.
+
+Writes synthetic image rows into a fresh SQLite database, once through
+`Database.bulk_load_images`, which inserts large chunks in one transaction
+with the secondary indexes rebuilt at the end, and once through the
+`queue_images` and `flush` path the workers use, then times reading the bulk
+loaded table back the way a worker does at startup.
+
+    python -m tools.bench_bulk_load --images 1000000 --flush-images 100000
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+from app.models.mole_image import MoleImage
+from app.services.database import IMAGE_COLUMNS, Database
+from tools.bench_image_store import make_rows
+
+RENDITIONS_AT = IMAGE_COLUMNS.index("renditions")
+
+
+def stored_rows(count: int) -> list[tuple]:
+    """Image rows as the table stores them, with the renditions JSON-encoded."""
+    return [
+        (
+            *row[:RENDITIONS_AT],
+            json.dumps(row[RENDITIONS_AT]),
+            *row[RENDITIONS_AT + 1 :],
+        )
+        for row in make_rows(count)
+    ]
+
+
+def fresh_database(directory: str, name: str) -> Database:
+    db = Database(f"sqlite:///{Path(directory) / name}")
+    db.create_schema()
+    return db
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=1_000_000)
+    parser.add_argument(
+        "--flush-images",
+        type=int,
+        default=100_000,
+        help="Images written through queue_images and flush.",
+    )
+    options = parser.parse_args(argv)
+    print(f"{'path':<16}{'images':>10}{'seconds':>10}{'images/s':>12}")
+
+    def report(label: str, count: int, seconds: float):
+        print(f"{label:<16}{count:>10}{seconds:>10.2f}{count / seconds:>12.0f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        images = [
+            MoleImage(**dict(zip(IMAGE_COLUMNS, row)))
+            for row in make_rows(options.flush_images)
+        ]
+        db = fresh_database(directory, "flush.db")
+        started = time.perf_counter()
+        db.queue_images(images)
+        db.flush()
+        report("queue and flush", len(images), time.perf_counter() - started)
+        del images
+
+        rows = stored_rows(options.images)
+        db = fresh_database(directory, "bulk.db")
+        started = time.perf_counter()
+        count = db.bulk_load_images(rows)
+        report("bulk load", count, time.perf_counter() - started)
+        del rows
+
+        started = time.perf_counter()
+        count = len(db.load_image_rows())
+        report("read back", count, time.perf_counter() - started)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Memory per record and bulk-load time of the image store.
+
+Builds the same synthetic corpus, in the row format the database returns,
+as the list of validated MoleImage models the repository used to hold, as a
+bare columnar ImageTable, and through `ImageRepository.load`, which also
+builds the worklist, triage and search indexes. Memory is what stays
+allocated once the input rows are gone; times come from a separate run
+without allocation tracing.
+
+    python -m tools.bench_image_store --images 100000
+"""
+
+import argparse
+import gc
+import hashlib
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+from app.models.mole_image import MoleImage
+from app.services.database import IMAGE_COLUMNS
+from app.services.derivatives import RENDITIONS, derivative_name
+from app.services.image_repository import ImageRepository
+from app.services.image_table import ImageTable
+
+NOTES = (
+    "",
+    "Low risk. Routine follow-up.",
+    "Irregular border, review recommended.",
+    "Asymmetric pigmentation, refer to a dermatologist.",
+)
+
+
+def make_rows(count: int, seed: int = 0) -> list[tuple]:
+    """Image rows in IMAGE_COLUMNS order, about ten images per patient."""
+    rng = random.Random(seed)
+    rows = []
+    for image_id in range(1, count + 1):
+        patient_id = rng.randint(1, max(1, count // 10))
+        content_hash = hashlib.sha256(image_id.to_bytes(8, "big")).hexdigest()
+        uploaded_at = 1_700_000_000 + image_id * 60.0
+        scored = rng.random() < 0.8
+        rows.append(
+            (
+                image_id,
+                patient_id,
+                f"Patient {patient_id}",
+                f"cas/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.jpg",
+                f"IMG_{image_id:06d}.jpg",
+                content_hash,
+                {name: derivative_name(content_hash, name) for name in RENDITIONS},
+                time.strftime("%B %d, %Y", time.gmtime(uploaded_at)),
+                uploaded_at,
+                rng.randint(18, 90),
+                rng.choice(("Male", "Female")),
+                f"{patient_id:09d}",
+                "Evaluated" if scored else "Pending",
+                rng.randint(0, 100) if scored else None,
+                rng.choice(NOTES) if scored else "",
+            )
+        )
+    return rows
+
+
+def load_models(rows: list[tuple]) -> list[MoleImage]:
+    return [MoleImage(**dict(zip(IMAGE_COLUMNS, row))) for row in rows]
+
+
+def load_table(rows: list[tuple]) -> ImageTable:
+    table = ImageTable()
+    table.extend(rows)
+    return table
+
+
+def load_repository(rows: list[tuple]) -> ImageRepository:
+    repository = ImageRepository()
+    repository.load(rows, IMAGE_COLUMNS)
+    return repository
+
+
+def measure(build: Callable[[list[tuple]], object], count: int) -> tuple[float, int]:
+    """Seconds to build the store and bytes it keeps once its input is dropped."""
+    rows = make_rows(count)
+    gc.collect()
+    started = time.perf_counter()
+    store = build(rows)
+    seconds = time.perf_counter() - started
+    del rows, store
+    gc.collect()
+    tracemalloc.start()
+    rows = make_rows(count)
+    store = build(rows)
+    del rows
+    gc.collect()
+    kept = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return seconds, kept
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=100_000)
+    options = parser.parse_args(argv)
+    print(f"{'store':<20}{'load s':>10}{'MiB':>10}{'bytes/image':>13}")
+    for label, build in (
+        ("list of models", load_models),
+        ("columnar table", load_table),
+        ("table and indexes", load_repository),
+    ):
+        seconds, kept = measure(build, options.images)
+        print(
+            f"{label:<20}{seconds:>10.2f}{kept / 2**20:>10.1f}"
+            f"{kept / options.images:>13.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Login throughput against the number of user accounts.
+
+Compares the old login path, a scan over every user with a plaintext
+password comparison, with the email-indexed UserDirectory, and measures how
+many full `authenticate` calls (PBKDF2 included, on worker threads) finish per
+second as the account count grows.
+
+    python -m tools.bench_login --users 1000,10000,100000
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from typing import Optional
+from app.models.user import User
+from app.services.user_directory import (
+    PASSWORD_HASH_ITERATIONS,
+    UserDirectory,
+    hash_password,
+)
+
+PASSWORD = "password"
+
+
+def make_users(count: int, password: str) -> list[User]:
+    return [
+        User(
+            id=user_id,
+            email=f"patient{user_id}@example.com",
+            password=password,
+            role="patient",
+            name=f"Patient {user_id}",
+        )
+        for user_id in range(1, count + 1)
+    ]
+
+
+def scan_login(users: list[User], email: str, password: str) -> Optional[User]:
+    """The login loop this directory replaced."""
+    for user in users:
+        if user.email == email and user.password == password:
+            return user
+    return None
+
+
+def time_per_call(fn, emails: list[str]) -> float:
+    started = time.perf_counter()
+    for email in emails:
+        fn(email)
+    return (time.perf_counter() - started) / len(emails)
+
+
+async def logins_per_second(
+    directory: UserDirectory, emails: list[str], concurrency: int
+) -> float:
+    pending = iter(emails)
+
+    async def worker():
+        for email in pending:
+            assert await directory.authenticate(email, PASSWORD) is not None
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return len(emails) / (time.perf_counter() - started)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--users",
+        default="1000,10000,100000",
+        help="Comma-separated account counts to measure.",
+    )
+    parser.add_argument(
+        "--lookups", type=int, default=200, help="Email lookups per measurement."
+    )
+    parser.add_argument(
+        "--logins", type=int, default=64, help="Full logins per measurement."
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Logins in flight at once."
+    )
+    parser.add_argument("--iterations", type=int, default=PASSWORD_HASH_ITERATIONS)
+    options = parser.parse_args(argv)
+    encoded = hash_password(PASSWORD, options.iterations)
+    print(f"{'users':>9}{'scan us':>12}{'index us':>12}{'speedup':>10}{'logins/s':>11}")
+    for count in (int(value) for value in options.users.split(",")):
+        plain_users = make_users(count, PASSWORD)
+        directory = UserDirectory(make_users(count, encoded))
+        emails = [
+            f"patient{random.randint(1, count)}@example.com"
+            for _ in range(options.lookups)
+        ]
+        scan = time_per_call(
+            lambda email: scan_login(plain_users, email, PASSWORD), emails
+        )
+        index = time_per_call(directory.find_by_email, emails)
+        throughput = asyncio.run(
+            logins_per_second(directory, emails[: options.logins], options.concurrency)
+        )
+        print(
+            f"{count:>9}{scan * 1e6:>12.1f}{index * 1e6:>12.2f}"
+            f"{scan / index:>9.0f}x{throughput:>11.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Repeat-view bandwidth of uploaded images, before and after the media route.
+
+Uploads a few photos as a patient against a running backend, then views
+each of them repeatedly through a small browser-like HTTP cache: fresh
+entries skip the network and stale ones are revalidated with their ETag or
+Last-Modified. The same images are viewed through Reflex's `/_upload` static
+files, which the dashboards used before, and through the `/media` route.
+
+    reflex run --env prod --backend-only
+    python -m tools.bench_media --url http://localhost:8000 --images 5 --views 20
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+from typing import Optional
+import httpx
+from reflex.constants import Endpoint
+from app.services.media import MEDIA_ROUTE
+from tools.loadtest import (
+    PATIENT_STATE,
+    EventClient,
+    LatencyRecorder,
+    login,
+    noise_image,
+)
+
+UPLOAD_WAIT = 60.0
+
+
+class BrowserCache:
+    """Just enough of a browser cache: fresh entries are reused, stale ones revalidated."""
+
+    def __init__(self, http: httpx.AsyncClient):
+        self.http = http
+        self.entries: dict[str, dict] = {}
+        self.requests = 0
+        self.bytes = 0
+
+    async def view(self, url: str):
+        entry = self.entries.get(url)
+        if entry is not None and entry["fresh_until"] > time.monotonic():
+            return
+        headers = {}
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        elif entry is not None and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        response = await self.http.get(url, headers=headers)
+        self.requests += 1
+        self.bytes += len(response.content) + sum(
+            len(name) + len(value) + 4 for name, value in response.headers.items()
+        )
+        if response.status_code == 304 and entry is not None:
+            entry["fresh_until"] = self._fresh_until(response)
+        elif response.status_code == 200:
+            self.entries[url] = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "fresh_until": self._fresh_until(response),
+            }
+        else:
+            raise RuntimeError(f"GET {url} returned {response.status_code}.")
+
+    def _fresh_until(self, response: httpx.Response) -> float:
+        cache_control = response.headers.get("cache-control", "")
+        for directive in cache_control.split(","):
+            name, _, value = directive.strip().partition("=")
+            if name == "max-age" and "no-cache" not in cache_control:
+                return time.monotonic() + int(value)
+        return 0.0
+
+
+async def upload_images(url: str, count: int, size: int) -> list[str]:
+    """Upload `count` photos as the demo patient and return their stored file names."""
+    client = EventClient(url, LatencyRecorder())
+    await client.connect()
+    try:
+        await login(client, "patient")
+        await client.call(f"{PATIENT_STATE}.on_load")
+        await client.call(f"{PATIENT_STATE}.set_patient_age", value="40")
+        await client.call(f"{PATIENT_STATE}.set_patient_sex", value="Female")
+        files = [
+            (f"mole-{uuid.uuid4().hex[:8]}.png", noise_image(size))
+            for _ in range(count)
+        ]
+        await client.upload(f"{PATIENT_STATE}.handle_upload", files)
+        names = {name for name, _ in files}
+        deadline = time.monotonic() + UPLOAD_WAIT
+        while time.monotonic() < deadline:
+            images = client.get(PATIENT_STATE, "user_images", []) + client.get(
+                PATIENT_STATE, "recent_user_images", []
+            )
+            stored = [
+                image["filename"]
+                for image in images
+                if image["original_filename"] in names
+            ]
+            if len(set(stored)) == count:
+                return sorted(set(stored))
+            await asyncio.sleep(0.2)
+        raise RuntimeError("Uploaded images did not show up in time.")
+    finally:
+        await client.close()
+
+
+async def run(options: argparse.Namespace):
+    names = await upload_images(options.url, options.images, options.size * 1024)
+    routes = {
+        "/_upload (before)": str(Endpoint.UPLOAD),
+        "/media (after)": MEDIA_ROUTE,
+    }
+    print(f"{'route':<20}{'first KiB':>10}{'requests':>10}{'KiB':>10}{'KiB/view':>10}")
+    for label, route in routes.items():
+        async with httpx.AsyncClient(base_url=options.url.rstrip("/")) as http:
+            cache = BrowserCache(http)
+            for name in names:
+                await cache.view(f"{route}/{name}")
+            first_load = cache.bytes
+            cache.requests = cache.bytes = 0
+            for _ in range(options.views):
+                for name in names:
+                    await cache.view(f"{route}/{name}")
+        views = options.views * len(names)
+        print(
+            f"{label:<20}{first_load / 1024:>10.1f}{cache.requests:>10}"
+            f"{cache.bytes / 1024:>10.1f}"
+            f"{cache.bytes / 1024 / views:>10.2f}"
+        )
+    print(f"\n{options.views} repeat views of {len(names)} images after a first load")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend URL.")
+    parser.add_argument("--images", type=int, default=5)
+    parser.add_argument("--views", type=int, default=20, help="Repeat views per image.")
+    parser.add_argument("--size", type=int, default=512, help="KiB per uploaded image.")
+    options = parser.parse_args(argv)
+    asyncio.run(run(options))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
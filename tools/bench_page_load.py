@@ -0,0 +1,88 @@
+"""Handlers and wall time per index page load, by role.
+
+Replays the index page's load events against a running backend the way the
+browser sends them: first the old `on_load` list, which ran the patient,
+doctor and admin loaders on every visit, then the single role-dispatching
+`IndexState.on_load`. Events the loaders chain are followed, as the browser
+would.
+
+    reflex run --env prod --backend-only
+    python -m tools.bench_page_load --url http://localhost:8000 --loads 50
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Optional
+from tools.loadtest import (
+    ADMIN_STATE,
+    DOCTOR_STATE,
+    PATIENT_STATE,
+    ROLES,
+    STATE_PREFIX,
+    EventClient,
+    LatencyRecorder,
+    login,
+    percentile,
+)
+
+INDEX_STATE = STATE_PREFIX + "app___states___index_state____index_state"
+DISPATCHES = {
+    "all loaders": [
+        f"{PATIENT_STATE}.on_load",
+        f"{DOCTOR_STATE}.on_load",
+        f"{ADMIN_STATE}.on_load",
+    ],
+    "role dispatch": [f"{INDEX_STATE}.on_load"],
+}
+
+
+async def measure(url: str, role: str, handlers: list[str], loads: int) -> dict:
+    recorder = LatencyRecorder()
+    client = EventClient(url, recorder)
+    await client.connect()
+    try:
+        await login(client, role)
+        recorder.latencies.clear()
+        durations = []
+        for _ in range(loads):
+            started = time.perf_counter()
+            for handler in handlers:
+                await client.call(handler)
+            durations.append(time.perf_counter() - started)
+    finally:
+        await client.close()
+    durations.sort()
+    handled = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "handlers": handled / loads,
+        "p50_ms": percentile(durations, 50) * 1000,
+        "p95_ms": percentile(durations, 95) * 1000,
+    }
+
+
+async def run(options: argparse.Namespace):
+    print(f"{'role':<10}{'loader':<16}{'handlers':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for role in ROLES:
+        for name, handlers in DISPATCHES.items():
+            row = await measure(options.url, role, handlers, options.loads)
+            print(
+                f"{role:<10}{name:<16}{row['handlers']:>10.1f}"
+                f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+            )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend URL.")
+    parser.add_argument(
+        "--loads", type=int, default=50, help="Page loads per role and loader."
+    )
+    options = parser.parse_args(argv)
+    asyncio.run(run(options))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
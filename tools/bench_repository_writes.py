@@ -0,0 +1,56 @@
+"""Cost of single-image writes to a large image repository.
+
+Bulk loads a synthetic corpus, then times adding new uploads, which sort
+first in the worklist indexes, and scoring them, which moves their keys from
+the Pending to the Evaluated status and risk indexes. Each write inserts
+into sorted lists with `bisect.insort`, which is linear in the list length.
+
+    python -m tools.bench_repository_writes --images 1000000
+"""
+
+import argparse
+import sys
+import time
+from typing import Optional
+from app.models.mole_image import MoleImage
+from app.services.database import IMAGE_COLUMNS
+from tools.bench_image_store import load_repository, make_rows
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=1_000_000)
+    parser.add_argument("--writes", type=int, default=2_000)
+    options = parser.parse_args(argv)
+    rows = make_rows(options.images + options.writes)
+    repository = load_repository(rows[: options.images])
+    new_images = [
+        MoleImage(
+            **{
+                **dict(zip(IMAGE_COLUMNS, row)),
+                "status": "Pending",
+                "evaluation_score": None,
+            }
+        )
+        for row in rows[options.images :]
+    ]
+    del rows
+    print(f"{'write':<10}{'count':>8}{'us/write':>10}")
+
+    started = time.perf_counter()
+    for image in new_images:
+        repository.add(image)
+    seconds = time.perf_counter() - started
+    print(f"{'add':<10}{len(new_images):>8}{seconds / len(new_images) * 1e6:>10.0f}")
+
+    started = time.perf_counter()
+    for image in new_images:
+        repository.update(image.id, status="Evaluated", evaluation_score=50)
+    seconds = time.perf_counter() - started
+    print(f"{'score':<10}{len(new_images):>8}{seconds / len(new_images) * 1e6:>10.0f}")
+    print(f"\non a repository of {options.images} images")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
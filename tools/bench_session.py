@@ -0,0 +1,104 @@
+"""Per-event cost of computing the session identity.
+
+The old AuthState kept the logged-in User and its `user_role`,
+`logged_in_user_id` and `user_name` vars re-ran `User.model_validate` whenever
+the user had come back from the state store as a dict. The current vars
+return cached primitives. Both sets of getters are timed directly on real
+state instances, so the Reflex var machinery around them, which is the same
+either way, is left out.
+
+    python -m tools.bench_session --reads 8
+"""
+
+import argparse
+import sys
+import time
+from typing import Optional
+import reflex as rx
+from reflex.state import State
+import app.app
+from app.models.user import User
+from app.states.auth_state import AuthState, user_directory
+
+IDENTITY_VARS = ("user_role", "logged_in_user_id", "user_name")
+
+
+class LegacyAuthState(rx.State):
+    """The session storage AuthState used before identity was cached."""
+
+    logged_in_user: Optional[User] = None
+
+
+def legacy_user_role(self) -> str:
+    if self.logged_in_user is None:
+        return ""
+    if isinstance(self.logged_in_user, dict):
+        user_obj = User.model_validate(self.logged_in_user)
+        return user_obj.role
+    return self.logged_in_user.role
+
+
+def legacy_logged_in_user_id(self) -> int:
+    if self.logged_in_user is None:
+        return -1
+    if isinstance(self.logged_in_user, dict):
+        user_obj = User.model_validate(self.logged_in_user)
+        return user_obj.id
+    return self.logged_in_user.id
+
+
+def legacy_user_name(self) -> str:
+    if self.logged_in_user is None:
+        return ""
+    if isinstance(self.logged_in_user, dict):
+        user_obj = User.model_validate(self.logged_in_user)
+        return user_obj.name
+    return self.logged_in_user.name
+
+
+def time_per_event(state, getters, reads: int, events: int) -> float:
+    calls = [getters[read % len(getters)] for read in range(reads)]
+    started = time.perf_counter()
+    for _ in range(events):
+        for getter in calls:
+            getter(state)
+    return (time.perf_counter() - started) / events
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--reads",
+        type=int,
+        default=8,
+        help="Identity reads per event; a dashboard load does about eight.",
+    )
+    parser.add_argument("--events", type=int, default=20000)
+    options = parser.parse_args(argv)
+    user = user_directory.all()[0]
+    root = State(_reflex_internal_init=True)
+    legacy_state = root.get_substate(LegacyAuthState.get_full_name().split(".")[1:])
+    legacy_state.logged_in_user = user.model_dump()
+    auth_state = root.get_substate(AuthState.get_full_name().split(".")[1:])
+    auth_state._set_session(user)
+    before = time_per_event(
+        legacy_state,
+        (legacy_user_role, legacy_logged_in_user_id, legacy_user_name),
+        options.reads,
+        options.events,
+    )
+    after = time_per_event(
+        auth_state,
+        [AuthState.computed_vars[name].fget for name in IDENTITY_VARS],
+        options.reads,
+        options.events,
+    )
+    print(f"{'session':<22}{'us/event':>10}")
+    print(f"{'validated dict':<22}{before * 1e6:>10.2f}")
+    print(f"{'cached primitives':<22}{after * 1e6:>10.2f}")
+    print(f"\n{(before - after) * 1e6:.2f} us saved per event ({before / after:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Event-loop lag while a batch of uploads is stored, rendered and scored.
+
+Pushes a batch of photo-sized JPEGs through UploadQueue, with the content
+store, image ids and score cache in a temporary directory, while
+LoopLagMonitor samples the loop. The batch runs once with normalization,
+derivatives and scoring in the CPU pool and once with the same work run
+inline on the event loop, as the upload handler did before the pool.
+
+    python -m tools.bench_upload_lag --files 5
+"""
+
+import argparse
+import asyncio
+import io
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+import numpy as np
+import reflex as rx
+from PIL import Image
+from app.services import content_store as content_store_module
+from app.services import scoring, upload_jobs
+from app.services.content_store import ContentStore
+from app.services.cpu_pool import CPU_POOL_WORKERS, CpuPool, LoopLagMonitor
+from app.services.database import Database
+from app.services.id_allocator import IdAllocator
+from app.services.image_repository import ImageRepository
+from app.services.normalize import MASTER_EXTENSION, normalize_image
+from app.services.score_cache import ScoreCache
+from app.services.scoring import ScoringScheduler, default_model
+from app.services.upload_jobs import UploadQueue
+
+IMAGE_FIELDS = {
+    "patient_id": 1,
+    "patient_name": "Bench Patient",
+    "age": 40,
+    "sex": "Female",
+}
+
+
+class InlinePool:
+    """Runs CPU-bound work directly on the event loop, like the code before CpuPool."""
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return fn(*args)
+
+
+def photo(width: int, height: int) -> bytes:
+    """A JPEG of smooth random colour, different on every call."""
+    rng = np.random.default_rng()
+    small = rng.integers(0, 256, (height // 50, width // 50, 3), np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(small).resize((width, height), Image.BICUBIC).save(
+        buffer, "JPEG", quality=90
+    )
+    return buffer.getvalue()
+
+
+def use_pipeline(directory: Path, pool):
+    """Point the upload pipeline's singletons at a fresh store in `directory` and `pool`."""
+    store = ContentStore(
+        upload_dir=directory / "uploads",
+        normalize=normalize_image,
+        normalized_extension=MASTER_EXTENSION,
+    )
+    store.prepare()
+    database = Database(f"sqlite:///{directory / 'mole.db'}")
+    database.create_schema()
+    upload_jobs.content_store = store
+    upload_jobs.image_ids = IdAllocator("mole_images", db=database)
+    upload_jobs.image_repository = scoring.image_repository = ImageRepository()
+    upload_jobs.scoring_scheduler = ScoringScheduler(
+        default_model(), ScoreCache(path=str(directory / "score_cache.db"))
+    )
+    for module in (content_store_module, upload_jobs, scoring):
+        module.cpu_pool = pool
+
+
+async def upload_batch(files: list[bytes], interval: float) -> dict[str, float]:
+    """Process one batch while sampling loop lag; returns seconds and lag in ms."""
+    monitor = LoopLagMonitor(interval=interval, window=1_000_000)
+    sampler = asyncio.create_task(monitor.run())
+    started = time.perf_counter()
+    batch = UploadQueue().submit(
+        [
+            rx.UploadFile(
+                file=io.BytesIO(data), path=Path(f"mole-{index}.jpg"), size=len(data)
+            )
+            for index, data in enumerate(files)
+        ],
+        IMAGE_FIELDS,
+    )
+    while not batch.done:
+        await batch.wait_for_update()
+    seconds = time.perf_counter() - started
+    sampler.cancel()
+    if batch.failed:
+        raise RuntimeError(f"{batch.failed} file(s) failed processing.")
+    lag = monitor.snapshot()
+    return {
+        "seconds": seconds,
+        "p50_ms": lag["p50"] * 1000,
+        "p99_ms": lag["p99"] * 1000,
+        "max_ms": lag["max"] * 1000,
+    }
+
+
+def measure(pool, options: argparse.Namespace) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        use_pipeline(Path(directory), pool)
+
+        async def main() -> dict[str, float]:
+            await upload_batch([photo(options.width, options.height)], options.interval)
+            files = [photo(options.width, options.height) for _ in range(options.files)]
+            return await upload_batch(files, options.interval)
+
+        try:
+            return asyncio.run(main())
+        finally:
+            if isinstance(pool, CpuPool):
+                pool.shutdown()
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=5, help="Files per upload.")
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument(
+        "--interval", type=float, default=0.01, help="Lag sampling interval in s."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=CPU_POOL_WORKERS, help="CPU pool workers."
+    )
+    options = parser.parse_args(argv)
+    logging.getLogger("app.services.cpu_pool").setLevel(logging.ERROR)
+    print(f"{'pipeline':<14}{'upload s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, pool in (
+        ("on the loop", InlinePool()),
+        ("CPU pool", CpuPool(options.workers, 4 * options.workers)),
+    ):
+        row = measure(pool, options)
+        print(
+            f"{label:<14}{row['seconds']:>10.2f}{row['p50_ms']:>10.1f}"
+            f"{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    print(
+        f"\n{options.files} files of {options.width}x{options.height}, "
+        f"lag sampled every {options.interval * 1000:.0f} ms"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
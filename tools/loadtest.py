@@ -0,0 +1,401 @@
+"""Headless load generator that drives the app's real event handlers.
+
+Simulated patients, doctors and admins each open their own Socket.IO
+connection to the backend, exactly like a browser tab, and send the same
+events the frontend sends. Uploads go through the `/_upload` endpoint, which
+returns once the files are queued; the `upload end to end` row times each
+upload from its request until every file is scored or failed, following the
+`upload_progress` updates the patient's page receives.
+
+    reflex run --env prod --backend-only
+    python -m tools.loadtest --url http://localhost:8000 --users 30 --duration 60
+
+Needs the Socket.IO asyncio client: `pip install "python-socketio[asyncio-client]"`.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import sys
+import time
+import uuid
+from typing import Any, Callable, Optional
+import httpx
+import numpy as np
+import socketio
+from PIL import Image
+from reflex.constants import Endpoint
+
+STATE_PREFIX = "reflex___state____state."
+AUTH_STATE = STATE_PREFIX + "app___states___auth_state____auth_state"
+PATIENT_STATE = STATE_PREFIX + "app___states___patient_state____patient_state"
+DOCTOR_STATE = STATE_PREFIX + "app___states___doctor_state____doctor_state"
+ADMIN_STATE = STATE_PREFIX + "app___states___admin_state____admin_state"
+ROLES = ("patient", "doctor", "admin")
+DEFAULT_MIX = "patient=6,doctor=3,admin=1"
+ACCOUNT_PASSWORD = "password"
+EVENT_TIMEOUT = 60.0
+EVENT_NAMESPACE = str(Endpoint.EVENT)
+UPLOAD_METRIC = "upload end to end"
+FINISHED_STAGES = ("scored", "failed")
+
+
+class LatencyRecorder:
+    """Collects per-handler latencies and failures for the final report."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def record(self, handler: str, seconds: float):
+        self.latencies.setdefault(handler, []).append(seconds)
+
+    def fail(self, handler: str):
+        self.errors[handler] = self.errors.get(handler, 0) + 1
+
+    def report(self, elapsed: float) -> list[dict[str, Any]]:
+        rows = []
+        for handler in sorted(set(self.latencies) | set(self.errors)):
+            samples = sorted(self.latencies.get(handler, []))
+            rows.append(
+                {
+                    "handler": handler,
+                    "count": len(samples),
+                    "errors": self.errors.get(handler, 0),
+                    "throughput": len(samples) / elapsed if elapsed else 0.0,
+                    "p50_ms": percentile(samples, 50) * 1000,
+                    "p95_ms": percentile(samples, 95) * 1000,
+                    "p99_ms": percentile(samples, 99) * 1000,
+                }
+            )
+        return rows
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    if not samples:
+        return 0.0
+    rank = max(0, min(len(samples) - 1, round(pct / 100 * len(samples)) - 1))
+    return samples[rank]
+
+
+def short_name(handler: str) -> str:
+    """`PatientState.handle_upload` style name of a fully qualified handler."""
+    state, _, method = handler.rpartition(".")
+    state = state.rpartition(".")[2].rpartition("____")[2]
+    return "".join(part.title() for part in state.split("_")) + "." + method
+
+
+def noise_image(size: int) -> bytes:
+    """A PNG of random pixels, about `size` bytes and different on every call."""
+    side = max(8, int((size / 3) ** 0.5))
+    pixels = np.random.default_rng().integers(0, 256, (side, side, 3), np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+class EventClient:
+    """One simulated browser tab: a client token, a socket and the merged state."""
+
+    def __init__(self, url: str, recorder: LatencyRecorder):
+        self.url = url.rstrip("/")
+        self.recorder = recorder
+        self.token = str(uuid.uuid4())
+        self.state: dict[str, dict[str, Any]] = {}
+        self._sio = socketio.AsyncClient(reconnection=False)
+        self._sio.on("event", self._on_update, namespace=EVENT_NAMESPACE)
+        self._final: Optional[asyncio.Future] = None
+        self._chained: list[dict[str, Any]] = []
+        self._updated = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._http = httpx.AsyncClient(base_url=self.url, timeout=EVENT_TIMEOUT)
+
+    async def connect(self):
+        await self._sio.connect(
+            f"{self.url}?token={self.token}",
+            socketio_path=EVENT_NAMESPACE,
+            namespaces=[EVENT_NAMESPACE],
+            transports=["websocket"],
+        )
+
+    async def close(self):
+        await self._sio.disconnect()
+        await self._http.aclose()
+
+    def get(self, state: str, var: str, default: Any = None) -> Any:
+        values = self.state.get(state, {})
+        for key in (var, f"{var}_rx_state_"):
+            if key in values:
+                return values[key]
+        return default
+
+    async def wait_for(self, predicate: Callable[[], bool], timeout: float):
+        """Wait until `predicate` holds for the merged state, up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self._updated.clear()
+            if predicate():
+                return
+            await asyncio.wait_for(
+                self._updated.wait(), max(0.0, deadline - time.monotonic())
+            )
+
+    async def call(self, handler: str, **payload: Any):
+        """Send an event and wait for its final update, then run the events it chains."""
+        async with self._lock:
+            self._final = asyncio.get_running_loop().create_future()
+            self._chained = []
+            started = time.perf_counter()
+            try:
+                await self._sio.emit(
+                    "event",
+                    {
+                        "token": self.token,
+                        "name": handler,
+                        "router_data": {"pathname": "/", "query": {}, "asPath": "/"},
+                        "payload": payload,
+                    },
+                    namespace=EVENT_NAMESPACE,
+                )
+                events = await asyncio.wait_for(self._final, EVENT_TIMEOUT)
+            except Exception:
+                self.recorder.fail(short_name(handler))
+                raise
+            self.recorder.record(short_name(handler), time.perf_counter() - started)
+        await self._run_chained(events)
+
+    async def upload(self, handler: str, files: list[tuple[str, bytes]]):
+        """Post files to an upload handler and wait for its streamed updates to end."""
+        started = time.perf_counter()
+        events = []
+        try:
+            async with self._http.stream(
+                "POST",
+                str(Endpoint.UPLOAD),
+                files=[("files", (name, data)) for name, data in files],
+                headers={
+                    "reflex-client-token": self.token,
+                    "reflex-event-handler": handler,
+                },
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        events.extend(self._merge(json.loads(line)))
+        except Exception:
+            self.recorder.fail(short_name(handler))
+            raise
+        self.recorder.record(short_name(handler), time.perf_counter() - started)
+        await self._run_chained(events)
+
+    async def _run_chained(self, events: list[dict[str, Any]]):
+        for event in events:
+            if "." in event.get("name", ""):
+                await self.call(event["name"], **event.get("payload", {}))
+
+    def _merge(self, update: dict[str, Any]) -> list[dict[str, Any]]:
+        for state, values in update.get("delta", {}).items():
+            self.state.setdefault(state, {}).update(values)
+        return update.get("events", [])
+
+    async def _on_update(self, update: Any):
+        if isinstance(update, str):
+            update = json.loads(update)
+        self._chained.extend(self._merge(update))
+        self._updated.set()
+        if update.get("final") is True and self._final and not self._final.done():
+            self._final.set_result(self._chained)
+
+
+async def login(client: EventClient, role: str):
+    await client.call(
+        f"{AUTH_STATE}.login",
+        form_data={"email": f"{role}@example.com", "password": ACCOUNT_PASSWORD},
+    )
+    if not client.get(AUTH_STATE, "is_authenticated"):
+        raise RuntimeError(f"Logging in as {role} failed.")
+
+
+async def patient_iteration(client: EventClient, options: argparse.Namespace):
+    await client.call(
+        f"{PATIENT_STATE}.set_patient_age", value=str(random.randint(18, 90))
+    )
+    await client.call(
+        f"{PATIENT_STATE}.set_patient_sex", value=random.choice(["Male", "Female"])
+    )
+    files = [
+        (
+            f"mole-{uuid.uuid4().hex[:8]}.png",
+            await asyncio.to_thread(noise_image, options.upload_size * 1024),
+        )
+        for _ in range(options.files_per_upload)
+    ]
+    started = time.perf_counter()
+    await client.upload(f"{PATIENT_STATE}.handle_upload", files)
+    await follow_upload(client, [name for name, _ in files], started)
+
+
+async def follow_upload(client: EventClient, names: list[str], started: float):
+    """Record the time from `started` until every uploaded file is scored or failed."""
+
+    def progress() -> list[dict[str, Any]]:
+        return client.get(PATIENT_STATE, "upload_progress", [])
+
+    def finished() -> bool:
+        files = progress()
+        return sorted(file["name"] for file in files) == sorted(names) and all(
+            file["stage"] in FINISHED_STAGES for file in files
+        )
+
+    try:
+        await client.wait_for(finished, EVENT_TIMEOUT)
+    except asyncio.TimeoutError:
+        client.recorder.fail(UPLOAD_METRIC)
+        raise RuntimeError("Upload did not finish processing in time.") from None
+    if any(file["stage"] == "failed" for file in progress()):
+        client.recorder.fail(UPLOAD_METRIC)
+        raise RuntimeError("Some uploaded files failed processing.")
+    client.recorder.record(UPLOAD_METRIC, time.perf_counter() - started)
+
+
+async def doctor_iteration(client: EventClient, options: argparse.Namespace):
+    await client.call(f"{DOCTOR_STATE}.on_load")
+    images = client.get(DOCTOR_STATE, "all_images", [])
+    if images:
+        await client.call(
+            f"{DOCTOR_STATE}.open_image_modal", image=random.choice(images)
+        )
+        await client.call(f"{DOCTOR_STATE}.close_image_modal")
+
+
+async def admin_iteration(client: EventClient, options: argparse.Namespace):
+    await client.call(
+        f"{ADMIN_STATE}.create_user",
+        form_data={
+            "name": "Load Test",
+            "email": f"loadtest-{uuid.uuid4().hex}@example.com",
+            "password": ACCOUNT_PASSWORD,
+            "role": "patient",
+        },
+    )
+
+
+ITERATIONS = {
+    "patient": patient_iteration,
+    "doctor": doctor_iteration,
+    "admin": admin_iteration,
+}
+
+
+async def simulate_user(
+    role: str, options: argparse.Namespace, recorder: LatencyRecorder, deadline: float
+):
+    """Log in as `role` and repeat that role's workflow until the deadline."""
+    client = EventClient(options.url, recorder)
+    try:
+        await client.connect()
+        await login(client, role)
+        while time.monotonic() < deadline:
+            try:
+                await ITERATIONS[role](client, options)
+            except Exception as exc:
+                print(f"{role}: {exc!r}", file=sys.stderr)
+            await asyncio.sleep(
+                random.expovariate(1 / options.think_time) if options.think_time else 0
+            )
+    finally:
+        await client.close()
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    """Parse `patient=6,doctor=3,admin=1` into role weights."""
+    weights = {}
+    for part in mix.split(","):
+        role, _, weight = part.partition("=")
+        if role.strip() not in ROLES:
+            raise argparse.ArgumentTypeError(f"Unknown role '{role}'.")
+        weights[role.strip()] = int(weight or 1)
+    return weights
+
+
+def assign_roles(users: int, weights: dict[str, int]) -> list[str]:
+    """Spread `users` over the roles in proportion to their weights."""
+    total = sum(weights.values())
+    roles = []
+    for role, weight in weights.items():
+        roles += [role] * round(users * weight / total)
+    return (roles or list(weights))[: max(users, 1)]
+
+
+def print_report(rows: list[dict[str, Any]], elapsed: float):
+    print(
+        f"\n{'handler':<36}{'count':>8}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    )
+    for row in rows:
+        print(
+            f"{row['handler']:<36}{row['count']:>8}{row['errors']:>6}{row['throughput']:>9.1f}"
+            f"{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}"
+        )
+    print(f"\n{elapsed:.1f}s elapsed")
+
+
+async def run(options: argparse.Namespace) -> tuple[list[dict[str, Any]], int]:
+    """Run the simulated users until the deadline; returns the report and failed users."""
+    recorder = LatencyRecorder()
+    roles = assign_roles(options.users, options.mix)
+    started = time.monotonic()
+    deadline = started + options.duration
+    results = await asyncio.gather(
+        *(simulate_user(role, options, recorder, deadline) for role in roles),
+        return_exceptions=True,
+    )
+    crashed = 0
+    for role, result in zip(roles, results):
+        if isinstance(result, Exception):
+            crashed += 1
+            print(f"{role}: {result!r}", file=sys.stderr)
+    elapsed = time.monotonic() - started
+    rows = recorder.report(elapsed)
+    print_report(rows, elapsed)
+    return rows, crashed
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000", help="Backend URL.")
+    parser.add_argument(
+        "--users", type=int, default=10, help="Concurrent simulated users."
+    )
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help="Role weights."
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run.")
+    parser.add_argument(
+        "--upload-size", type=int, default=512, help="KiB per uploaded file."
+    )
+    parser.add_argument("--files-per-upload", type=int, default=1)
+    parser.add_argument(
+        "--think-time", type=float, default=0.5, help="Mean pause between iterations."
+    )
+    parser.add_argument("--json", help="Also write the report to this file.")
+    parser.add_argument(
+        "--max-p99",
+        type=float,
+        help="Exit non-zero if any p99 in the report exceeds this many ms.",
+    )
+    options = parser.parse_args(argv)
+    rows, crashed = asyncio.run(run(options))
+    if options.json:
+        with open(options.json, "w") as report:
+            json.dump(rows, report, indent=2)
+    failed = crashed > 0 or any(row["errors"] for row in rows)
+    if options.max_p99 is not None:
+        failed |= any(row["p99_ms"] > options.max_p99 for row in rows)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())